@@ -0,0 +1,218 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Circuit breakers that stop requests to a failing Voyager endpoint."""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import time
+import threading
+import collections
+
+from api import exceptions as linkedin_api_exceptions, stats, transfer
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# Status codes of a degraded endpoint: the session or account is rejected,
+# the account is throttled, or the server is in trouble.
+FAILURE_STATUS_CODES = frozenset((401, 403, 408, 425, 429, 500, 502, 503, 504))
+
+
+class CircuitBreaker(object):
+  """Tracks the recent outcomes of the requests to an endpoint and rejects
+  new ones while the endpoint is failing.
+
+  The breaker starts `closed`. It opens once at least `min_calls` of the last
+  `window` requests completed and `failure_rate` of them or more failed. An
+  open breaker rejects every request for `cooldown` seconds, then turns
+  `half_open` and lets a single probe through: the breaker closes if the
+  probe succeeds, and opens again for twice as long (up to `max_cooldown`) if
+  it fails.
+
+  The state and the number of times the breaker opened and rejected a request
+  are kept in `stats_` as `breaker.<name>.state`, `breaker.<name>.opened` and
+  `breaker.<name>.rejected`.
+  """
+
+  def __init__(self,
+               name: str,
+               *,
+               window: int = 20,
+               min_calls: int = 5,
+               failure_rate: float = 0.5,
+               cooldown: float = 60.0,
+               max_cooldown: float = 900.0,
+               clock: Callable[[], float] = time.monotonic,
+               stats_: stats.Stats = None) -> None:
+    """Initializes a closed breaker.
+
+    Args:
+      name:         Name of the endpoint, used in errors and stats.
+      window:       Number of recent requests the failure rate is computed
+                    on.
+      min_calls:    Number of requests in the window below which the breaker
+                    stays closed.
+      failure_rate: Share of failed requests in the window that opens the
+                    breaker.
+      cooldown:     Seconds an open breaker rejects requests before probing
+                    the endpoint.
+      max_cooldown: Upper bound of the cooldown, doubled by every failed
+                    probe.
+      clock:        Monotonic clock, overridable for testing.
+      stats_:       Stats to record the breaker in. Defaults to
+                    `stats.STATS`.
+    """
+    self.name = name
+    self.min_calls = min_calls
+    self.failure_rate = failure_rate
+    self.cooldown = cooldown
+    self.max_cooldown = max_cooldown
+    self._clock = clock
+    self._stats = stats_ or stats.STATS
+    self._lock = threading.Lock()
+    self._outcomes = collections.deque(maxlen=window)
+    self._state = STATE_CLOSED
+    self._opened_at = None
+    self._current_cooldown = cooldown
+    self._probing = False
+    self._stats.set(f'breaker.{name}.state', STATE_CLOSED)
+
+  @property
+  def state(self) -> str:
+    with self._lock:
+      return self._state
+
+  def _set_state(self, state: str) -> None:
+    self._state = state
+    self._stats.set(f'breaker.{self.name}.state', state)
+
+  def _open(self) -> None:
+    self._set_state(STATE_OPEN)
+    self._opened_at = self._clock()
+    self._outcomes.clear()
+    self._stats.incr(f'breaker.{self.name}.opened')
+
+  def retry_after(self) -> float:
+    """Returns the seconds left before an open breaker lets a probe through,
+    0 if it lets requests through already.
+    """
+    with self._lock:
+      if self._state != STATE_OPEN:
+        return 0.0
+      return max(self._opened_at + self._current_cooldown - self._clock(), 0.0)
+
+  def _admits(self) -> bool:
+    if (self._state == STATE_OPEN and
+        self._clock() >= self._opened_at + self._current_cooldown):
+      self._set_state(STATE_HALF_OPEN)
+    return self._state == STATE_CLOSED or (self._state == STATE_HALF_OPEN and
+                                           not self._probing)
+
+  def _reject(self) -> None:
+    retry_after_ = max(self._opened_at + self._current_cooldown - self._clock(),
+                       0.0)
+    self._stats.incr(f'breaker.{self.name}.rejected')
+    raise linkedin_api_exceptions.LinkedInCircuitOpenException(
+        f'Requests to {self.name} are suspended after repeated failures,'
+        f' retrying in {retry_after_:.0f}s')
+
+  def check(self) -> None:
+    """Raises if the breaker would reject a request, without reserving the
+    probe of a half open breaker; cheap enough to call before pacing a
+    request.
+
+    Raises:
+      LinkedInCircuitOpenException: If the breaker is open, or half open with
+        its probe in flight.
+    """
+    with self._lock:
+      if self._admits():
+        return
+      self._reject()
+
+  def before_request(self) -> None:
+    """Lets a request through or rejects it. The request of a half open
+    breaker is its probe, whose outcome must be given to `record()`.
+
+    Raises:
+      LinkedInCircuitOpenException: If the breaker is open, or half open with
+        its probe in flight.
+    """
+    with self._lock:
+      if not self._admits():
+        self._reject()
+      if self._state == STATE_HALF_OPEN:
+        self._probing = True
+
+  def release(self) -> None:
+    """Forgets a request let through by `before_request()` that was never
+    completed, so a half open breaker can send another probe.
+    """
+    with self._lock:
+      self._probing = False
+
+  def record(self, success: bool) -> None:
+    """Records the outcome of a request let through by `before_request()`."""
+    with self._lock:
+      if self._state == STATE_HALF_OPEN:
+        self._probing = False
+        if success:
+          self._current_cooldown = self.cooldown
+          self._set_state(STATE_CLOSED)
+        else:
+          self._current_cooldown = min(self._current_cooldown * 2,
+                                       self.max_cooldown)
+          self._open()
+        return
+      if self._state == STATE_OPEN:
+        # A request let through before the breaker opened.
+        return
+      self._outcomes.append(success)
+      failures_ = self._outcomes.count(False)
+      if (len(self._outcomes) >= self.min_calls and
+          failures_ >= self.failure_rate * len(self._outcomes)):
+        self._open()
+
+
+class CircuitBreakers(object):
+  """One `CircuitBreaker` per endpoint, as named by `transfer.endpoint()`."""
+
+  def __init__(self, **kwargs) -> None:
+    """Initializes the registry.
+
+    Args:
+      **kwargs: Options of every `CircuitBreaker` created, e.g. `cooldown`.
+    """
+    self._kwargs = kwargs
+    self._lock = threading.Lock()
+    self._breakers = {}
+
+  def get(self, url: str) -> CircuitBreaker:
+    """Returns the breaker of the endpoint `url` belongs to."""
+    name_ = transfer.endpoint(url)
+    with self._lock:
+      breaker_ = self._breakers.get(name_)
+      if breaker_ is None:
+        breaker_ = self._breakers[name_] = CircuitBreaker(name_, **self._kwargs)
+      return breaker_
+
+  def states(self) -> dict[str, str]:
+    """Returns the state of every breaker, keyed by endpoint name."""
+    with self._lock:
+      breakers_ = list(self._breakers.values())
+    return {breaker.name: breaker.state for breaker in breakers_}
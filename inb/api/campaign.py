@@ -0,0 +1,273 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Campaigns of many people searches run as a single stream of results.
+
+A campaign spec is a JSON or YAML (requires `pyyaml`) document listing the
+queries of the campaign, e.g.:
+
+  interleave: round-robin
+  min_yield: 0.2
+  queries:
+    - keywords: python developer
+      regions: ["101282230"]
+      priority: 2
+    - keywords: backend engineer
+      network_depths: [S, O]
+      limit: 200
+
+Every query accepts the filters of `LinkedIn.search_people` and optionally a
+`name`, a `priority` and a `limit` of results. Results are deduplicated by URN
+across all the queries, so a profile matched by several queries is returned
+once. Since all the queries share the same client, they share its rate
+limiting and invitation quota as well.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import os
+import json
+import pathlib
+
+try:
+  import yaml
+except ImportError:
+  yaml = None
+
+from api import linkedin_api
+
+INTERLEAVE_ROUND_ROBIN = 'round-robin'
+INTERLEAVE_PRIORITY = 'priority'
+INTERLEAVINGS = (INTERLEAVE_ROUND_ROBIN, INTERLEAVE_PRIORITY)
+
+# Search filters a query may set, as accepted by `LinkedIn.search_people`.
+QUERY_FILTERS = ('keywords', 'connection_of', 'network_depths', 'network_depth',
+                 'regions', 'schools', 'industries', 'current_company',
+                 'profile_languages')
+
+_QUERY_OPTIONS = ('name', 'priority', 'limit')
+
+
+class CampaignQuery(object):
+  """A people search of a campaign and the yield it had so far."""
+
+  def __init__(self,
+               filters: dict,
+               *,
+               name: str = None,
+               priority: int = 0,
+               limit: int = None) -> None:
+    """Initializes the query.
+
+    Args:
+      filters:  Filters of the search, with keys in `QUERY_FILTERS`.
+      name:     Name the query is reported under. Defaults to its keywords.
+      priority: Queries with a higher priority go first when interleaving by
+                priority.
+      limit:    Maximum number of new results to take from the query.
+    """
+    self.filters = filters
+    self.name = name or filters.get('keywords') or 'query'
+    self.priority = priority
+    self.limit = limit
+    self.pages = 0
+    self.results = 0
+    self.new = 0
+    self.duplicates = 0
+    self.stop_reason = None
+
+  @property
+  def yield_(self) -> float:
+    """Share of the results of the query that no other query returned."""
+    return self.new / self.results if self.results else 0.0
+
+  def counters(self) -> dict:
+    return {
+        'name': self.name,
+        'pages': self.pages,
+        'results': self.results,
+        'new': self.new,
+        'duplicates': self.duplicates,
+        'yield': round(self.yield_, 3),
+        'stop_reason': self.stop_reason,
+    }
+
+
+def _parse_query(index: int, spec: dict) -> CampaignQuery:
+  if not isinstance(spec, dict):
+    raise ValueError(f'Query #{index} of the campaign is not a mapping')
+  unknown_ = spec.keys() - set(QUERY_FILTERS) - set(_QUERY_OPTIONS)
+  if unknown_:
+    raise ValueError(f'Query #{index} of the campaign has unknown keys'
+                     f' {sorted(unknown_)}, expected some of'
+                     f' {list(QUERY_FILTERS + _QUERY_OPTIONS)}')
+  filters_ = {key: spec[key] for key in QUERY_FILTERS if spec.get(key)}
+  if not filters_:
+    raise ValueError(f'Query #{index} of the campaign sets no filter')
+  limit_ = spec.get('limit')
+  if limit_ is not None and (not isinstance(limit_, int) or limit_ < 1):
+    raise ValueError(f'Query #{index} of the campaign has an invalid limit'
+                     f' "{limit_}"')
+  priority_ = spec.get('priority', 0)
+  if not isinstance(priority_, (int, float)):
+    raise ValueError(f'Query #{index} of the campaign has an invalid priority'
+                     f' "{priority_}"')
+  return CampaignQuery(filters_,
+                       name=spec.get('name'),
+                       priority=priority_,
+                       limit=limit_)
+
+
+class Campaign(object):
+  """Runs the queries of a campaign as a single stream of search results.
+
+  Queries take turns one page at a time (`round-robin`) or run one after the
+  other from the highest priority down (`priority`). After `min_pages` pages,
+  a query whose yield of results new to the campaign is below `min_yield` is
+  cut, since it mostly repeats the other queries.
+  """
+
+  def __init__(self,
+               queries: list[CampaignQuery],
+               *,
+               interleave: str = INTERLEAVE_ROUND_ROBIN,
+               min_yield: float = 0.0,
+               min_pages: int = 2) -> None:
+    """Initializes the campaign.
+
+    Raises:
+      ValueError: If there are no queries or `interleave` is unknown.
+    """
+    if not queries:
+      raise ValueError('A campaign needs at least one query')
+    if interleave not in INTERLEAVINGS:
+      raise ValueError(f'Unknown interleaving "{interleave}", expected one of'
+                       f' {list(INTERLEAVINGS)}')
+    self.queries = queries
+    self.interleave = interleave
+    self.min_yield = min_yield
+    self.min_pages = min_pages
+    self._seen = set()
+
+  @classmethod
+  def from_spec(cls, spec: dict) -> Campaign:
+    """Builds a campaign from a parsed spec.
+
+    Raises:
+      ValueError: If the spec is malformed.
+    """
+    if not isinstance(spec, dict) or not isinstance(spec.get('queries'), list):
+      raise ValueError('A campaign spec needs a list of "queries"')
+    queries_ = [
+        _parse_query(index, query)
+        for index, query in enumerate(spec['queries'], start=1)
+    ]
+    return cls(queries_,
+               interleave=spec.get('interleave', INTERLEAVE_ROUND_ROBIN),
+               min_yield=float(spec.get('min_yield', 0.0)),
+               min_pages=int(spec.get('min_pages', 2)))
+
+  @classmethod
+  def load(cls, path: str | os.PathLike) -> Campaign:
+    """Reads a campaign spec from a `.json`, `.yaml` or `.yml` file.
+
+    Raises:
+      ValueError: If the file is not a valid campaign spec.
+      RuntimeError: If the spec is YAML and `pyyaml` is not installed.
+    """
+    path = pathlib.Path(path)
+    text_ = path.read_text(encoding='utf-8')
+    if path.suffix.lower() in ('.yaml', '.yml'):
+      if yaml is None:
+        raise RuntimeError('YAML campaign specs require "pyyaml" to be'
+                           ' installed')
+      try:
+        return cls.from_spec(yaml.safe_load(text_))
+      except yaml.YAMLError as exc:
+        raise ValueError(f'Invalid YAML in "{path}": {exc}') from exc
+    try:
+      return cls.from_spec(json.loads(text_))
+    except json.JSONDecodeError as exc:
+      raise ValueError(f'Invalid JSON in "{path}": {exc}') from exc
+
+  def _take_new(self, query: CampaignQuery, page: list[dict]) -> list[dict]:
+    """Returns the results of a page not returned by any query before, and
+    updates the counters of the query.
+    """
+    query.pages += 1
+    new_ = []
+    for person in page:
+      if query.limit is not None and query.new + len(new_) >= query.limit:
+        break
+      query.results += 1
+      if person['urn_id'] in self._seen:
+        query.duplicates += 1
+        continue
+      self._seen.add(person['urn_id'])
+      new_.append(person)
+    query.new += len(new_)
+    return new_
+
+  def _is_done(self, query: CampaignQuery) -> bool:
+    if query.limit is not None and query.new >= query.limit:
+      query.stop_reason = 'limit'
+    elif query.pages >= self.min_pages and query.yield_ < self.min_yield:
+      query.stop_reason = 'low yield'
+    return query.stop_reason is not None
+
+  def iter_pages(self, linkedin: linkedin_api.LinkedIn,
+                 **kwargs) -> Iterator[list[dict]]:
+    """Runs the queries and yields the pages of results new to the campaign.
+
+    Args:
+      linkedin: Authenticated client all the queries are run with.
+      **kwargs: Options passed on to `LinkedIn.iter_search_people_pages` for
+                every query, e.g. `only_new`.
+    """
+    queries_ = self.queries
+    if self.interleave == INTERLEAVE_PRIORITY:
+      queries_ = sorted(queries_, key=lambda query: -query.priority)
+    searches_ = {
+        id(query): linkedin.iter_search_people_pages(**query.filters, **kwargs)
+        for query in queries_
+    }
+    active_ = list(queries_)
+    try:
+      while active_:
+        # Priority order runs the first active query until it is done.
+        turn_ = (list(active_)
+                 if self.interleave == INTERLEAVE_ROUND_ROBIN else active_[:1])
+        for query in turn_:
+          page_ = next(searches_[id(query)], None)
+          if page_ is None:
+            query.stop_reason = 'exhausted'
+          else:
+            new_ = self._take_new(query, page_)
+            if new_:
+              yield new_
+            self._is_done(query)
+          if query.stop_reason is not None:
+            active_.remove(query)
+            searches_.pop(id(query)).close()
+    finally:
+      for query in active_:
+        query.stop_reason = query.stop_reason or 'closed'
+      for search in searches_.values():
+        search.close()
+
+  def counters(self) -> list[dict]:
+    """Returns the counters of every query, in spec order."""
+    return [query.counters() for query in self.queries]
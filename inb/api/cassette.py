@@ -0,0 +1,247 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Record and replay of the HTTP traffic of a `requests.Session`.
+
+A cassette is a gzip compressed JSON lines file holding one record per
+response: the request method and URL, the response status, headers and body,
+and the time the server took to answer. Mount a `RecordingAdapter` on a
+session to capture a run, and a `ReplayAdapter` to serve the same responses
+later without the network, e.g.:
+
+  INB_CASSETTE=search.jsonl.gz INB_CASSETTE_MODE=record ./inb/inb.py search ...
+  INB_CASSETTE=search.jsonl.gz ./inb/inb.py search ...
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterator
+
+import gzip
+import json
+import time
+import base64
+import pathlib
+import requests
+import threading
+import collections
+
+from requests import adapters, structures, utils
+
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+# Replays with the latencies of the recording.
+MODE_REPLAY_REALTIME = 'replay-realtime'
+MODES = (MODE_RECORD, MODE_REPLAY, MODE_REPLAY_REALTIME)
+
+_VERSION = 1
+
+# Response headers that are not recorded: cookies are credentials, and the
+# body is stored decoded, so its original encoding and length no longer hold.
+_DROPPED_HEADERS = frozenset(
+    ('set-cookie', 'content-encoding', 'content-length', 'transfer-encoding'))
+
+
+def read_records(path: str) -> Iterator[dict]:
+  """Yields the records of a cassette.
+
+  A cassette cut short, e.g. by a recording process that was killed, yields
+  the records flushed before the cut.
+
+  Raises:
+    ValueError: If the file is not a cassette of a supported version.
+  """
+  with gzip.open(path, 'rt', encoding='utf-8') as file_:
+    lines_ = iter(file_)
+    try:
+      header_ = json.loads(next(lines_, 'null'))
+      if not isinstance(header_, dict) or header_.get('version') != _VERSION:
+        raise ValueError(f'{path} is not a version {_VERSION} cassette')
+      for line in lines_:
+        yield json.loads(line)
+    except (EOFError, json.JSONDecodeError):
+      return
+
+
+class RecordingAdapter(adapters.BaseAdapter):
+  """Sends requests through `inner` and appends every response to a cassette.
+
+  Records are flushed as they are written, so the cassette stays readable up
+  to the last response even if the run is interrupted.
+  """
+
+  def __init__(self,
+               path: str,
+               inner: adapters.BaseAdapter = None,
+               *,
+               clock: Callable[[], float] = time.perf_counter) -> None:
+    super().__init__()
+    self.path = pathlib.Path(path)
+    self.inner = inner or adapters.HTTPAdapter()
+    self.records = 0
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+    self._write({'version': _VERSION})
+
+  def _write(self, record: dict) -> None:
+    with self._lock:
+      self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+      self._file.flush()
+
+  def send(self,
+           request: requests.PreparedRequest,
+           stream: bool = False,
+           timeout: float | tuple = None,
+           verify: bool | str = True,
+           cert: str | tuple = None,
+           proxies: dict = None) -> requests.Response:
+    started_ = self._clock()
+    response_ = self.inner.send(request,
+                                stream=stream,
+                                timeout=timeout,
+                                verify=verify,
+                                cert=cert,
+                                proxies=proxies)
+    # Reads the body, so the recorded time covers the whole response.
+    content_ = response_.content or b''
+    elapsed_ = self._clock() - started_
+    try:
+      body_, binary_ = content_.decode('utf-8'), False
+    except UnicodeDecodeError:
+      body_, binary_ = base64.b64encode(content_).decode('ascii'), True
+    self._write({
+        'method': request.method,
+        'url': request.url,
+        'status': response_.status_code,
+        'reason': response_.reason,
+        'headers': {
+            name: value
+            for name, value in response_.headers.items()
+            if name.lower() not in _DROPPED_HEADERS
+        },
+        'body': body_,
+        'binary': binary_,
+        'elapsed': round(elapsed_, 6),
+    })
+    self.records += 1
+    return response_
+
+  def close(self) -> None:
+    self.inner.close()
+    with self._lock:
+      if not self._file.closed:
+        self._file.close()
+
+
+class ReplayAdapter(adapters.BaseAdapter):
+  """Serves the responses of a cassette instead of sending requests.
+
+  Requests are matched by method and URL; repeated requests get the recorded
+  responses in the order they were recorded. A request without a recorded
+  response left raises `requests.ConnectionError`, like an unreachable
+  server would.
+  """
+
+  def __init__(self,
+               path: str,
+               *,
+               realtime: bool = False,
+               sleep: Callable[[float], None] = time.sleep) -> None:
+    """Loads the cassette.
+
+    Args:
+      path:     Path of the cassette.
+      realtime: Whether to wait for the recorded latency of every response,
+                otherwise responses are served as fast as possible.
+      sleep:    Sleep function, overridable for testing.
+    """
+    super().__init__()
+    self.path = pathlib.Path(path)
+    self.realtime = realtime
+    self.replayed = 0
+    self._sleep = sleep
+    self._lock = threading.Lock()
+    self._records = collections.defaultdict(collections.deque)
+    for record in read_records(path):
+      self._records[(record['method'], record['url'])].append(record)
+
+  def __len__(self) -> int:
+    """Returns the number of responses left to replay."""
+    with self._lock:
+      return sum(len(records) for records in self._records.values())
+
+  def send(self,
+           request: requests.PreparedRequest,
+           stream: bool = False,
+           timeout: float | tuple = None,
+           verify: bool | str = True,
+           cert: str | tuple = None,
+           proxies: dict = None) -> requests.Response:
+    del stream, timeout, verify, cert, proxies  # Nothing is sent.
+    with self._lock:
+      records_ = self._records.get((request.method, request.url))
+      record_ = records_.popleft() if records_ else None
+    if record_ is None:
+      raise requests.ConnectionError(
+          f'No recorded response for {request.method} {request.url} in'
+          f' {self.path}',
+          request=request)
+    if self.realtime:
+      self._sleep(record_['elapsed'])
+    self.replayed += 1
+
+    response_ = requests.Response()
+    response_.status_code = record_['status']
+    response_.reason = record_['reason']
+    response_.headers = structures.CaseInsensitiveDict(record_['headers'])
+    response_.encoding = utils.get_encoding_from_headers(response_.headers)
+    response_._content = (  # pylint: disable=protected-access
+        base64.b64decode(record_['body'])
+        if record_['binary'] else record_['body'].encode('utf-8'))
+    response_.url = request.url
+    response_.request = request
+    response_.connection = self
+    return response_
+
+  def close(self) -> None:
+    pass
+
+
+def mount(session: requests.Session,
+          path: str,
+          mode: str = MODE_REPLAY) -> adapters.BaseAdapter:
+  """Mounts a recording or replaying adapter for every URL of `session`.
+
+  Args:
+    session: Session whose traffic to record or replay.
+    path:    Path of the cassette.
+    mode:    One of `MODES`.
+
+  Returns:
+    The mounted adapter.
+
+  Raises:
+    ValueError: If `mode` is unknown.
+  """
+  if mode == MODE_RECORD:
+    adapter_ = RecordingAdapter(path, session.get_adapter('https://'))
+  elif mode in (MODE_REPLAY, MODE_REPLAY_REALTIME):
+    adapter_ = ReplayAdapter(path, realtime=mode == MODE_REPLAY_REALTIME)
+  else:
+    raise ValueError(f'Unknown cassette mode "{mode}", expected one of'
+                     f' {list(MODES)}')
+  session.mount('https://', adapter_)
+  session.mount('http://', adapter_)
+  return adapter_
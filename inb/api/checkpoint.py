@@ -0,0 +1,76 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Progress checkpoints for long running, resumable jobs."""
+
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import pathlib
+
+from api import settings
+
+
+class Checkpoint(object):
+  """A small JSON document persisted atomically under `INB_CHECKPOINT_DIR`.
+
+  A job stores whatever it needs to resume (e.g., a byte offset in its input
+  file) with `save()` and reads it back with `load()` on the next run.
+  """
+
+  def __init__(self, name: str, checkpoint_dir: str = None) -> None:
+    if checkpoint_dir is None:
+      checkpoint_dir = settings.INB_CHECKPOINT_DIR
+    self.checkpoint_dir = pathlib.Path(checkpoint_dir)
+    self.name = name
+
+  @staticmethod
+  def name_for(*parts: str) -> str:
+    """Returns a file system safe checkpoint name derived from `parts`."""
+    return hashlib.sha1('\0'.join(parts).encode('utf-8')).hexdigest()
+
+  def get_checkpoint_file_path(self) -> pathlib.Path:
+    """Returns the path of the checkpoint file."""
+    return self.checkpoint_dir / f'{self.name}.json'
+
+  def load(self) -> dict:
+    """Returns the last saved state or an empty dictionary."""
+    checkpoint_file_path = self.get_checkpoint_file_path()
+    if not os.path.exists(checkpoint_file_path):
+      return {}
+    with open(checkpoint_file_path, 'r', encoding='utf-8') as checkpoint_file:
+      return json.load(checkpoint_file)
+
+  def save(self, state: dict) -> None:
+    """Saves the given state.
+
+    The state is first written to a temporary file which then replaces the
+    checkpoint file, so a crash mid-write never leaves a corrupt checkpoint.
+    """
+    if not os.path.exists(os.fspath(self.checkpoint_dir)):
+      os.makedirs(os.fspath(self.checkpoint_dir))
+
+    checkpoint_file_path = self.get_checkpoint_file_path()
+    tmp_file_path = checkpoint_file_path.with_suffix('.tmp')
+    with open(tmp_file_path, 'w', encoding='utf-8') as checkpoint_file:
+      json.dump(state, checkpoint_file)
+    os.replace(tmp_file_path, checkpoint_file_path)
+
+  def clear(self) -> None:
+    """Deletes the checkpoint, if any."""
+    checkpoint_file_path = self.get_checkpoint_file_path()
+    if os.path.exists(checkpoint_file_path):
+      os.remove(checkpoint_file_path)
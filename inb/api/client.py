@@ -13,15 +13,24 @@
 # limitations under the License.
 """Client simulator for Voyager API."""
 
+from __future__ import annotations
+
 import sys
-import bs4
 import json
+import time
 import logging
 import requests
+import threading
 
 from requests import cookies
 
-from api import (exceptions as linkedin_api_exceptions, cookierepo, settings)
+try:
+  import lxml
+except ImportError:
+  lxml = None
+
+from api import (exceptions as linkedin_api_exceptions, cassette, cookierepo,
+                 deadline, settings, stats, trace, transfer)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -53,6 +62,15 @@ class Client(object):
       'x-restli-protocol-version': '2.0.0'
   }
 
+  # Lightweight authenticated end-point, answering 200 as long as the session
+  # cookies are valid.
+  PROBE_URI = '/me'
+
+  # Seconds after a login during which a rejected session is not renewed:
+  # the account itself is refused, and logging in over and over would only
+  # get it flagged.
+  REAUTHENTICATE_INTERVAL = 300.0
+
   API_AUTH_REQUEST_HEADERS = {
       'X-Li-User-Agent':
           'LIAuthLibrary:3.2.4 com.linkedin.LinkedIn:8.8.1 iPhone:8.3',
@@ -71,8 +89,34 @@ class Client(object):
                debug: bool = False,
                refresh_cookies: bool = False,
                proxies: dict = None,
-               cookies_dir: str = None) -> None:
+               cookies_dir: str = None,
+               refresh_margin: float = None) -> None:
+    """Initializes the client.
+
+    Args:
+      debug:           Whether to enable debug logging.
+      refresh_cookies: Whether to ignore the cached cookies and log in again.
+      proxies:         A dictionary of proxy settings.
+      cookies_dir:     The directory to cache authentication cookies in.
+      refresh_margin:  Seconds before the session cookies expire at which to
+                       log in again in the background. Defaults to
+                       `settings.INB_COOKIE_REFRESH_MARGIN`.
+    """
     self.session = requests.session()
+    # Sends the authentication and homepage requests, which carry none of the
+    # session headers.
+    self._http = requests
+    self.cassette = None
+    if settings.INB_CASSETTE:
+      self.cassette = cassette.mount(self.session, settings.INB_CASSETTE,
+                                     settings.INB_CASSETTE_MODE)
+      self._http = requests.Session()
+      self._http.mount('https://', self.cassette)
+      self._http.mount('http://', self.cassette)
+    # Negotiates compression and accounts the bytes of the API requests.
+    transfer.install(self.session)
+    if settings.INB_TRACE:
+      trace.install(self.session, trace.start(settings.INB_TRACE))
 
     if not proxies:
       proxies = {}
@@ -85,6 +129,14 @@ class Client(object):
 
     self._cookies_dir = cookies_dir
     self._use_cookie_cache = not refresh_cookies
+    self.refresh_margin = (settings.INB_COOKIE_REFRESH_MARGIN
+                           if refresh_margin is None else refresh_margin)
+    # Kept by `authenticate`, so an expired session can be renewed without
+    # the caller noticing.
+    self._credentials = None
+    self._auth_lock = threading.Lock()
+    self._logged_in_at = None
+    self._refresh_timer = None
 
     self._logger = logger
     if not debug:
@@ -98,18 +150,23 @@ class Client(object):
 
   def _request_session_cookies(self) -> cookies.RequestsCookieJar:
     """Request cookies for the established session."""
-    return requests.get(Client.LINKEDIN_AUTH_URL,
-                        headers=Client.API_AUTH_REQUEST_HEADERS,
-                        proxies=self.proxies,
-                        timeout=60.0).cookies
+    return self._http.get(Client.LINKEDIN_AUTH_URL,
+                          headers=Client.API_AUTH_REQUEST_HEADERS,
+                          proxies=self.proxies,
+                          timeout=60.0).cookies
 
   def _fetch_metadata(self) -> None:
-    result_ = requests.get(Client.LINKEDIN_BASE_URL,
-                           cookies=self.session.cookies,
-                           headers=Client.API_AUTH_REQUEST_HEADERS,
-                           proxies=self.proxies,
-                           timeout=60.0)
-    soup_ = bs4.BeautifulSoup(result_.text, 'lxml')
+    # Only needed after a full login, so its import stays off the start-up
+    # path of every command.
+    import bs4  # pylint: disable=import-outside-toplevel
+
+    result_ = self._http.get(Client.LINKEDIN_BASE_URL,
+                             cookies=self.session.cookies,
+                             headers=Client.API_AUTH_REQUEST_HEADERS,
+                             proxies=self.proxies,
+                             timeout=60.0)
+    soup_ = bs4.BeautifulSoup(result_.text,
+                              'html.parser' if lxml is None else 'lxml')
 
     if client_application_instance_raw := soup_.find(
         'meta', attrs={'name': 'applicationInstance'}):
@@ -131,12 +188,12 @@ class Client(object):
         'session_password': password,
         'JSESSIONID': self.session.cookies['JSESSIONID']
     }
-    result_ = requests.post(Client.LINKEDIN_AUTH_URL,
-                            data=payload_,
-                            cookies=self.session.cookies,
-                            headers=Client.API_AUTH_REQUEST_HEADERS,
-                            proxies=self.proxies,
-                            timeout=60.0)
+    result_ = self._http.post(Client.LINKEDIN_AUTH_URL,
+                              data=payload_,
+                              cookies=self.session.cookies,
+                              headers=Client.API_AUTH_REQUEST_HEADERS,
+                              proxies=self.proxies,
+                              timeout=60.0)
     data_ = result_.json()
     if data_ and data_['login_result'] != 'PASS':
       raise linkedin_api_exceptions.LinkedInChallengeException(
@@ -153,23 +210,128 @@ class Client(object):
     self._cookie_repository.username = username
     self._cookie_repository.save()
 
+  def probe(self) -> bool:
+    """Returns whether the server still accepts the session cookies, with a
+    single request to a lightweight authenticated end-point.
+    """
+    result_ = self.session.get(
+        f'{Client.VOYAGER_API_BASE_URL}{Client.PROBE_URI}',
+        timeout=(deadline.CONNECT_TIMEOUT, deadline.READ_TIMEOUT))
+    return result_.status_code == 200
+
   def authenticate(self, username: str, password: str) -> None:
+    """Authenticates the session, with the cached cookies whenever they are
+    still valid and by logging in otherwise.
+
+    Cached cookies are first checked for expiry locally, then with a single
+    `probe()` request. Once authenticated, the session is renewed in the
+    background `refresh_margin` seconds before its cookies expire.
+    """
+    self._credentials = (username, password)
     self._cookie_repository = cookierepo.CookieRepository(
         username=username, cookies_=None, cookie_dir=self._cookies_dir)
     if self._use_cookie_cache:
       self._logger.debug('Attempting to use cached cookies at %s',
                          self._cookie_repository.get_cookie_dir())
-      cookies_ = self._cookie_repository.get_cookies()
-      if cookies_:
+      try:
+        cookies_ = self._cookie_repository.get_cookies()
+      except linkedin_api_exceptions.LinkedInSessionExpiredException:
+        cookies_ = None
+      if cookies_ and not cookierepo.is_expired(cookies_, self.refresh_margin):
         self._set_session_cookies(cookies_)
-        self._fetch_metadata()
-        return
+        if self.probe():
+          self._schedule_refresh()
+          return
+        self._logger.warning('Cached cookies at %s were rejected',
+                             self._cookie_repository.get_cookie_dir())
+      else:
+        self._logger.warning('No valid cached cookies at %s',
+                             self._cookie_repository.get_cookie_dir())
 
-    self._logger.warning('Empty cookie repository at %s',
-                         self._cookie_repository.get_cookie_dir())
     self._logger.info(
         'Falling back to authentication using (username="%s", password="%s")',
         username, '*' * len(password))
 
     self._fallback_authentication(username, password)
+    self._logged_in_at = time.monotonic()
     self._fetch_metadata()
+    self._schedule_refresh()
+
+  def reauthenticate(self,
+                     stale_cookies: cookies.RequestsCookieJar = None) -> bool:
+    """Logs in again with the credentials given to `authenticate`.
+
+    Concurrent callers that saw the same expired session log in once: a
+    caller whose `stale_cookies` were already replaced returns right away.
+    Sessions rejected within `REAUTHENTICATE_INTERVAL` seconds of a login are
+    not renewed.
+
+    Args:
+      stale_cookies: Session cookies the caller found expired.
+
+    Returns:
+      Whether the session was renewed; `False` for clients authenticated with
+      cookies alone, which have no credentials to log in with.
+
+    Raises:
+      LinkedInUnauthorizedException: If the client logged in less than
+        `REAUTHENTICATE_INTERVAL` seconds ago.
+    """
+    if not self._credentials or not self._credentials[1]:
+      return False
+    with self._auth_lock:
+      renewed_ = self.session.cookies is not stale_cookies
+      if stale_cookies is not None and renewed_:
+        return True
+      if (self._logged_in_at is not None and
+          time.monotonic() - self._logged_in_at
+          < Client.REAUTHENTICATE_INTERVAL):
+        raise linkedin_api_exceptions.LinkedInUnauthorizedException(
+            'Session rejected again right after logging in')
+      self._fallback_authentication(*self._credentials)
+      self._logged_in_at = time.monotonic()
+    stats.STATS.incr('session.reauthenticated')
+    self._schedule_refresh()
+    return True
+
+  def _schedule_refresh(self) -> None:
+    """Schedules a background login `refresh_margin` seconds before the
+    session cookies expire, replacing any login scheduled before.
+    """
+    self._cancel_refresh()
+    expires_at_ = cookierepo.expires_at(self.session.cookies)
+    if expires_at_ is None or not self._credentials or not self._credentials[1]:
+      return
+    delay_ = expires_at_ - self.refresh_margin - time.time()
+    if delay_ <= 0:
+      # Cookies fresh from a login that already expire within the margin
+      # would be refreshed over and over.
+      self._logger.warning(
+          'Session cookies expire within the %d seconds refresh margin',
+          self.refresh_margin)
+      return
+    self._refresh_timer = threading.Timer(delay_,
+                                          self._refresh_in_background,
+                                          args=(self.session.cookies,))
+    self._refresh_timer.daemon = True
+    self._refresh_timer.start()
+
+  def _refresh_in_background(self,
+                             stale_cookies: cookies.RequestsCookieJar) -> None:
+    try:
+      self.reauthenticate(stale_cookies)
+    except Exception:  # pylint: disable=broad-except
+      # Requests keep the current session; the first one rejected logs in
+      # again in the foreground.
+      stats.STATS.incr('session.refresh_failed')
+      self._logger.exception('Background session refresh failed')
+
+  def _cancel_refresh(self) -> None:
+    if self._refresh_timer is not None:
+      self._refresh_timer.cancel()
+      self._refresh_timer = None
+
+  def close(self) -> None:
+    """Cancels the background session refresh and closes the session."""
+    self._cancel_refresh()
+    self.session.close()
@@ -0,0 +1,197 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local snapshot of the account's first degree connections."""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+import itertools
+import os
+import pathlib
+import sqlite3
+import threading
+
+from api import checkpoint, linkedin_api, settings
+
+
+class ConnectionSnapshot(object):
+  """A SQLite backed copy of the connections of an account.
+
+  The snapshot is kept up to date with `sync()`, which walks the connections
+  newest first and stops at the first page reaching an already known
+  connection, so a sync only costs as many requests as there are new pages.
+  That shortcut only holds once a first pass has gone through all of them:
+  until then, every sync resumes the pass at the offset where the previous
+  one stopped, which is stored along with the connections. Membership checks
+  run against an in-memory index and never hit the network.
+  """
+
+  def __init__(self, account: str, snapshot_dir: str = None) -> None:
+    if snapshot_dir is None:
+      snapshot_dir = settings.INB_CACHE_DIR / 'connections'
+    self.snapshot_dir = pathlib.Path(snapshot_dir)
+    if not os.path.exists(os.fspath(self.snapshot_dir)):
+      os.makedirs(os.fspath(self.snapshot_dir))
+
+    self.account = account
+    self._lock = threading.Lock()
+    self._connection = sqlite3.connect(
+        os.fspath(self.snapshot_dir /
+                  f'{checkpoint.Checkpoint.name_for(account)}.sqlite3'),
+        check_same_thread=False)
+    self._connection.execute('CREATE TABLE IF NOT EXISTS connections ('
+                             ' urn_id TEXT PRIMARY KEY,'
+                             ' public_id TEXT,'
+                             ' name TEXT,'
+                             ' created_at REAL NOT NULL'
+                             ')')
+    # Progress of the first pass: `resume_start` is the offset it resumes
+    # at, and `complete` is set once it has reached the oldest connection.
+    self._connection.execute('CREATE TABLE IF NOT EXISTS sync_state ('
+                             ' key TEXT PRIMARY KEY,'
+                             ' value INTEGER NOT NULL'
+                             ')')
+    self._connection.commit()
+    self._known_ids = None
+
+  def __len__(self) -> int:
+    with self._lock:
+      return self._connection.execute(
+          'SELECT COUNT(*) FROM connections').fetchone()[0]
+
+  def newest_urn_ids(self) -> set[str]:
+    """Returns the URN ids of the connections with the newest `created_at`."""
+    with self._lock:
+      rows_ = self._connection.execute(
+          'SELECT urn_id FROM connections WHERE created_at ='
+          ' (SELECT MAX(created_at) FROM connections)').fetchall()
+    return {row[0] for row in rows_}
+
+  def add(self, connections: Iterable[dict]) -> None:
+    """Adds or updates the given normalized connections."""
+    rows_ = [(connection['urn_id'], connection.get('public_id'),
+              connection.get('name'), connection.get('created_at') or 0)
+             for connection in connections]
+    with self._lock:
+      self._connection.executemany(
+          'INSERT OR REPLACE INTO connections'
+          ' (urn_id, public_id, name, created_at) VALUES (?, ?, ?, ?)', rows_)
+      self._connection.commit()
+      if self._known_ids is not None:
+        for urn_id, public_id, *_ in rows_:
+          self._known_ids.update(filter(None, (urn_id, public_id)))
+
+  def clear(self) -> None:
+    with self._lock:
+      self._connection.execute('DELETE FROM connections')
+      self._connection.execute('DELETE FROM sync_state')
+      self._connection.commit()
+      self._known_ids = None
+
+  @property
+  def complete(self) -> bool:
+    """Whether a first pass has gone through all the connections."""
+    return bool(self._get_state('complete'))
+
+  def _get_state(self, key: str) -> int | None:
+    with self._lock:
+      row_ = self._connection.execute(
+          'SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+    return None if row_ is None else row_[0]
+
+  def _set_state(self, **values: int) -> None:
+    with self._lock:
+      self._connection.executemany(
+          'INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)',
+          values.items())
+      self._connection.commit()
+
+  def sync(self, linkedin: linkedin_api.LinkedIn, full: bool = False) -> int:
+    """Fetches the connections made since the last sync.
+
+    The pages of new connections are only stored once the walk reaches a known
+    connection: an interrupted sync stores none of them, rather than the
+    newest few, which the next sync would stop at and leave a gap behind. A
+    walk cut short before that (at the page limit of
+    `linkedin_api.LinkedIn.iter_connections`) goes on as a first pass.
+
+    Args:
+      linkedin: Authenticated `linkedin_api.LinkedIn` client.
+      full:     Whether to rebuild the snapshot from scratch, which also drops
+                the connections that were removed since.
+
+    Returns:
+      Number of connections added to the snapshot.
+    """
+    if full:
+      self.clear()
+    before_ = len(self)
+    if not self.complete:
+      self._first_pass(linkedin, self._get_state('resume_start') or 0)
+      return len(self) - before_
+
+    newest_ = self.newest_urn_ids()
+    pages_ = []
+    start_ = 0
+    reached_known_ = False
+    for page in linkedin.iter_connections():
+      pages_.append(page)
+      start_ += len(page)
+      if newest_ & {connection['urn_id'] for connection in page}:
+        reached_known_ = True
+        break
+    self.add(itertools.chain.from_iterable(pages_))
+    if not reached_known_:
+      self._set_state(complete=0, resume_start=start_)
+      self._first_pass(linkedin, start_)
+    return len(self) - before_
+
+  def _first_pass(self, linkedin: linkedin_api.LinkedIn, start: int) -> None:
+    """Walks the connections from the offset `start` to the oldest one.
+
+    The offset reached is stored after every page, for the next sync to resume
+    at. A single walk stops after a bounded number of pages, so walks follow
+    one another until one finds no more connections.
+    """
+    while True:
+      walked_ = False
+      for page in linkedin.iter_connections(offset=start):
+        walked_ = True
+        self.add(page)
+        start += len(page)
+        self._set_state(resume_start=start)
+      if not walked_:
+        break
+    self._set_state(complete=1)
+
+  def _index(self) -> set[str]:
+    with self._lock:
+      if self._known_ids is None:
+        self._known_ids = set()
+        for urn_id, public_id in self._connection.execute(
+            'SELECT urn_id, public_id FROM connections'):
+          self._known_ids.update(filter(None, (urn_id, public_id)))
+      return self._known_ids
+
+  def is_connected(self, *, urn_id: str = None, public_id: str = None) -> bool:
+    """Returns whether the profile with the given ids is a known connection."""
+    known_ids_ = self._index()
+    if urn_id is not None and urn_id in known_ids_:
+      return True
+    return public_id is not None and public_id in known_ids_
+
+  def close(self) -> None:
+    self._connection.close()
@@ -14,6 +14,8 @@
 
 """Authentication Cookie-Repository Management Package."""
 
+from __future__ import annotations
+
 import os
 import time
 import pickle
@@ -23,6 +25,33 @@ from requests import cookies
 
 from api import settings, exceptions as linkedin_api_exceptions
 
+# Cookies whose expiry bounds the authenticated session.
+SESSION_COOKIES = ('li_at', 'JSESSIONID')
+
+
+def expires_at(cookies_: cookies.RequestsCookieJar) -> float | None:
+  """Returns the earliest expiry time of the session cookies in `cookies_`,
+  `None` if none of them expires.
+  """
+  expiries_ = [
+      cookie.expires
+      for cookie in cookies_
+      if cookie.name in SESSION_COOKIES and cookie.value and cookie.expires
+  ]
+  return min(expiries_, default=None)
+
+
+def is_expired(cookies_: cookies.RequestsCookieJar,
+               margin: float = 0.0,
+               now: float = None) -> bool:
+  """Returns whether a session cookie in `cookies_` expires within `margin`
+  seconds, without a request.
+  """
+  expires_at_ = expires_at(cookies_)
+  if expires_at_ is None:
+    return False
+  return expires_at_ <= (time.time() if now is None else now) + margin
+
 
 class CookieRepository(object):
   """Creates a 'Cookie Repository' in the given directory."""
@@ -68,6 +97,10 @@ class CookieRepository(object):
 
     Returns:
       'cookies.RequestsCookieJar' instance of user cookies.
+
+    Raises:
+      LinkedInSessionExpiredException: If the saved session cookies have
+        expired.
     """
     # Every user has a Cookie Repository in the 'cookies directory' with a file
     # name equal to their 'username'.
@@ -80,9 +113,7 @@ class CookieRepository(object):
       cookies_ = pickle.load(jar_file)
 
     # We still need to check if the cookies have expired.
-    for cookie in cookies_:
-      if cookie.name == 'JSESSIONID' and cookie.value:
-        if cookie.expires and cookie.expires > time.time():
-          raise linkedin_api_exceptions.LinkedInSessionExpiredException()
-        break
+    if is_expired(cookies_):
+      raise linkedin_api_exceptions.LinkedInSessionExpiredException(
+          f'Cached cookies of "{self.username}" have expired')
     return cookies_
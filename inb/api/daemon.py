@@ -0,0 +1,363 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Long running daemon executing the jobs of a `jobqueue.JobQueue`.
+
+The daemon keeps one authenticated `LinkedIn` client per account alive for as
+long as it runs, so the start-up cost of a run (imports and cookie loading) is
+paid once per account instead of once per job.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import os
+import sys
+import time
+import logging
+import threading
+import itertools
+import contextlib
+
+from concurrent import futures
+
+from api import (checkpoint, cookierepo, exceptions as linkedin_api_exceptions,
+                 export, jobqueue, linkedin_api, messagetemplate, outcome,
+                 quota, ranking, ratelimit, settings, stats, targets, urncache)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+file_handler = logging.FileHandler(settings.INB_LOG_DIR / __name__, mode='a')
+file_handler.setFormatter(logging.Formatter(settings.LOG_FORMAT_STR))
+
+if settings.LOGGING_TO_STREAM_ENABLED:
+  stream_handler = logging.StreamHandler(sys.stderr)
+  stream_handler.setFormatter(logging.Formatter(settings.LOG_FORMAT_STR))
+  logger.addHandler(stream_handler)
+
+logger.addHandler(file_handler)
+
+# Search keyword arguments a `search` or `export` job may carry.
+_SEARCH_PARAMS = ('keywords', 'regions', 'connection_of', 'network_depths',
+                  'network_depth', 'industries', 'current_company',
+                  'profile_languages', 'schools', 'include_private_profiles',
+                  'only_new', 'max_stale_pages')
+
+
+class SessionPool(object):
+  """Keeps one authenticated `LinkedIn` client per account.
+
+  Clients are created on first use from the cookies cached by a previous
+  interactive run, since the daemon never sees the account passwords. Every
+  client gets its own `ratelimit.RateScheduler`, `quota.InvitationQuota` and
+  `outcome.NegativeCache`, which outlive the jobs, so the per-account limits
+  hold across consecutive jobs as well.
+  """
+
+  def __init__(self,
+               *,
+               scheduler_factory: Callable[[], ratelimit.RateScheduler],
+               cookies_dir: str = None,
+               weekly_limit: int = 100,
+               debug: bool = False) -> None:
+    self._scheduler_factory = scheduler_factory
+    self._weekly_limit = weekly_limit
+    self._cookies_dir = cookies_dir
+    self._debug = debug
+    self._lock = threading.Lock()
+    self._sessions = {}
+    self.urn_cache = urncache.UrnCache()
+
+  def get(self, account: str) -> linkedin_api.LinkedIn:
+    """Returns the client of the given account, authenticating it if needed.
+
+    Raises:
+      LinkedInUnauthorizedException: If there are no cached cookies for the
+        account.
+    """
+    with self._lock:
+      if account in self._sessions:
+        return self._sessions[account]
+
+      cookies_ = cookierepo.CookieRepository(
+          username=account, cookies_=None,
+          cookie_dir=self._cookies_dir).get_cookies()
+      if not cookies_:
+        raise linkedin_api_exceptions.LinkedInUnauthorizedException(
+            f'No cached cookies for "{account}", run any command with'
+            ' --email once to authenticate the account')
+      linkedin = linkedin_api.LinkedIn(
+          account,
+          '',
+          authenticate=True,
+          debug=self._debug,
+          cookies_=cookies_,
+          cookies_dir=self._cookies_dir,
+          evade=self._scheduler_factory(),
+          urn_cache=self.urn_cache,
+          quota_=quota.InvitationQuota(account, limit=self._weekly_limit),
+          negative_cache=outcome.NegativeCache(account))
+      self._sessions[account] = linkedin
+      return linkedin
+
+  def evict(self, account: str) -> None:
+    """Closes the client of the given account, e.g. after its session
+    expired.
+    """
+    with self._lock:
+      linkedin = self._sessions.pop(account, None)
+    if linkedin is not None:
+      linkedin.close()
+
+  def close(self) -> None:
+    with self._lock:
+      sessions_ = list(self._sessions.values())
+      self._sessions.clear()
+    for linkedin in sessions_:
+      linkedin.close()
+    self.urn_cache.close()
+
+
+class JobContext(object):
+  """Progress reporting and cancellation for a running job."""
+
+  # Minimum number of seconds between two progress writes to the queue.
+  _REPORT_INTERVAL = 1.0
+
+  def __init__(self, queue: jobqueue.JobQueue, job: jobqueue.Job,
+               stop_event: threading.Event) -> None:
+    self.job = job
+    self.stats = stats.Stats()
+    self._queue = queue
+    self._stop_event = stop_event
+    self._last_report = 0.0
+
+  def report(self, force: bool = False) -> None:
+    """Writes the progress to the queue, at most every `_REPORT_INTERVAL`.
+
+    Raises:
+      JobCancelledException: If the daemon is shutting down.
+    """
+    now_ = time.monotonic()
+    if force or now_ - self._last_report >= JobContext._REPORT_INTERVAL:
+      self._queue.update_progress(self.job.id, self.stats.snapshot())
+      self._last_report = now_
+    if self._stop_event.is_set():
+      raise linkedin_api_exceptions.JobCancelledException()
+
+
+def _search_kwargs(params: dict) -> dict:
+  return {key: params[key] for key in _SEARCH_PARAMS if key in params}
+
+
+def _page_filter(params: dict) -> ranking.PageFilter:
+  """Builds the local result filter from the `filter` parameter, a dictionary
+  of `ranking.PageFilter` keyword arguments.
+  """
+  return ranking.PageFilter(**params.get('filter', {}))
+
+
+def _message_template(params: dict) -> messagetemplate.MessageTemplate | None:
+  """Compiles the `message_template` parameter, if any, once per job."""
+  if params.get('message_template') is None:
+    return None
+  return messagetemplate.MessageTemplate(params['message_template'])
+
+
+def _invite(linkedin: linkedin_api.LinkedIn,
+            target: dict,
+            params: dict,
+            context: JobContext,
+            template: messagetemplate.MessageTemplate = None) -> bool:
+  message_ = params.get('message', '')
+  if template is not None:
+    message_ = template.render(target)
+  outcome_ = linkedin.add_connection(target['public_id'],
+                                     message=message_,
+                                     profile_urn=target['urn_id'])
+  if outcome_:
+    if params.get('nofollow'):
+      linkedin.unfollow_connection(target['urn_id'] or
+                                   linkedin.resolve_urn_id(target['public_id']))
+    context.stats.incr('invitations.sent')
+    return True
+  if outcome_.is_permanent:
+    context.stats.incr('invitations.skipped')
+  else:
+    context.stats.incr('invitations.failed')
+  return False
+
+
+def run_search_job(linkedin: linkedin_api.LinkedIn, params: dict,
+                   context: JobContext) -> None:
+  """Searches people and sends them invitations, like `inb search`."""
+  linkedin.check_invitation_quota()
+  template_ = _message_template(params)
+  limit_ = params.get('limit')
+  pages_ = _page_filter(params).iter_pages(
+      linkedin.iter_search_people_pages(**_search_kwargs(params)))
+  for person in itertools.chain.from_iterable(pages_):
+    context.report()
+    if limit_ is not None and context.stats.get('invitations.sent') >= limit_:
+      break
+    _invite(linkedin, person, params, context, template_)
+
+
+def run_invite_job(linkedin: linkedin_api.LinkedIn, params: dict,
+                   context: JobContext) -> None:
+  """Sends invitations to the targets of a file, like `inb invite`."""
+  linkedin.check_invitation_quota()
+  template_ = _message_template(params)
+  checkpoint_ = checkpoint.Checkpoint(
+      checkpoint.Checkpoint.name_for('invite', context.job.account,
+                                     os.path.abspath(params['from_file'])))
+  limit_ = params.get('limit')
+  with contextlib.closing(
+      targets.iter_targets_with_checkpoint(params['from_file'],
+                                           checkpoint_,
+                                           format_=params.get('format'),
+                                           every=params.get(
+                                               'checkpoint_every',
+                                               25))) as targets_:
+    for target in targets_:
+      # Reporting (and thereby cancelling) before the target is handled keeps
+      # the checkpoint from skipping it on the next run.
+      context.report()
+      if limit_ is not None and context.stats.get('invitations.sent') >= limit_:
+        break
+      _invite(linkedin, target, params, context, template_)
+
+
+def run_export_job(linkedin: linkedin_api.LinkedIn, params: dict,
+                   context: JobContext) -> None:
+  """Streams search results to a file, like `inb export`."""
+  with export.open_sink(params['output'],
+                        linkedin_api.LinkedIn.SEARCH_PEOPLE_FIELDS,
+                        params.get('format')) as sink:
+    for page in _page_filter(params).iter_pages(
+        linkedin.iter_search_people_pages(limit=params.get('limit'),
+                                          **_search_kwargs(params))):
+      sink.write_page(page)
+      context.stats.set('results.exported', sink.rows_written)
+      context.report()
+
+
+JOB_RUNNERS = {
+    'search': run_search_job,
+    'invite': run_invite_job,
+    'export': run_export_job,
+}
+
+
+class Daemon(object):
+  """Claims jobs from the queue and runs them on a bounded worker pool.
+
+  At most one job per account runs at any time, so the jobs of an account
+  never compete for its rate limit, while jobs of different accounts run in
+  parallel up to `max_workers`.
+  """
+
+  def __init__(self,
+               queue: jobqueue.JobQueue,
+               sessions: SessionPool,
+               *,
+               max_workers: int = 2,
+               poll_interval: float = 5.0) -> None:
+    self.queue = queue
+    self.sessions = sessions
+    self.max_workers = max_workers
+    self.poll_interval = poll_interval
+
+    self._stop_event = threading.Event()
+    self._lock = threading.Lock()
+    self._running = {}
+
+  def stop(self) -> None:
+    """Asks the daemon to stop; running jobs are requeued at their next
+    progress report.
+    """
+    self._stop_event.set()
+
+  def run_job(self, job: jobqueue.Job) -> None:
+    """Runs a claimed job and records its outcome in the queue."""
+    context_ = JobContext(self.queue, job, self._stop_event)
+    stats.STATS.incr('daemon.jobs.started')
+    try:
+      linkedin = self.sessions.get(job.account)
+      JOB_RUNNERS[job.kind](linkedin, job.params, context_)
+    except linkedin_api_exceptions.JobCancelledException:
+      self.queue.update_progress(job.id, context_.stats.snapshot())
+      self.queue.finish(job.id, jobqueue.STATE_QUEUED)
+      stats.STATS.incr('daemon.jobs.requeued')
+      return
+    except (linkedin_api_exceptions.LinkedInUnauthorizedException,
+            linkedin_api_exceptions.LinkedInSessionExpiredException) as exc:
+      self.sessions.evict(job.account)
+      self._fail(job, context_, exc)
+      return
+    except Exception as exc:  # pylint: disable=broad-except
+      self._fail(job, context_, exc)
+      return
+    self.queue.update_progress(job.id, context_.stats.snapshot())
+    self.queue.finish(job.id, jobqueue.STATE_DONE)
+    stats.STATS.incr('daemon.jobs.done')
+
+  def _fail(self, job: jobqueue.Job, context: JobContext,
+            exc: Exception) -> None:
+    logger.exception('Job %d (%s) failed', job.id, job.kind)
+    self.queue.update_progress(job.id, context.stats.snapshot())
+    self.queue.finish(job.id, jobqueue.STATE_FAILED, f'{type(exc).__name__}:'
+                      f' {exc}')
+    stats.STATS.incr('daemon.jobs.failed')
+
+  def _on_job_done(self, job: jobqueue.Job, _: futures.Future) -> None:
+    with self._lock:
+      self._running.pop(job.id, None)
+
+  def serve_forever(self) -> None:
+    """Runs jobs until `stop()` is called, then waits for the running jobs to
+    be requeued or finished.
+    """
+    requeued_ = self.queue.requeue_running()
+    if requeued_:
+      logger.info('Requeued %d jobs left running by a previous daemon',
+                  requeued_)
+
+    with futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+      try:
+        self._claim_and_submit_until_stopped(executor)
+      finally:
+        # Whatever ended the loop, running jobs must be cancelled or the
+        # executor would wait for them to complete.
+        self.stop()
+
+  def _claim_and_submit_until_stopped(self, executor: futures.Executor) -> None:
+    while not self._stop_event.is_set():
+      with self._lock:
+        busy_accounts_ = [job.account for job in self._running.values()]
+      job_ = None
+      if len(busy_accounts_) < self.max_workers:
+        job_ = self.queue.claim(busy_accounts_)
+      if job_ is None:
+        self._stop_event.wait(self.poll_interval)
+        continue
+
+      logger.info('Running job %d (%s) for %s', job_.id, job_.kind,
+                  job_.account)
+      with self._lock:
+        self._running[job_.id] = job_
+      executor.submit(self.run_job, job_).add_done_callback(
+          lambda future, job=job_: self._on_job_done(job, future))
@@ -0,0 +1,148 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Run-wide deadline and cancellation shared by every request of a run."""
+
+from __future__ import annotations
+
+from typing import Callable, Iterator
+
+import time
+import signal
+import threading
+import contextlib
+
+from api import exceptions as linkedin_api_exceptions
+
+# Default seconds to wait for a connection and then for each read of a
+# response.
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 30.0
+
+
+class Deadline(object):
+  """Bounds the runtime of a run and lets it be cancelled from outside.
+
+  Requests check the deadline before they are sent, so once it expires or is
+  cancelled the request in flight completes and the next one raises
+  `LinkedInDeadlineExceededException`, which unwinds the run through its
+  `finally` blocks (checkpoints, caches and counters get flushed). Request
+  timeouts are capped by the remaining time, and `sleep()` wakes up as soon
+  as the run is cancelled, so a run stops within a bounded time.
+  """
+
+  def __init__(self,
+               max_runtime: float = None,
+               *,
+               connect_timeout: float = CONNECT_TIMEOUT,
+               read_timeout: float = READ_TIMEOUT,
+               clock: Callable[[], float] = time.monotonic) -> None:
+    """Initializes the deadline.
+
+    Args:
+      max_runtime:     Number of seconds the run may last, `None` for no limit.
+      connect_timeout: Seconds to wait for a connection to the server.
+      read_timeout:    Seconds to wait for each read of a response.
+      clock:           Monotonic clock, overridable for testing.
+    """
+    self.connect_timeout = connect_timeout
+    self.read_timeout = read_timeout
+    self._clock = clock
+    self._expires_at = (None if max_runtime is None else clock() + max_runtime)
+    self._cancelled = threading.Event()
+    self.reason = None
+
+  def remaining(self) -> float | None:
+    """Returns the seconds left before the deadline, `None` if unbounded."""
+    if self._expires_at is None:
+      return None
+    return max(self._expires_at - self._clock(), 0.0)
+
+  def cancel(self, reason: str = 'cancelled') -> None:
+    """Cancels the run; the next request raises."""
+    self.reason = self.reason or reason
+    self._cancelled.set()
+
+  @property
+  def cancelled(self) -> bool:
+    return self._cancelled.is_set()
+
+  @property
+  def expired(self) -> bool:
+    """Whether the run was cancelled or ran out of time."""
+    return self.cancelled or self.remaining() == 0.0
+
+  def check(self) -> None:
+    """Raises if the run was cancelled or ran out of time.
+
+    Raises:
+      LinkedInDeadlineExceededException: If the deadline expired.
+    """
+    if self.cancelled:
+      raise linkedin_api_exceptions.LinkedInDeadlineExceededException(
+          f'Run stopped: {self.reason}')
+    if self.remaining() == 0.0:
+      self.reason = self.reason or 'max runtime reached'
+      raise linkedin_api_exceptions.LinkedInDeadlineExceededException(
+          f'Run stopped: {self.reason}')
+
+  def timeout(self) -> tuple[float, float]:
+    """Returns the `(connect, read)` timeouts of the next request, capped by
+    the remaining time.
+    """
+    remaining_ = self.remaining()
+    if remaining_ is None:
+      return self.connect_timeout, self.read_timeout
+    # A floor keeps a request sent right before the deadline from failing on
+    # a zero timeout.
+    remaining_ = max(remaining_, 0.1)
+    return (min(self.connect_timeout,
+                remaining_), min(self.read_timeout, remaining_))
+
+  def sleep(self, seconds: float) -> None:
+    """Sleeps for `seconds`, waking up early on cancellation or expiry."""
+    remaining_ = self.remaining()
+    if remaining_ is not None:
+      seconds = min(seconds, remaining_)
+    self._cancelled.wait(max(seconds, 0.0))
+
+
+@contextlib.contextmanager
+def cancel_on_signals(
+    deadline: Deadline, signals: tuple = (signal.SIGINT, signal.SIGTERM)
+) -> Iterator[Deadline]:
+  """Cancels `deadline` on the first of the given signals instead of raising
+  `KeyboardInterrupt` mid-request; a second signal falls back to the previous
+  handler, so a stuck run can still be killed. The previous handlers are
+  restored on exit.
+  """
+  previous_ = {signum: signal.getsignal(signum) for signum in signals}
+
+  def handler(signum, frame):
+    if deadline.cancelled:
+      previous_handler_ = previous_[signum]
+      if callable(previous_handler_):
+        previous_handler_(signum, frame)
+      elif previous_handler_ != signal.SIG_IGN:
+        raise KeyboardInterrupt()
+      return
+    deadline.cancel(f'received {signal.Signals(signum).name}')
+
+  for signum in signals:
+    signal.signal(signum, handler)
+  try:
+    yield deadline
+  finally:
+    for signum, previous_handler in previous_.items():
+      signal.signal(signum, previous_handler)
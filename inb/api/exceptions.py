@@ -25,3 +25,14 @@ LinkedInSessionExpiredException = type('LinkedInSessionExpiredException',
 
 LinkedInUnexpectedStatusException = type('LinkedInUnexpectedStatusException',
                                          (Exception,), {})
+
+LinkedInQuotaExceededException = type('LinkedInQuotaExceededException',
+                                      (Exception,), {})
+
+LinkedInDeadlineExceededException = type('LinkedInDeadlineExceededException',
+                                         (Exception,), {})
+
+LinkedInCircuitOpenException = type('LinkedInCircuitOpenException',
+                                    (Exception,), {})
+
+JobCancelledException = type('JobCancelledException', (Exception,), {})
@@ -0,0 +1,204 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming sinks to persist search results on disk.
+
+Every sink consumes results one page at a time through `write_page()` and
+flushes after each page, so memory usage stays bounded by the size of a
+single page no matter how many results a search produces.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+import os
+import csv
+import json
+import pathlib
+
+try:
+  import pyarrow
+  from pyarrow import parquet
+except ImportError:
+  pyarrow = None
+  parquet = None
+
+# Size of the write buffer of the text based sinks.
+_WRITE_BUFFER_SIZE = 1 << 16
+
+
+class Sink(object):
+  """Base class for all the search result sinks.
+
+  Sinks are context managers; leaving the `with` block closes the underlying
+  file.
+  """
+
+  def __init__(self, path: str | os.PathLike, fields: Sequence[str]) -> None:
+    self.path = pathlib.Path(path)
+    self.fields = tuple(fields)
+    self.rows_written = 0
+
+  def write_page(self, rows: list[dict]) -> None:
+    """Writes a page of rows to the sink and flushes it."""
+    raise NotImplementedError
+
+  def close(self) -> None:
+    """Flushes and closes the sink."""
+    raise NotImplementedError
+
+  def __enter__(self) -> Sink:
+    return self
+
+  def __exit__(self, *exc_info) -> None:
+    self.close()
+
+
+class JsonlSink(Sink):
+  """Writes one JSON object per line."""
+
+  def __init__(self, path: str | os.PathLike, fields: Sequence[str]) -> None:
+    super().__init__(path, fields)
+    self._file = open(  # pylint: disable=consider-using-with
+        self.path,
+        'w',
+        encoding='utf-8',
+        buffering=_WRITE_BUFFER_SIZE)
+
+  def write_page(self, rows: list[dict]) -> None:
+    self._file.write(''.join(
+        json.dumps({field: row.get(field) for field in self.fields},
+                   ensure_ascii=False) + '\n' for row in rows))
+    self._file.flush()
+    self.rows_written += len(rows)
+
+  def close(self) -> None:
+    self._file.close()
+
+
+class CsvSink(Sink):
+  """Writes rows as comma separated values with a header line."""
+
+  def __init__(self, path: str | os.PathLike, fields: Sequence[str]) -> None:
+    super().__init__(path, fields)
+    self._file = open(  # pylint: disable=consider-using-with
+        self.path,
+        'w',
+        encoding='utf-8',
+        newline='',
+        buffering=_WRITE_BUFFER_SIZE)
+    self._writer = csv.DictWriter(self._file,
+                                  fieldnames=self.fields,
+                                  extrasaction='ignore')
+    self._writer.writeheader()
+
+  def write_page(self, rows: list[dict]) -> None:
+    self._writer.writerows(rows)
+    self._file.flush()
+    self.rows_written += len(rows)
+
+  def close(self) -> None:
+    self._file.close()
+
+
+class ParquetSink(Sink):
+  """Writes rows into a Parquet file, one row group per page.
+
+  Requires `pyarrow` to be installed. All the columns are stored as nullable
+  strings since the search results carry no richer type information.
+  """
+
+  def __init__(self, path: str | os.PathLike, fields: Sequence[str]) -> None:
+    if pyarrow is None:
+      raise RuntimeError('Parquet export requires "pyarrow" to be installed')
+    super().__init__(path, fields)
+    self._schema = pyarrow.schema([
+        (field, pyarrow.string()) for field in self.fields
+    ])
+    self._writer = parquet.ParquetWriter(os.fspath(self.path), self._schema)
+
+  def write_page(self, rows: list[dict]) -> None:
+    columns_ = {
+        field: [
+            None if row.get(field) is None else str(row.get(field))
+            for row in rows
+        ] for field in self.fields
+    }
+    self._writer.write_table(
+        pyarrow.Table.from_pydict(columns_, schema=self._schema))
+    self.rows_written += len(rows)
+
+  def close(self) -> None:
+    self._writer.close()
+
+
+SINKS = {
+    'jsonl': JsonlSink,
+    'csv': CsvSink,
+    'parquet': ParquetSink,
+}
+
+_SINK_FORMAT_BY_SUFFIX = {
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+}
+
+
+def available_formats() -> list[str]:
+  """Returns the export formats supported by the current installation."""
+  return [format_ for format_ in SINKS if format_ != 'parquet' or pyarrow]
+
+
+def open_sink(path: str | os.PathLike,
+              fields: Sequence[str],
+              format_: str = None) -> Sink:
+  """Opens a sink for the given path.
+
+  Args:
+    path:    Output file path.
+    fields:  Fields (columns) to write for every row.
+    format_: One of the keys in `SINKS`. Inferred from the suffix of `path`
+             when not given.
+
+  Returns:
+    An opened `Sink` instance.
+
+  Raises:
+    ValueError: If the format is unknown or cannot be inferred.
+  """
+  if format_ is None:
+    format_ = _SINK_FORMAT_BY_SUFFIX.get(pathlib.Path(path).suffix.lower())
+  if format_ not in SINKS:
+    raise ValueError(f'Cannot export to "{os.fspath(path)}" with format'
+                     f' "{format_}", expected one of {list(SINKS)}')
+  return SINKS[format_](path, fields)
+
+
+def export_pages(pages: Iterable[list[dict]], sink: Sink) -> int:
+  """Streams the given pages of rows into the sink.
+
+  Args:
+    pages: An iterable of pages, e.g. `LinkedIn.iter_search_people_pages()`.
+    sink:  An opened sink.
+
+  Returns:
+    Number of rows written.
+  """
+  for page in pages:
+    sink.write_page(page)
+  return sink.rows_written
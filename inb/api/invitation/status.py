@@ -33,6 +33,11 @@ _SEARCH_INVITATION_STATUS_TEMPL = """  {{status}}  {{name}}
 """
 
 
+def invitation_counts() -> tuple[int, int]:
+  """Returns the numbers of invitations displayed as sent and as failed."""
+  return _SUCCESS_RATE, _FAILURE_RATE
+
+
 class Person:
   """A separate type for the LinkedIn user."""
 
@@ -0,0 +1,193 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""SQLite backed job queue consumed by `inb serve`."""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+import os
+import json
+import time
+import pathlib
+import sqlite3
+import threading
+
+from api import settings
+
+KINDS = ('search', 'invite', 'export')
+
+STATE_QUEUED = 'queued'
+STATE_RUNNING = 'running'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+
+
+class Job(object):
+  """A job read from the queue."""
+
+  def __init__(self, *, id_: int, account: str, kind: str, params: dict,
+               state: str, progress: dict, error: str, created: float,
+               updated: float) -> None:
+    self.id = id_
+    self.account = account
+    self.kind = kind
+    self.params = params
+    self.state = state
+    self.progress = progress
+    self.error = error
+    self.created = created
+    self.updated = updated
+
+  @classmethod
+  def from_row(cls, row: sqlite3.Row) -> Job:
+    return cls(id_=row['id'],
+               account=row['account'],
+               kind=row['kind'],
+               params=json.loads(row['params']),
+               state=row['state'],
+               progress=json.loads(row['progress']),
+               error=row['error'],
+               created=row['created'],
+               updated=row['updated'])
+
+
+class JobQueue(object):
+  """A persistent FIFO of jobs shared between `inb submit` and `inb serve`.
+
+  Any number of processes may submit jobs while a daemon claims and runs them;
+  SQLite serializes the writers.
+  """
+
+  _FILE_NAME = 'jobs.sqlite3'
+
+  def __init__(self, queue_dir: str = None) -> None:
+    if queue_dir is None:
+      queue_dir = settings.INB_USER_DIR
+    self.queue_dir = pathlib.Path(queue_dir)
+    if not os.path.exists(os.fspath(self.queue_dir)):
+      os.makedirs(os.fspath(self.queue_dir))
+
+    self._lock = threading.Lock()
+    self._connection = sqlite3.connect(os.fspath(self.queue_dir /
+                                                 JobQueue._FILE_NAME),
+                                       timeout=30.0,
+                                       isolation_level=None,
+                                       check_same_thread=False)
+    self._connection.row_factory = sqlite3.Row
+    self._connection.execute('CREATE TABLE IF NOT EXISTS jobs ('
+                             ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                             ' account TEXT NOT NULL,'
+                             ' kind TEXT NOT NULL,'
+                             ' params TEXT NOT NULL,'
+                             ' state TEXT NOT NULL,'
+                             " progress TEXT NOT NULL DEFAULT '{}',"
+                             ' error TEXT,'
+                             ' created REAL NOT NULL,'
+                             ' updated REAL NOT NULL'
+                             ')')
+    self._connection.execute(
+        'CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)')
+
+  def submit(self, account: str, kind: str, params: dict) -> int:
+    """Queues a job and returns its id.
+
+    Raises:
+      ValueError: If `kind` is not one of `KINDS`.
+    """
+    if kind not in KINDS:
+      raise ValueError(f'Unknown job kind "{kind}", expected one of'
+                       f' {list(KINDS)}')
+    now_ = time.time()
+    with self._lock:
+      cursor_ = self._connection.execute(
+          'INSERT INTO jobs (account, kind, params, state, created, updated)'
+          ' VALUES (?, ?, ?, ?, ?, ?)',
+          (account, kind, json.dumps(params), STATE_QUEUED, now_, now_))
+    return cursor_.lastrowid
+
+  def claim(self, busy_accounts: Iterable[str] = ()) -> Job | None:
+    """Marks the oldest queued job of an account not in `busy_accounts` as
+    running and returns it, or returns `None` if there is no such job.
+    """
+    busy_accounts = list(busy_accounts)
+    placeholders_ = ','.join('?' * len(busy_accounts))
+    with self._lock:
+      self._connection.execute('BEGIN IMMEDIATE')
+      try:
+        row_ = self._connection.execute(
+            'SELECT * FROM jobs WHERE state = ?'
+            f' AND account NOT IN ({placeholders_})'
+            ' ORDER BY id LIMIT 1', (STATE_QUEUED, *busy_accounts)).fetchone()
+        if row_ is not None:
+          self._connection.execute(
+              'UPDATE jobs SET state = ?, updated = ? WHERE id = ?',
+              (STATE_RUNNING, time.time(), row_['id']))
+        self._connection.execute('COMMIT')
+      except BaseException:
+        self._connection.execute('ROLLBACK')
+        raise
+    if row_ is None:
+      return None
+    job_ = Job.from_row(row_)
+    job_.state = STATE_RUNNING
+    return job_
+
+  def update_progress(self, job_id: int, progress: dict) -> None:
+    """Records the progress of a running job."""
+    with self._lock:
+      self._connection.execute(
+          'UPDATE jobs SET progress = ?, updated = ? WHERE id = ?',
+          (json.dumps(progress), time.time(), job_id))
+
+  def finish(self, job_id: int, state: str, error: str = None) -> None:
+    """Marks a job as done, failed or queued again."""
+    with self._lock:
+      self._connection.execute(
+          'UPDATE jobs SET state = ?, error = ?, updated = ? WHERE id = ?',
+          (state, error, time.time(), job_id))
+
+  def requeue_running(self) -> int:
+    """Puts the jobs left running by a daemon that died back in the queue.
+
+    Returns:
+      Number of requeued jobs.
+    """
+    with self._lock:
+      return self._connection.execute(
+          'UPDATE jobs SET state = ?, updated = ? WHERE state = ?',
+          (STATE_QUEUED, time.time(), STATE_RUNNING)).rowcount
+
+  def get(self, job_id: int) -> Job | None:
+    """Returns the job with the given id or `None`."""
+    with self._lock:
+      row_ = self._connection.execute('SELECT * FROM jobs WHERE id = ?',
+                                      (job_id,)).fetchone()
+    return Job.from_row(row_) if row_ is not None else None
+
+  def list(self, state: str = None, limit: int = 50) -> list[Job]:
+    """Returns the most recent jobs, optionally only those in `state`."""
+    query_ = 'SELECT * FROM jobs'
+    args_ = ()
+    if state is not None:
+      query_ += ' WHERE state = ?'
+      args_ = (state,)
+    with self._lock:
+      rows_ = self._connection.execute(f'{query_} ORDER BY id DESC LIMIT ?',
+                                       (*args_, limit)).fetchall()
+    return [Job.from_row(row) for row in rows_]
+
+  def close(self) -> None:
+    self._connection.close()
@@ -16,20 +16,24 @@
 
 from __future__ import annotations
 
-from typing import Callable
+from typing import Callable, Iterable, Iterator
 
 import sys
-import json
 import time
 import random
 import logging
 import requests
 import operator
+import itertools
 
 from requests import cookies
-from urllib.parse import urlencode
+from concurrent import futures
+from urllib.parse import quote, unquote, urlencode
 
-from api import client, settings
+from api import (breaker, client, deadline, settings, exceptions as
+                 linkedin_api_exceptions, messagetemplate, outcome, pagecache,
+                 pagesize, paginator, quota, requestbuilder, seenset,
+                 spillbuffer, stats, trace, urncache)
 from api.utils import utils
 
 logger = logging.getLogger(__name__)
@@ -61,7 +65,24 @@ class LinkedIn(object):
 
   MAX_SEARCH_COUNT = 49
 
+  MAX_INVITATIONS_COUNT = 100
+
+  MAX_CONNECTIONS_COUNT = 40
+
+  # Fields of every record returned by `search_people` and its streaming
+  # variants, in the order exporters lay them out.
+  SEARCH_PEOPLE_FIELDS = ('urn_id', 'distance', 'public_id', 'tracking_id',
+                          'jobtitle', 'location', 'name')
+
   _MAX_REPEATED_REQUEST = 200
+  # Attempts at a profile action whose responses are transient failures.
+  _MAX_TRANSIENT_ATTEMPTS = 3
+  # Smallest and largest search page sizes tried when adapting the page size;
+  # Voyager rejects counts above `MAX_SEARCH_COUNT`.
+  _SEARCH_COUNT_BOUNDS = (10, MAX_SEARCH_COUNT)
+  # Consecutive search pages of mostly repeated results after which a search
+  # stops.
+  _MAX_LOW_YIELD_PAGES = 3
 
   def __init__(self,
                username: str,
@@ -73,7 +94,16 @@ class LinkedIn(object):
                debug: bool = False,
                proxies: dict = None,
                cookies_: cookies.RequestsCookieJar = None,
-               cookies_dir: str = None) -> None:
+               cookies_dir: str = None,
+               evade: Callable = None,
+               urn_cache: urncache.UrnCache = None,
+               page_cache: pagecache.PageCache = None,
+               seen_dir: str = None,
+               quota_: quota.InvitationQuota = None,
+               negative_cache: outcome.NegativeCache = None,
+               deadline_: deadline.Deadline = None,
+               spill_bytes: int = None,
+               breakers: breaker.CircuitBreakers = None) -> None:
     """Initializes a LinkedIn client for the Voyager API.
     
     This client allows you to interact with LinkedIn's Voyager API, which
@@ -90,9 +120,13 @@ class LinkedIn(object):
     fails, the client will fallback to the normal authentication by setting
     the `authentication` parameter to `True`.
 
-    If you encounter a `LinkedInSessionExpiredException`, you can re-claim new
-    cookies from LinkedIn's authentication server by setting the
-    `refresh_cookies` parameter to `True`.
+    A session that expires while the client runs is renewed transparently
+    with the given credentials, in the background shortly before its cookies
+    expire and otherwise as soon as a request is rejected. Clients given only
+    cookies can't log in again: if you encounter a
+    `LinkedInSessionExpiredException`, you can re-claim new cookies from
+    LinkedIn's authentication server by setting the `refresh_cookies`
+    parameter to `True`.
 
     Args:
       username:        Your LinkedIn username.
@@ -106,6 +140,34 @@ class LinkedIn(object):
                        Defaults to None.
       cookies_dir:     The directory to store authentication cookies in.
                        Defaults to None.
+      evade:           A function called before every request to avoid being
+                       detected as a bot, e.g. a `ratelimit.RateScheduler`.
+                       Defaults to `default_evade`.
+      urn_cache:       A cache used to resolve profile URN ids without a
+                       `profileView` request. Search results are recorded in
+                       it as well. Defaults to None.
+      page_cache:      A cache of search result pages; cached pages are
+                       served without a request. Defaults to None.
+      seen_dir:        The directory to store the per-query sets of results
+                       seen by `only_new` searches in. Defaults to None (i.e.,
+                       `seenset.SeenSet`'s default).
+      quota_:          Tracker of the invitations sent by the account;
+                       `add_connection` refuses to send more than it allows.
+                       Defaults to None.
+      negative_cache:  A cache of the profiles that can't be invited;
+                       `add_connection` skips them without a request and
+                       records the new ones in it. Defaults to None.
+      deadline_:       Deadline of the run, checked before every request and
+                       capping the request timeouts. Defaults to an unbounded
+                       `deadline.Deadline` with the default timeouts.
+      spill_bytes:     Bytes of results `search` and `search_people` keep in
+                       memory before spilling them to a temporary file.
+                       Defaults to `settings.INB_SPILL_MEMORY_BYTES`.
+      breakers:        Circuit breakers of the endpoints; requests to an
+                       endpoint that keeps failing are rejected with
+                       `LinkedInCircuitOpenException` until it recovers.
+                       Defaults to `breaker.CircuitBreakers` with the default
+                       options.
     """
     self.client = client.Client(debug=debug,
                                 refresh_cookies=refresh_cookies,
@@ -116,6 +178,28 @@ class LinkedIn(object):
     if not debug:
       self._logger.setLevel(logging.CRITICAL)
 
+    self._evade = evade or default_evade
+    self._urn_cache = urn_cache
+    self._page_cache = page_cache
+    self._seen_dir = seen_dir
+    self._quota = quota_
+    self._negative_cache = negative_cache
+    self._deadline = deadline_ or deadline.Deadline()
+    self._spill_bytes = (settings.INB_SPILL_MEMORY_BYTES
+                         if spill_bytes is None else spill_bytes)
+    self._breakers = breakers or breaker.CircuitBreakers()
+    # Counters of the searches run by this client, keyed by `query_key()`.
+    self.search_counters = {}
+    # Shared by all the searches of the client, so the largest page size the
+    # server accepts is only probed once.
+    self._search_page_size = pagesize.AdaptivePageSize(
+        initial=LinkedIn.MAX_SEARCH_COUNT,
+        minimum=LinkedIn._SEARCH_COUNT_BOUNDS[0],
+        maximum=LinkedIn._SEARCH_COUNT_BOUNDS[1])
+    # Flipped once the batch profile end-point rejects a request, so later
+    # batches go straight to the concurrent fallback.
+    self._batch_profiles_supported = True
+
     if authenticate:
       if cookies_:
         self.client._set_session_cookies(cookies_)
@@ -124,7 +208,7 @@ class LinkedIn(object):
 
   def _fetch(self,
              uri: str,
-             evade: Callable = default_evade,
+             evade: Callable = None,
              base_request: bool = False,
              **kwargs) -> requests.Response:
     """Performs an HTTP GET request to the LinkedIn Voyager API or to the
@@ -136,7 +220,10 @@ class LinkedIn(object):
     `base_request` argument.
 
     The `evade` function is called before performing the request, to avoid
-    being detected as a bot.
+    being detected as a bot. The request is only sent if the deadline of the
+    client has not expired meanwhile, and times out as the deadline says
+    unless a `timeout` is given. Requests to an endpoint whose circuit breaker
+    is open are rejected before `evade` is called.
 
     Any additional keyword arguments are passed to the `requests.Session.get`
     method.
@@ -146,7 +233,7 @@ class LinkedIn(object):
                     URL.
       evade:        A function that takes no arguments and is called before
                     performing the request to avoid being detected as a bot.
-                    Defaults to `default_evade`.
+                    Defaults to the `evade` function given to the constructor.
       base_request: Whether the request should be sent to the LinkedIn Voyager
                     API (False) or to the LinkedIn website (True). Defaults to
                     False.
@@ -155,18 +242,29 @@ class LinkedIn(object):
 
     Returns:
       The HTTP response object.
+
+    Raises:
+      LinkedInDeadlineExceededException: If the run was cancelled or ran out
+        of time.
+      LinkedInCircuitOpenException: If the circuit breaker of the endpoint is
+        open.
     """
-    evade()
     if not base_request:
       url = self.client.VOYAGER_API_BASE_URL
     else:
       url = self.client.LINKEDIN_BASE_URL
     url = f'{url}{uri}'
-    return self.client.session.get(url, **kwargs)
+    # Fails fast, without pacing a request bound to be rejected.
+    self._breakers.get(url).check()
+    with trace.span('evade', 'sleep'):
+      (evade or self._evade)()
+    self._deadline.check()
+    kwargs.setdefault('timeout', self._deadline.timeout())
+    return self._send('get', url, **kwargs)
 
   def _post(self,
             uri: str,
-            evade: Callable = default_evade,
+            evade: Callable = None,
             base_request: bool = False,
             **kwargs):
     """Sends a POST request to the LinkedIn API.
@@ -181,7 +279,8 @@ class LinkedIn(object):
     Args:
       uri:          The URI path of the LinkedIn API endpoint to request.
       evade:        A function to be called before making the
-                    request to evade detection. Defaults to `default_evade`.
+                    request to evade detection. Defaults to the `evade`
+                    function given to the constructor.
       base_request: If `True`, the URL for the request will
                     be constructed using the LinkedIn base URL instead of the
                     API base URL. Defaults to `False`.
@@ -190,18 +289,103 @@ class LinkedIn(object):
 
     Returns:
       The HTTP response returned by the server.
+
+    Raises:
+      LinkedInDeadlineExceededException: If the run was cancelled or ran out
+        of time.
+      LinkedInCircuitOpenException: If the circuit breaker of the endpoint is
+        open.
     """
-    evade()
     if not base_request:
       url = self.client.VOYAGER_API_BASE_URL
     else:
       url = self.client.LINKEDIN_BASE_URL
     url = f'{url}{uri}'
-    return self.client.session.post(url, **kwargs)
+    # Fails fast, without pacing a request bound to be rejected.
+    self._breakers.get(url).check()
+    with trace.span('evade', 'sleep'):
+      (evade or self._evade)()
+    self._deadline.check()
+    kwargs.setdefault('timeout', self._deadline.timeout())
+    return self._send('post', url, **kwargs)
+
+  def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+    """Sends a request with the client session.
+
+    A request rejected as unauthorized is sent once more after the client
+    logs in again, so an expired session is renewed transparently whenever
+    the client knows the account credentials. The outcome is recorded in the
+    circuit breaker of the endpoint.
+
+    Raises:
+      LinkedInUnauthorizedException: If the session is rejected again soon
+        after the client logged in.
+    """
+    breaker_ = self._breakers.get(url)
+    breaker_.before_request()
+    cookies_ = self.client.session.cookies
+    try:
+      result_ = getattr(self.client.session, method)(url, **kwargs)
+      if result_.status_code == 401 and self.client.reauthenticate(cookies_):
+        self._deadline.check()
+        result_ = getattr(self.client.session, method)(url, **kwargs)
+    except requests.RequestException:
+      breaker_.record(False)
+      raise
+    except BaseException:
+      # E.g. the deadline expired before the retry, which says nothing of the
+      # health of the endpoint.
+      breaker_.release()
+      raise
+    breaker_.record(result_.status_code not in breaker.FAILURE_STATUS_CODES)
+    return result_
 
-  def search(self, params: dict, limit: int = -1, offset: int = 0) -> list:
-    """Performs a search on LinkedIn with given parameters and returns the
-    results.
+  def _fetch_search_page(self, query: requestbuilder.SearchQuery, start: int,
+                         count: int) -> tuple[dict, float | None]:
+    """Returns the decoded blended search page of `count` results from
+    `start`, served from the page cache whenever it holds a valid entry, along
+    with the number of seconds the server took to respond (`None` for cached
+    pages).
+    """
+    params_ = None
+    if self._page_cache is not None:
+      params_ = query.page_params(start, count)
+      if (data_ := self._page_cache.get(params_)) is not None:
+        return data_, None
+
+    result_ = self._fetch(query.uri(start, count),
+                          headers=requestbuilder.NORMALIZED_JSON_HEADERS)
+    with trace.span('decode search page', 'normalize'):
+      data_ = result_.json()
+    if self._page_cache is not None and result_.status_code == 200:
+      self._page_cache.put(params_, data_)
+    return data_, result_.elapsed.total_seconds()
+
+  @staticmethod
+  def query_key(params: dict) -> str:
+    """Returns the canonical key of a search query, as used to index
+    `search_counters`.
+    """
+    return seenset.SeenSet.key(params)
+
+  def iter_search(self,
+                  params: dict,
+                  limit: int = -1,
+                  offset: int = 0) -> Iterator[list[dict]]:
+    """Performs a search on LinkedIn with given parameters and yields the
+    results one page at a time.
+
+    Pages are fetched lazily, so a consumer that stops iterating early never
+    pays for the requests (and evade sleeps) of the remaining pages. Results
+    repeated across pages (by `targetUrn`) are dropped, and the search stops
+    once the `paging.total` reported by the server is reached or after
+    `_MAX_LOW_YIELD_PAGES` consecutive pages of mostly repeats. The counters of
+    the search are kept up to date in `search_counters[query_key(params)]`.
+
+    The page size starts at `MAX_SEARCH_COUNT`, the largest count Voyager
+    accepts, and adapts to the server (see `pagesize.AdaptivePageSize`): it
+    shrinks when a count is rejected or pages come back capped, in which case
+    the page is requested again with the smaller count.
 
     Args:
       params: Dictionary of parameters for the search query.
@@ -210,63 +394,99 @@ class LinkedIn(object):
       offset: Number of results to skip before returning results. Defaults
               to 0.
 
-    Returns:
-      A list of search results in JSON format, with each element representing
-      a profile or company that matches the search criteria.
+    Yields:
+      A list of search results in JSON format for every page fetched.
     """
-    count_ = LinkedIn.MAX_SEARCH_COUNT
-    limit = -1 if limit is None else limit
-
-    results_ = []
-    while True:
-      if limit > -1 and limit - len(results_) < count_:
-        count_ = limit - len(results_)
-      default_params_ = {
-          'count':
-              str(count_),
-          'filters':
-              'List()',
-          'origin':
-              'GLOBAL_SEARCH_HEADER',
-          'q':
-              'all',
-          'start':
-              len(results_) + offset,
-          'queryContext': ('List('
-                           'spellCorrectionEnabled->true,'
-                           'relatedSearchesEnabled->true,'
-                           'kcardType->PROFILE|COMPANY'
-                           ')')
-      }
-      default_params_.update(params)
 
-      result_ = self._fetch(
-          f'/search/blended?{urlencode(default_params_, safe="(),")}',
-          headers={'accept': 'application/vnd.linkedin.normalized+json+2.1'})
-      data_ = result_.json()
+    def fetch_page(start: int, count: int) -> list[dict]:
+      data_, elapsed_ = self._fetch_search_page(query_, start, count)
+      while data_.get('status', 200) == 400:
+        if not self._search_page_size.on_error(count):
+          return []
+        count = min(count, self._search_page_size.size)
+        data_, elapsed_ = self._fetch_search_page(query_, start, count)
+
+      total_ = data_.get('data', {}).get('paging', {}).get('total')
+      if total_:
+        paginator_.total = total_
 
       new_elems = []
       elems_ = data_.get('data', {}).get('elements', [])
       for elem in elems_:
         new_elems.extend(elem.get('elements', {}))
-      results_ = [*results_, *new_elems]
 
-      # Breaks out the infinite loop if the maximum number of search results has
-      # been reached, the maximum number of repeated requests has been exceeded,
-      # or no new search results are returned.
-      if ((-1 <= limit <= len(results_)) or len(results_) / count_ >=
-          LinkedIn._MAX_REPEATED_REQUEST) or len(new_elems) == 0:
-        break
+      # A short page is only a sign of a capped count if the server says
+      # there are more results; otherwise it is just the last page.
+      last_page_ = not total_ or start + len(new_elems) >= total_
+      if elapsed_ is not None and (len(new_elems) >= count or not last_page_):
+        self._search_page_size.on_page(count, len(new_elems), elapsed_)
+        paginator_.page_size = self._search_page_size.size
+      stats.STATS.set('search.page_size', paginator_.page_size)
+      return new_elems
+
+    query_ = requestbuilder.SearchQuery(params)
+    paginator_ = paginator.Paginator(
+        fetch_page,
+        page_size=self._search_page_size.size,
+        limit=limit,
+        offset=offset,
+        max_pages=LinkedIn._MAX_REPEATED_REQUEST,
+        key=operator.methodcaller('get', 'targetUrn'),
+        max_low_yield_pages=LinkedIn._MAX_LOW_YIELD_PAGES)
+    query_key_ = self.query_key(params)
+    pages_ = iter(paginator_)
+    try:
+      for page in pages_:
+        self.search_counters[query_key_] = paginator_.counters()
+        yield page
+    finally:
+      pages_.close()
+      self.search_counters[query_key_] = paginator_.counters()
+      stats.STATS.incr('search.pages_fetched', paginator_.pages_fetched)
+      stats.STATS.incr('search.results.unique', paginator_.elements_yielded)
+      stats.STATS.incr('search.results.duplicate', paginator_.duplicates)
+
+  def search(self,
+             params: dict,
+             limit: int = -1,
+             offset: int = 0) -> spillbuffer.SpillBuffer:
+    """Performs a search on LinkedIn with given parameters and returns the
+    results.
+
+    The results are held in a `spillbuffer.SpillBuffer`, which moves them to
+    a temporary file past the `spill_bytes` of the client, so a crawl without
+    a limit runs in bounded memory. Prefer `iter_search` to process the
+    results as they come.
+
+    Args:
+      params: Dictionary of parameters for the search query.
+      limit:  Maximum number of results to return. Defaults to -1 (i.e.,
+              return all results).
+      offset: Number of results to skip before returning results. Defaults
+              to 0.
+
+    Returns:
+      A sequence of search results in JSON format, with each element
+      representing a profile or company that matches the search criteria.
+    """
+    results_ = spillbuffer.SpillBuffer(self._spill_bytes)
+    for page in self.iter_search(params, limit=limit, offset=offset):
+      results_.extend(page)
     return results_
 
-  def search_people(self, *, keywords: str = None, **kwargs) -> list[dict]:
-    """Search for people on LinkedIn and return a list of results.
-    
-    Also, filters the search results by the given filter queries in `kwargs`
-    and applies them to the `filters` parameter for the search function.
-    
+  @staticmethod
+  def _search_people_params(keywords: str, kwargs: dict) -> dict:
+    """Builds the blended search parameters for a people search.
+
+    Filters the search results by the given filter queries in `kwargs` and
+    applies them to the `filters` parameter for the search function.
+
     Args:
       keywords: Keywords to search for.
+      kwargs:   Filter queries given to `search_people`.
+
+    Returns:
+      Parameters to pass on to `search`.
     """
     filters_ = ['resultType->PEOPLE']
 
@@ -279,13 +499,20 @@ class LinkedIn(object):
         to:         Label for the url.
         value_type: Type of the value.
       """
-      nonlocal kwargs, filters_
-      if kwargs.get(key, None) is None:
+      nonlocal filters_
+      # Empty values (e.g., `()` from a `click` option with `multiple=True`)
+      # must not end up as an empty filter.
+      if not kwargs.get(key, None):
         return
-      if isinstance(value_type, str):
-        filters_ = [*filters_, f'{to}->{kwargs.get(key)}']
-      elif isinstance(value_type, list):
-        filters_ = [*filters_, f"{to}->{'|'.join(kwargs.get(key))}"]
+      value_ = kwargs.get(key)
+      if value_type is str:
+        filters_ = [*filters_, f'{to}->{value_}']
+      elif value_type is list:
+        if isinstance(value_, str):
+          value_ = [value_]
+        # Sorted, since the order of alternatives does not change the result
+        # set but would change the page cache and seen-set keys.
+        filters_ = [*filters_, f"{to}->{'|'.join(sorted(value_))}"]
 
     add_to_filter('connection_of', 'connectionOf', value_type=str)
     add_to_filter('network_depths', 'network', value_type=list)
@@ -299,33 +526,122 @@ class LinkedIn(object):
     params_ = {'filters': f"List({','.join(filters_)})"}
     if keywords:
       params_['keywords'] = keywords
+    return params_
+
+  @staticmethod
+  def _normalize_search_person(item: dict) -> dict:
+    """Reduces a raw blended search element to the fields listed in
+    `SEARCH_PEOPLE_FIELDS`.
+    """
+    return {
+        'urn_id': utils.get_id_from_urn(item.get('targetUrn')),
+        'distance': item.get('memberDistance', {}).get('value'),
+        'public_id': item.get('publicIdentifier'),
+        'tracking_id': utils.get_id_from_urn(item.get('trackingUrn')),
+        'jobtitle': item.get('headline', {}).get('text'),
+        'location': item.get('subline', {}).get('text'),
+        'name': item.get('title', {}).get('text')
+    }
+
+  def iter_search_people_pages(self,
+                               *,
+                               keywords: str = None,
+                               only_new: bool = False,
+                               max_stale_pages: int = 3,
+                               **kwargs) -> Iterator[list[dict]]:
+    """Search for people on LinkedIn and yield the normalized results one page
+    at a time.
+
+    Accepts the same arguments as `search_people`. Only a single page of
+    results is held in memory at any point, which makes this the building
+    block for streaming consumers such as the exporters in `api.export`.
+
+    With `only_new`, results returned by a previous run of the same query
+    (same keywords and filters) are dropped, and the search stops after
+    `max_stale_pages` consecutive pages without a new result. A page is
+    recorded as seen once the consumer asks for the next one, so a page the
+    consumer stopped in the middle of comes back on the next run.
+
+    Args:
+      keywords:        Keywords to search for.
+      only_new:        Whether to skip the results seen by previous runs.
+      max_stale_pages: Number of consecutive pages without a new result after
+                       which an `only_new` search stops.
+    """
+    params_ = self._search_people_params(keywords, kwargs)
+
+    seen_ = None
+    if only_new:
+      seen_ = seenset.SeenSet(self.query_key(params_), self._seen_dir)
+    stale_pages_ = 0
 
     search_limit_ = kwargs.get('limit', None)
     search_offset_ = kwargs.get('offset', None)
-    data_ = self.search(
-        params_,
-        limit=search_limit_ if search_limit_ is not None else -1,
-        offset=search_offset_ if search_offset_ is not None else 0)
-
-    result_ = []
-    for item in data_:
-      # Do not include a private profile if `include_private_profiles` is set
-      # to `False` or `publicIdentifier` is absent.
-      if not kwargs.get('include_private_profiles',
-                        None) and 'publicIdentifier' not in item:
-        continue
-      result_ = [
-          *result_, {
-              'urn_id': utils.get_id_from_urn(item.get('targetUrn')),
-              'distance': item.get('memberDistance', {}).get('value'),
-              'public_id': item.get('publicIdentifier'),
-              'tracking_id': utils.get_id_from_urn(item.get('trackingUrn')),
-              'jobtitle': item.get('headline', {}).get('text'),
-              'location': item.get('subline', {}).get('text'),
-              'name': item.get('title', {}).get('text')
-          }
-      ]
-    return result_
+    include_private_profiles_ = kwargs.get('include_private_profiles', None)
+    try:
+      for page in self.iter_search(
+          params_,
+          limit=search_limit_ if search_limit_ is not None else -1,
+          offset=search_offset_ if search_offset_ is not None else 0):
+        # Do not include a private profile if `include_private_profiles` is
+        # set to `False` or `publicIdentifier` is absent.
+        with trace.span('normalize search page', 'normalize'):
+          people_ = [
+              self._normalize_search_person(item)
+              for item in page
+              if include_private_profiles_ or 'publicIdentifier' in item
+          ]
+        if self._urn_cache is not None:
+          self._urn_cache.put_many(
+              (person['public_id'], person['urn_id']) for person in people_)
+        if seen_ is not None:
+          people_ = [
+              person for person in people_ if person['urn_id'] not in seen_
+          ]
+          stale_pages_ = 0 if people_ else stale_pages_ + 1
+          if stale_pages_ >= max_stale_pages:
+            break
+        if people_:
+          yield people_
+          if seen_ is not None:
+            seen_.add_many(person['urn_id'] for person in people_)
+    finally:
+      if seen_ is not None:
+        seen_.close()
+
+  def iter_search_people(self,
+                         *,
+                         keywords: str = None,
+                         **kwargs) -> Iterator[dict]:
+    """Search for people on LinkedIn and yield the normalized results one
+    person at a time.
+
+    Accepts the same arguments as `search_people`.
+
+    Args:
+      keywords: Keywords to search for.
+    """
+    for page in self.iter_search_people_pages(keywords=keywords, **kwargs):
+      yield from page
+
+  def search_people(self,
+                    *,
+                    keywords: str = None,
+                    **kwargs) -> spillbuffer.SpillBuffer:
+    """Search for people on LinkedIn and return a sequence of results.
+    
+    Also, filters the search results by the given filter queries in `kwargs`
+    and applies them to the `filters` parameter for the search function.
+    The results are held in memory up to the `spill_bytes` of the client, as
+    in `search`.
+    
+    Args:
+      keywords: Keywords to search for.
+    """
+    results_ = spillbuffer.SpillBuffer(self._spill_bytes)
+    for page in self.iter_search_people_pages(keywords=keywords, **kwargs):
+      results_.extend(page)
+    return results_
 
   def get_profile(self, public_id: str = None, urn_id: str = None) -> dict:
     """This function fetches the complete profile details for a given LinkedIn
@@ -336,7 +652,7 @@ class LinkedIn(object):
       public_id: Profile public id.
       urn_id:    Profile urn id.
     """
-    assert public_id is None and urn_id is None, (
+    assert public_id is not None or urn_id is not None, (
         'Expected any one of public_id or urn_id')
 
     result_ = self._fetch(
@@ -347,7 +663,13 @@ class LinkedIn(object):
       self._logger.info('Request failed: %s', data_['message'])
       return {}
 
-    profile_ = data_['profile']
+    return self._normalize_profile(data_['profile'])
+
+  @staticmethod
+  def _normalize_profile(profile_: dict) -> dict:
+    """Flattens the mini profile of a raw profile entity into it and drops the
+    fields of no interest.
+    """
     if 'miniProfile' in profile_:
       if 'picture' in profile_['miniProfile']:
         profile_['displayPictureUrl'] = profile_['miniProfile']['picture'][
@@ -366,18 +688,149 @@ class LinkedIn(object):
       profile_['public_id'] = profile_['miniProfile']['publicIdentifier']
 
       del profile_['miniProfile']
-    del profile_['defaultLocale']
-    del profile_['supportedLocales']
-    del profile_['versionTag']
-    del profile_['showEducationOnProfileTopCard']
+    for key in ('defaultLocale', 'supportedLocales', 'versionTag',
+                'showEducationOnProfileTopCard'):
+      profile_.pop(key, None)
 
     return profile_
 
+  def _get_profiles_batch(self, ids: list[str]) -> dict[str, dict] | None:
+    """Fetches the given profiles with a single Rest.li BATCH_GET request.
+
+    Returns:
+      The normalized profiles keyed by the given ids (missing ids failed), or
+      `None` if the batch end-point rejected the request altogether.
+    """
+    ids_ = ','.join(quote(id_, safe='') for id_ in ids)
+    result_ = self._fetch(f'/identity/profiles?ids=List({ids_})')
+    if result_.status_code != 200:
+      self._logger.info('Batch profile request failed with status %d',
+                        result_.status_code)
+      return None
+
+    data_ = result_.json()
+    if not isinstance(data_.get('results'), dict):
+      return None
+    # Rest.li keys the results by the encoded id, which is the id itself for
+    # every id made of URL safe characters.
+    return {
+        unquote(id_): self._normalize_profile(profile)
+        for id_, profile in data_['results'].items()
+    }
+
+  def get_profiles(self,
+                   ids: Iterable[str],
+                   *,
+                   batch_size: int = 25,
+                   max_workers: int = 4) -> Iterator[tuple[str, dict]]:
+    """Fetches the complete profile details of many members, yielding them as
+    they arrive.
+
+    Ids are consumed `batch_size` at a time and every batch is fetched with a
+    single BATCH_GET request against the profiles collection. Ids the batch
+    response does not cover, and every id once the end-point turns out not to
+    support batching, are fetched with `get_profile` on up to `max_workers`
+    concurrent requests instead. Profiles go through the same normalization
+    as `get_profile`.
+
+    Args:
+      ids:         Public ids or URN ids of the profiles, in any mix.
+      batch_size:  Number of ids per request.
+      max_workers: Maximum number of concurrent single profile requests.
+
+    Yields:
+      `(id, profile)` pairs in the order of `ids`, where `profile` is empty if
+      it could not be fetched.
+    """
+
+    def fetch_profile(id_: str) -> dict:
+      try:
+        return self.get_profile(public_id=id_)
+      except KeyError as exc:
+        # Reported as missing, like the ids a batch response leaves out.
+        self._logger.info('Profile %s came back without %s', id_, exc)
+        return {}
+
+    ids = iter(ids)
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+      while batch_ := list(itertools.islice(ids, batch_size)):
+        profiles_ = None
+        if self._batch_profiles_supported:
+          profiles_ = self._get_profiles_batch(batch_)
+          if profiles_ is None:
+            self._batch_profiles_supported = False
+        profiles_ = profiles_ or {}
+
+        missing_ = [id_ for id_ in batch_ if id_ not in profiles_]
+        profiles_.update(zip(missing_, executor.map(fetch_profile, missing_)))
+        for id_ in batch_:
+          yield id_, profiles_[id_]
+
+  def resolve_urn_id(self, profile_pub_id: str) -> str:
+    """Returns the URN ID of the profile with the given public ID.
+
+    The URN cache, if any, is consulted first; the `profileView` request is
+    only made on a cache miss and its result is cached.
+
+    Args:
+      profile_pub_id: Public ID of the LinkedIn profile.
+
+    Returns:
+      URN ID of the profile.
+    """
+    if self._urn_cache is not None:
+      if profile_urn := self._urn_cache.get(profile_pub_id):
+        return profile_urn
+
+    profile_urn_string = self.get_profile(
+        public_id=profile_pub_id)['profile_urn']
+    profile_urn = profile_urn_string.split(':')[-1]
+    if self._urn_cache is not None:
+      self._urn_cache.put(profile_pub_id, profile_urn)
+    return profile_urn
+
+  def check_invitation_quota(self) -> None:
+    """Raises if the invitation quota tracker of the client has no invitation
+    left; a no-op for clients without one.
+
+    Raises:
+      LinkedInQuotaExceededException: If the budget is spent.
+    """
+    if self._quota is not None:
+      self._quota.check()
+
+  def _post_action(self, classify: Callable[[requests.Response],
+                                            outcome.Outcome], uri: str,
+                   **kwargs) -> outcome.Outcome:
+    """Posts a profile action and classifies its response.
+
+    Transient failures, including requests that time out or lose their
+    connection, are retried up to `_MAX_TRANSIENT_ATTEMPTS` times, paced by
+    the evade function; any other outcome is returned as is.
+
+    Raises:
+      LinkedInSessionExpiredException: If the session is no longer
+        authorized.
+    """
+    for attempt in range(LinkedIn._MAX_TRANSIENT_ATTEMPTS):
+      if attempt:
+        stats.STATS.incr('actions.retried')
+      try:
+        outcome_ = classify(self._post(uri, **kwargs))
+      except (requests.Timeout, requests.ConnectionError):
+        outcome_ = outcome.Outcome.TRANSIENT
+      if outcome_ is outcome.Outcome.UNAUTHORIZED:
+        raise linkedin_api_exceptions.LinkedInSessionExpiredException(
+            f'Session expired while posting "{uri}"')
+      if not outcome_.is_transient:
+        break
+    return outcome_
+
   def add_connection(self,
                      profile_pub_id: str,
                      *,
                      message: str = '',
-                     profile_urn: str = None) -> bool:
+                     profile_urn: str = None) -> outcome.Outcome:
     """Sends a request to LinkedIn to send a connection invitation to the
     profile with the given public ID or URN ID. If a message is provided, it is
     included in the invitation.
@@ -388,70 +841,289 @@ class LinkedIn(object):
       message:        Message to include in the connection invitation. Must be
                       300 characters or less.
       profile_urn:    URN ID of the LinkedIn profile to send connection
-                      invitation to. If not provided, the function will get it
-                      by making a call to get_profile function.
+                      invitation to. If not provided, the function will look
+                      it up in the URN cache and only then get it by making a
+                      call to get_profile function.
 
     Returns:
-      `True` if the request was successful and the invitation was sent,
-      `False` otherwise.
+      The `outcome.Outcome` of the invitation, truthy only if it was sent.
+      Profiles known from the negative cache to be already invited, already
+      connected or not invitable get their cached outcome without a request.
+
+    Raises:
+      LinkedInQuotaExceededException: If the invitation quota tracker has no
+        invitation left, or LinkedIn reports the quota as exceeded.
+      LinkedInSessionExpiredException: If the session is no longer
+        authorized.
     """
-    if len(message) > 300:
+    self.check_invitation_quota()
+
+    if self._negative_cache is not None:
+      cached_ = self._negative_cache.get(profile_urn, profile_pub_id)
+      if cached_ is not None:
+        stats.STATS.incr('invitations.skipped_cached')
+        return cached_
+
+    if len(message) > messagetemplate.MAX_MESSAGE_LENGTH:
       self._logger.warning(
-          'Message "%s" too long - trimming it down to 300 characters...',
-          message)
-      message = message[:300:]
+          'Message "%s" too long - trimming it down to %d characters...',
+          message, messagetemplate.MAX_MESSAGE_LENGTH)
+      message = messagetemplate.truncate(message)
 
     if not profile_urn:
-      profile_urn_string = self.get_profile(
-          public_id=profile_pub_id)['profile_urn']
-      profile_urn = profile_urn_string.split(':')[-1]
-
-    tracking_id_ = utils.generate_tracking_id()
-    payload_ = {
-        'trackingId': tracking_id_,
-        'message': message,
-        'invitations': [],
-        'excludeInvitations': [],
-        'invitee': {
-            'com.linkedin.voyager.growth.invitation.InviteeProfile': {
-                'profileId': profile_urn
-            }
-        }
+      profile_urn = self.resolve_urn_id(profile_pub_id)
+
+    outcome_ = self._post_action(outcome.classify_invitation,
+                                 '/growth/normInvitations',
+                                 data=requestbuilder.invitation_payload(
+                                     profile_urn, message),
+                                 headers=requestbuilder.NORMALIZED_JSON_HEADERS)
+
+    if outcome_ is outcome.Outcome.QUOTA_EXCEEDED:
+      if self._quota is not None:
+        self._quota.mark_exhausted()
+      stats.STATS.incr('invitations.quota_exceeded')
+      raise linkedin_api_exceptions.LinkedInQuotaExceededException(
+          'LinkedIn reported the invitation quota as exceeded')
+
+    if outcome_ and self._quota is not None:
+      self._quota.record()
+    if outcome_.is_permanent:
+      stats.STATS.incr(f'invitations.{outcome_.value}')
+      if self._negative_cache is not None:
+        self._negative_cache.put(outcome_, (profile_urn, profile_pub_id))
+    return outcome_
+
+  @staticmethod
+  def _normalize_connection(element: dict) -> dict:
+    """Reduces a raw connection to the fields kept in a connection
+    snapshot.
+    """
+    mini_profile_ = element.get('miniProfile', {})
+    name_ = ' '.join(
+        filter(None,
+               (mini_profile_.get('firstName'), mini_profile_.get('lastName'))))
+    return {
+        'urn_id': utils.get_id_from_urn(mini_profile_['entityUrn']),
+        'public_id': mini_profile_.get('publicIdentifier'),
+        'name': name_ or None,
+        'jobtitle': mini_profile_.get('occupation'),
+        'created_at': element.get('createdAt', 0) / 1000,
+    }
+
+  def iter_connections(self,
+                       limit: int = -1,
+                       offset: int = 0) -> Iterator[list[dict]]:
+    """Yields the first degree connections of the account, most recently
+    added first, one page at a time.
+
+    Args:
+      limit:  Maximum number of connections to return. Defaults to -1 (i.e.,
+              return all connections).
+      offset: Number of connections to skip. Defaults to 0.
+
+    Yields:
+      Pages of connections, each a dictionary with the keys `urn_id`,
+      `public_id`, `name`, `jobtitle` and `created_at` (seconds since the
+      epoch). The walk stops after `_MAX_REPEATED_REQUEST` pages, with a
+      warning, even if there are more connections; pass the offset it
+      reached to carry on.
+    """
+
+    def fetch_page(start: int, count: int) -> list[dict]:
+      params_ = {'count': count, 'sortType': 'RECENTLY_ADDED', 'start': start}
+      result_ = self._fetch(f'/relationships/connections?{urlencode(params_)}')
+      return [
+          self._normalize_connection(element)
+          for element in result_.json().get('elements', [])
+          if 'entityUrn' in element.get('miniProfile', {})
+      ]
+
+    paginator_ = paginator.Paginator(fetch_page,
+                                     page_size=LinkedIn.MAX_CONNECTIONS_COUNT,
+                                     limit=limit,
+                                     offset=offset,
+                                     max_pages=LinkedIn._MAX_REPEATED_REQUEST)
+    yield from paginator_
+    if paginator_.stop_reason == paginator.STOP_MAX_PAGES:
+      self._logger.warning(
+          'Stopped listing connections after %d pages, at offset %d; there'
+          ' may be more', paginator_.pages_fetched, paginator_.start)
+
+  @staticmethod
+  def _normalize_sent_invitation(element: dict) -> dict:
+    """Reduces a raw sent invitation view to the fields needed to display and
+    withdraw it.
+    """
+    invitation_ = element.get('invitation', element)
+    invitee_ = invitation_.get('toMember', {})
+    name_ = ' '.join(
+        filter(None, (invitee_.get('firstName'), invitee_.get('lastName'))))
+    return {
+        'invitation_id': utils.get_id_from_urn(invitation_['entityUrn']),
+        'shared_secret': invitation_.get('sharedSecret'),
+        'sent_time': invitation_.get('sentTime', 0) / 1000,
+        'urn_id': (utils.get_id_from_urn(invitee_['entityUrn'])
+                   if 'entityUrn' in invitee_ else None),
+        'public_id': invitee_.get('publicIdentifier'),
+        'name': name_ or None,
     }
+
+  def iter_sent_invitations(self,
+                            limit: int = -1,
+                            offset: int = 0) -> Iterator[list[dict]]:
+    """Yields the pending connection invitations sent by the account, newest
+    first, one page at a time.
+
+    Args:
+      limit:  Maximum number of invitations to return. Defaults to -1 (i.e.,
+              return all invitations).
+      offset: Number of invitations to skip. Defaults to 0.
+
+    Yields:
+      Pages of invitations, each a dictionary with the keys `invitation_id`,
+      `shared_secret`, `sent_time` (seconds since the epoch), `urn_id`,
+      `public_id` and `name`.
+    """
+    yield from self._sent_invitations_paginator(limit=limit, offset=offset)
+
+  def _sent_invitations_paginator(self,
+                                  limit: int = -1,
+                                  offset: int = 0) -> paginator.Paginator:
+    """Returns a paginator over the normalized sent invitations."""
+
+    def fetch_page(start: int, count: int) -> list[dict]:
+      params_ = {
+          'count': count,
+          'invitationType': 'CONNECTION',
+          'q': 'invitationType',
+          'start': start
+      }
+      result_ = self._fetch(
+          f'/relationships/sentInvitationViewsV2?{urlencode(params_)}')
+      return [
+          self._normalize_sent_invitation(element)
+          for element in result_.json().get('elements', [])
+      ]
+
+    return paginator.Paginator(fetch_page,
+                               page_size=LinkedIn.MAX_INVITATIONS_COUNT,
+                               limit=limit,
+                               offset=offset,
+                               max_pages=LinkedIn._MAX_REPEATED_REQUEST)
+
+  def withdraw_invitation(self, invitation_id: str, shared_secret: str) -> bool:
+    """Withdraws a pending connection invitation.
+
+    Args:
+      invitation_id: Id of the invitation, as in `iter_sent_invitations`.
+      shared_secret: Shared secret of the invitation.
+
+    Returns:
+      `True` if the invitation was withdrawn, `False` otherwise.
+    """
     result_ = self._post(
-        '/growth/normInvitations',
-        data=json.dumps(payload_),
-        headers={'accept': 'application/vnd.linkedin.normalized+json+2.1'})
+        f'/relationships/invitations/{invitation_id}?action=withdraw',
+        data=requestbuilder.WITHDRAW_PAYLOAD.render(
+            invitation_id=invitation_id, shared_secret=shared_secret),
+        headers=requestbuilder.NORMALIZED_JSON_HEADERS)
+    return result_.status_code == 200
+
+  def withdraw_stale_invitations(
+      self,
+      older_than: float,
+      *,
+      offset: int = 0,
+      limit: int = -1,
+      now: float = None) -> Iterator[tuple[dict, bool | None]]:
+    """Withdraws every pending invitation sent more than `older_than` seconds
+    ago, walking the sent invitations in a single pass.
+
+    Invitations are listed newest first, so the stale ones form the tail of
+    the collection. The stale invitations of a page are withdrawn before the
+    next page is fetched and the paginator is rewound by the number withdrawn,
+    since every withdrawal shifts the remaining invitations one position
+    towards the front.
 
-    return result_.status_code != 201
+    Args:
+      older_than: Minimum age in seconds of the invitations to withdraw.
+      offset:     Number of invitations to skip, e.g. the number of fresh
+                  invitations seen by a previous run.
+      limit:      Maximum number of invitations to withdraw. Defaults to -1
+                  (i.e., no limit).
+      now:        Reference time for the age, defaults to the current time.
+
+    Yields:
+      `(invitation, withdrawn)` pairs for every invitation walked, where
+      `withdrawn` is `None` for invitations that were kept because they are
+      not stale yet or the limit was reached.
+    """
+    cutoff_ = (time.time() if now is None else now) - older_than
+    withdrawn_ = 0
+    paginator_ = self._sent_invitations_paginator(offset=offset)
+    for page in paginator_:
+      removed_ = 0
+      for invitation in page:
+        if invitation['sent_time'] > cutoff_ or withdrawn_ == limit:
+          yield invitation, None
+          continue
+        ok_ = self.withdraw_invitation(invitation['invitation_id'],
+                                       invitation['shared_secret'])
+        if ok_:
+          withdrawn_ += 1
+          removed_ += 1
+        yield invitation, ok_
+      paginator_.rewind(removed_)
+      if withdrawn_ == limit:
+        break
 
-  def remove_connection(self, profile_pub_id: str) -> bool:
+  def remove_connection(self, profile_pub_id: str) -> outcome.Outcome:
     """Removes a connection with a LinkedIn user specified by their public ID.
     
     Args:
       profile_pub_id: Public ID of the LinkedIn user to remove connection with.
 
     Returns:
-      `True` if connection removal was successful, `False` otherwise.
+      The `outcome.Outcome` of the removal, truthy only if it succeeded.
+
+    Raises:
+      LinkedInSessionExpiredException: If the session is no longer
+        authorized.
     """
-    result_ = self._post(
+    return self._post_action(
+        outcome.classify,
         f'/identity/profiles/{profile_pub_id}/profileActions?action=disconnect',
-        headers={'accept': 'application/vnd.linkedin.normalized+json+2.1'},
+        headers=requestbuilder.NORMALIZED_JSON_HEADERS,
     )
-    return result_.status_code != 200
 
-  def unfollow_connection(self, profile_urn_id: str) -> bool:
+  def unfollow_connection(self, profile_urn_id: str) -> outcome.Outcome:
     """Unfollows a connection once the connection request has been made.
     
     Args:
       profile_urn_id: URN ID of the LinkedIn user to unfollow.
 
     Returns:
-      `True` if the unfollow action was successful, `False` otherwise.
+      The `outcome.Outcome` of the unfollow action, truthy only if it
+      succeeded.
+
+    Raises:
+      LinkedInSessionExpiredException: If the session is no longer
+        authorized.
     """
-    payload = {'urn': f'urn:li:fs_followingInfo:{profile_urn_id}'}
-    result_ = self._post(
+    return self._post_action(
+        outcome.classify,
         '/feed/follows?action=unfollowByEntityUrn',
-        headers={'accept': 'application/vnd.linkedin.normalized+json+2.1'},
-        data=json.dumps(payload))
-    return result_.status_code != 200
+        headers=requestbuilder.NORMALIZED_JSON_HEADERS,
+        data=requestbuilder.UNFOLLOW_PAYLOAD.render(
+            urn=f'urn:li:fs_followingInfo:{profile_urn_id}'))
+
+  def close(self) -> None:
+    """Stops the background session refresh and closes the session, along
+    with the invitation quota and negative cache given to the client. The
+    URN and page caches may be shared, so they are left to their owner.
+    """
+    self.client.close()
+    if self._quota is not None:
+      self._quota.close()
+    if self._negative_cache is not None:
+      self._negative_cache.close()
@@ -0,0 +1,140 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Personalized invitation messages rendered from a template."""
+
+from __future__ import annotations
+
+import string
+import functools
+
+try:
+  import nameparser
+except ImportError:
+  nameparser = None
+
+# Longest message LinkedIn accepts with an invitation.
+MAX_MESSAGE_LENGTH = 300
+
+# Fields a template may refer to, taken from a search result or a target.
+FIELDS = ('name', 'first_name', 'last_name', 'jobtitle', 'location',
+          'public_id')
+
+
+@functools.lru_cache(maxsize=4096)
+def split_name(name: str) -> tuple[str, str]:
+  """Returns the first and last name of a full name.
+
+  Titles and suffixes (e.g. "Dr." or "Jr.") are dropped when `nameparser` is
+  installed, otherwise the name is split on its first and last words.
+  """
+  if nameparser is not None:
+    name_ = nameparser.HumanName(name)
+    if name_.first:
+      return name_.first, name_.last
+  words_ = name.split()
+  if not words_:
+    return '', ''
+  return words_[0], words_[-1] if len(words_) > 1 else ''
+
+
+def truncate(text: str, length: int = MAX_MESSAGE_LENGTH) -> str:
+  """Shortens `text` to at most `length` characters without splitting a word.
+
+  A single word longer than `length` is cut, since there is no boundary to
+  fall back to.
+  """
+  if len(text) <= length:
+    return text
+  head_ = text[:length + 1]
+  cut_ = head_.rfind(' ')
+  if cut_ <= 0:
+    return text[:length].rstrip()
+  return head_[:cut_].rstrip(' ,;:-')
+
+
+class MessageTemplate(object):
+  """A message template compiled once and rendered for every invitation.
+
+  Templates use the `str.format` field syntax with the names in `FIELDS`,
+  e.g. "Hi {first_name}, fellow {jobtitle} here". A field may carry a
+  fallback for profiles missing it after a "|", as in "{first_name|there}".
+  The template is parsed and validated on construction, so rendering is a
+  single join over the precomputed parts.
+  """
+
+  def __init__(self,
+               template: str,
+               *,
+               max_length: int = MAX_MESSAGE_LENGTH) -> None:
+    """Compiles the template.
+
+    Args:
+      template:   Template text.
+      max_length: Length the rendered messages are truncated to.
+
+    Raises:
+      ValueError: If the template is malformed, refers to an unknown field or
+        its literal text alone is longer than `max_length`.
+    """
+    self.template = template
+    self.max_length = max_length
+    self._parts = []
+    literal_length_ = 0
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+      if literal:
+        self._parts.append((literal, None, None))
+        literal_length_ += len(literal)
+      if field is None:
+        continue
+      name_, default_ = field.partition('|')[::2]
+      name_ = name_.strip()
+      if name_ not in FIELDS:
+        raise ValueError(f'Unknown template field "{{{field}}}", expected one'
+                         f' of {list(FIELDS)}')
+      if spec or conversion:
+        raise ValueError(f'Template field "{{{field}}}" does not take a format'
+                         ' specification')
+      self._parts.append((None, name_, default_))
+    if literal_length_ > max_length:
+      raise ValueError(f'Template text is {literal_length_} characters long,'
+                       f' the message may be at most {max_length}')
+    self.fields = frozenset(name for _, name, _ in self._parts if name)
+    self._splits_name = bool(self.fields & {'first_name', 'last_name'})
+
+  def _values(self, person: dict) -> dict:
+    values_ = {
+        field: ' '.join((person.get(field) or '').split())
+        for field in self.fields & person.keys()
+    }
+    if self._splits_name:
+      values_['first_name'], values_['last_name'] = split_name(
+          values_.get('name') or ' '.join((person.get('name') or '').split()))
+    return values_
+
+  def render(self, person: dict) -> str:
+    """Renders the message for a search result or a target.
+
+    Args:
+      person: Dictionary with (some of) the keys in `FIELDS`; `first_name` and
+              `last_name` are derived from `name`.
+
+    Returns:
+      The message, at most `max_length` characters long.
+    """
+    values_ = self._values(person)
+    message_ = ''.join(
+        literal if literal is not None else (values_.get(name) or default)
+        for literal, name, default in self._parts)
+    return truncate(message_, self.max_length)
@@ -0,0 +1,213 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Typed outcomes of the profile actions and a cache of the permanent ones."""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+import os
+import enum
+import time
+import pathlib
+import sqlite3
+import requests
+import threading
+
+from api import checkpoint, settings
+
+
+class Outcome(enum.Enum):
+  """Outcome of an invitation, removal or unfollow request.
+
+  Only `SUCCESS` is truthy, so an outcome can be tested like the booleans the
+  actions used to return.
+  """
+
+  SUCCESS = 'success'
+  # The profile has a pending invitation from the account, or one was
+  # withdrawn too recently to send another.
+  ALREADY_INVITED = 'already_invited'
+  ALREADY_CONNECTED = 'already_connected'
+  # The profile does not accept invitations from the account, e.g. because it
+  # requires the email address.
+  CANNOT_INVITE = 'cannot_invite'
+  QUOTA_EXCEEDED = 'quota_exceeded'
+  UNAUTHORIZED = 'unauthorized'
+  # Server errors, throttling and timeouts, worth retrying later.
+  TRANSIENT = 'transient'
+  FAILED = 'failed'
+
+  def __bool__(self) -> bool:
+    return self is Outcome.SUCCESS
+
+  @property
+  def is_permanent(self) -> bool:
+    """Whether sending the same request again is bound to fail the same way."""
+    return self in PERMANENT
+
+  @property
+  def is_transient(self) -> bool:
+    return self is Outcome.TRANSIENT
+
+
+# Outcomes worth remembering per profile, so later runs skip the request.
+PERMANENT = frozenset(
+    (Outcome.ALREADY_INVITED, Outcome.ALREADY_CONNECTED, Outcome.CANNOT_INVITE))
+
+# Error codes of the Voyager invitation responses, found either at the top
+# level of the body or under `data`.
+_INVITATION_CODES = {
+    'FUSE_LIMIT_EXCEEDED': Outcome.QUOTA_EXCEEDED,
+    'CANT_RESEND_YET': Outcome.ALREADY_INVITED,
+    'INVITATION_ALREADY_EXISTS': Outcome.ALREADY_INVITED,
+    'ALREADY_CONNECTED': Outcome.ALREADY_CONNECTED,
+    'CONNECTION_ALREADY_EXISTS': Outcome.ALREADY_CONNECTED,
+    'EMAIL_REQUIRED': Outcome.CANNOT_INVITE,
+    'INVITEE_NOT_INVITABLE': Outcome.CANNOT_INVITE,
+}
+
+_TRANSIENT_STATUS_CODES = frozenset((408, 425, 500, 502, 503, 504))
+
+
+def _error_code(response: requests.Response) -> str | None:
+  try:
+    data_ = response.json()
+  except ValueError:
+    return None
+  if not isinstance(data_, dict):
+    return None
+  nested_ = data_.get('data')
+  if isinstance(nested_, dict) and isinstance(nested_.get('code'), str):
+    return nested_['code']
+  code_ = data_.get('code')
+  return code_ if isinstance(code_, str) else None
+
+
+def classify(response: requests.Response) -> Outcome:
+  """Classifies the response of a profile action by its status code alone."""
+  status_code_ = response.status_code
+  if status_code_ in (200, 201):
+    return Outcome.SUCCESS
+  if status_code_ == 401:
+    return Outcome.UNAUTHORIZED
+  if status_code_ == 429 or status_code_ in _TRANSIENT_STATUS_CODES:
+    return Outcome.TRANSIENT
+  return Outcome.FAILED
+
+
+def classify_invitation(response: requests.Response) -> Outcome:
+  """Classifies the response of an invitation request.
+
+  Invitations are throttled by the weekly quota, so a 429 counts as
+  `QUOTA_EXCEEDED` rather than `TRANSIENT`. The error code of the body takes
+  precedence over the status code, and a 409 without a known code means the
+  invitation already exists.
+  """
+  if response.status_code in (200, 201):
+    return Outcome.SUCCESS
+  if response.status_code == 429:
+    return Outcome.QUOTA_EXCEEDED
+  outcome_ = _INVITATION_CODES.get(_error_code(response))
+  if outcome_ is not None:
+    return outcome_
+  if response.status_code == 409:
+    return Outcome.ALREADY_INVITED
+  return classify(response)
+
+
+class NegativeCache(object):
+  """Persistent record of the profiles an account can't invite.
+
+  Profiles are keyed by URN id and public id, since either one may be all a
+  caller knows before the request. Entries expire after `ttl` seconds: a
+  pending invitation may be withdrawn or declined, after which the profile
+  can be invited again.
+  """
+
+  # About the time LinkedIn keeps an invitation pending or blocks re-sending
+  # a withdrawn one.
+  DEFAULT_TTL = 30 * 24 * 3600.0
+
+  def __init__(self,
+               account: str,
+               *,
+               ttl: float = DEFAULT_TTL,
+               cache_dir: str = None,
+               clock: Callable[[], float] = time.time) -> None:
+    """Initializes the cache.
+
+    Args:
+      account:   Account the outcomes were recorded for.
+      ttl:       Number of seconds an outcome is remembered.
+      cache_dir: Directory to store the database in. Defaults to
+                 `settings.INB_CACHE_DIR / 'outcomes'`.
+      clock:     Function returning the current time in seconds since the
+                 epoch.
+    """
+    if cache_dir is None:
+      cache_dir = settings.INB_CACHE_DIR / 'outcomes'
+    self.cache_dir = pathlib.Path(cache_dir)
+    if not os.path.exists(os.fspath(self.cache_dir)):
+      os.makedirs(os.fspath(self.cache_dir))
+
+    self.account = account
+    self.ttl = ttl
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._connection = sqlite3.connect(os.fspath(
+        self.cache_dir / f'{checkpoint.Checkpoint.name_for(account)}.sqlite3'),
+                                       check_same_thread=False)
+    self._connection.execute('CREATE TABLE IF NOT EXISTS outcomes ('
+                             ' profile_id TEXT PRIMARY KEY,'
+                             ' outcome TEXT NOT NULL,'
+                             ' recorded REAL NOT NULL'
+                             ')')
+    self._connection.commit()
+
+  def get(self, *profile_ids: str) -> Outcome | None:
+    """Returns the unexpired outcome recorded for any of the given ids."""
+    profile_ids = [profile_id for profile_id in profile_ids if profile_id]
+    if not profile_ids:
+      return None
+    placeholders_ = ','.join('?' * len(profile_ids))
+    with self._lock:
+      row_ = self._connection.execute(
+          'SELECT outcome FROM outcomes'
+          f' WHERE profile_id IN ({placeholders_}) AND recorded >= ?'
+          ' ORDER BY recorded DESC LIMIT 1',
+          (*profile_ids, self._clock() - self.ttl)).fetchone()
+    return Outcome(row_[0]) if row_ else None
+
+  def put(self, outcome: Outcome, profile_ids: Iterable[str]) -> None:
+    """Records a permanent outcome for the given ids; others are ignored."""
+    if not outcome.is_permanent:
+      return
+    now_ = self._clock()
+    with self._lock:
+      self._connection.executemany(
+          'INSERT OR REPLACE INTO outcomes (profile_id, outcome, recorded)'
+          ' VALUES (?, ?, ?)', ((profile_id, outcome.value, now_)
+                                for profile_id in profile_ids
+                                if profile_id))
+      self._connection.commit()
+
+  def __len__(self) -> int:
+    with self._lock:
+      return self._connection.execute(
+          'SELECT COUNT(*) FROM outcomes').fetchone()[0]
+
+  def close(self) -> None:
+    self._connection.close()
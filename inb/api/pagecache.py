@@ -0,0 +1,179 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content addressed on-disk cache for search result pages."""
+
+from __future__ import annotations
+
+import os
+import gzip
+import json
+import time
+import pathlib
+import threading
+
+from api import checkpoint, settings
+from api.utils import utils
+
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+
+class PageCache(object):
+  """Caches the decoded search pages of an account on disk, keyed by their
+  request parameters.
+
+  Search results depend on the network of the account that searched, so every
+  account gets its own directory of entries. The key of a page is a hash of
+  the canonical (sorted, compact) JSON form of the query parameters, so the
+  same keywords, filters, count and offset always map to the same entry
+  regardless of the order the parameters were built in.
+
+  Entries are compressed with zstd when `zstandard` is installed and gzip
+  otherwise, expire `ttl` seconds after they were written and are evicted
+  oldest first once the cache grows beyond `max_bytes`.
+  """
+
+  _SUFFIX_ZSTD = '.json.zst'
+  _SUFFIX_GZIP = '.json.gz'
+
+  def __init__(self,
+               account: str,
+               cache_dir: str = None,
+               *,
+               ttl: float = 3600.0,
+               max_bytes: int = 256 * 1024 * 1024) -> None:
+    """Initializes the cache.
+
+    Args:
+      account:   Account the pages are fetched with.
+      cache_dir: Directory to store the pages of every account in. Defaults
+                 to `search/` in `settings.INB_CACHE_DIR`.
+      ttl:       Number of seconds an entry stays valid.
+      max_bytes: Upper bound of the total size of the cache on disk.
+    """
+    if cache_dir is None:
+      cache_dir = settings.INB_CACHE_DIR / 'search'
+    self.cache_dir = (pathlib.Path(cache_dir) /
+                      checkpoint.Checkpoint.name_for(account))
+    if not os.path.exists(os.fspath(self.cache_dir)):
+      os.makedirs(os.fspath(self.cache_dir))
+
+    self.account = account
+    self.ttl = ttl
+    self.max_bytes = max_bytes
+    self.hits = 0
+    self.misses = 0
+
+    self._lock = threading.Lock()
+    self._size = sum(path.stat().st_size for path in self._entries())
+
+  @staticmethod
+  def key(params: dict) -> str:
+    """Returns the canonical key of the given query parameters."""
+    return utils.canonical_hash(params)
+
+  def _entries(self) -> list[pathlib.Path]:
+    return [
+        path for path in self.cache_dir.iterdir()
+        if path.name.endswith((PageCache._SUFFIX_ZSTD, PageCache._SUFFIX_GZIP))
+    ]
+
+  @staticmethod
+  def _compress(data: bytes) -> tuple[bytes, str]:
+    if zstandard is not None:
+      return zstandard.ZstdCompressor().compress(data), PageCache._SUFFIX_ZSTD
+    return gzip.compress(data, compresslevel=6), PageCache._SUFFIX_GZIP
+
+  @staticmethod
+  def _decompress(data: bytes, suffix: str) -> bytes:
+    if suffix == PageCache._SUFFIX_ZSTD:
+      return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+  def get(self, params: dict) -> dict | None:
+    """Returns the cached page for the given parameters or `None` if there is
+    no valid entry.
+    """
+    key_ = PageCache.key(params)
+    suffixes_ = [PageCache._SUFFIX_GZIP]
+    if zstandard is not None:
+      suffixes_.insert(0, PageCache._SUFFIX_ZSTD)
+
+    for suffix in suffixes_:
+      path_ = self.cache_dir / f'{key_}{suffix}'
+      try:
+        stat_ = path_.stat()
+        if time.time() - stat_.st_mtime > self.ttl:
+          continue
+        with open(path_, 'rb') as page_file:
+          page_ = json.loads(self._decompress(page_file.read(), suffix))
+      except (OSError, ValueError, EOFError):
+        # A missing, concurrently evicted or truncated entry is just a miss.
+        continue
+      self.hits += 1
+      return page_
+    self.misses += 1
+    return None
+
+  def put(self, params: dict, page: dict) -> None:
+    """Caches the page for the given parameters."""
+    data_, suffix_ = self._compress(
+        json.dumps(page, separators=(',', ':')).encode('utf-8'))
+    path_ = self.cache_dir / f'{PageCache.key(params)}{suffix_}'
+    tmp_path_ = path_.with_name(f'{path_.name}.{threading.get_ident()}.tmp')
+    with open(tmp_path_, 'wb') as page_file:
+      page_file.write(data_)
+
+    with self._lock:
+      if os.path.exists(path_):
+        self._size -= path_.stat().st_size
+      os.replace(tmp_path_, path_)
+      self._size += len(data_)
+      if self._size > self.max_bytes:
+        self._evict()
+
+  def _evict(self) -> None:
+    """Removes expired entries and then the oldest ones until the cache fits
+    in `max_bytes` again.
+
+    Must be called with `_lock` held.
+    """
+    now_ = time.time()
+    entries_ = []
+    for path in self._entries():
+      try:
+        entries_.append((path.stat(), path))
+      except OSError:
+        continue
+    entries_.sort(key=lambda entry: entry[0].st_mtime)
+
+    self._size = sum(stat.st_size for stat, _ in entries_)
+    for stat, path in entries_:
+      if self._size <= self.max_bytes and now_ - stat.st_mtime <= self.ttl:
+        break
+      try:
+        os.remove(path)
+      except OSError:
+        continue
+      self._size -= stat.st_size
+
+  def clear(self) -> None:
+    """Removes every entry from the cache."""
+    with self._lock:
+      for path in self._entries():
+        os.remove(path)
+      self._size = 0
@@ -0,0 +1,83 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Page size that adapts to what the server accepts."""
+
+from __future__ import annotations
+
+import threading
+
+
+class AdaptivePageSize(object):
+  """Converges on the largest page size the server accepts.
+
+  The size grows towards `maximum` (halving the remaining gap each time)
+  after every full page served within `fast_response` seconds. A rejected
+  request lowers the ceiling below the rejected count and falls back to the
+  largest size served so far (or half the rejected one), which makes the
+  probing a binary search; a truncated page (fewer elements than requested)
+  means the server caps the count, so the ceiling drops to what it actually
+  served. The ceiling never goes back up.
+  """
+
+  def __init__(self,
+               *,
+               initial: int,
+               minimum: int = 10,
+               maximum: int = 49,
+               fast_response: float = 1.0) -> None:
+    """Initializes the page size.
+
+    Args:
+      initial:       Page size to start with, known to be accepted.
+      minimum:       Smallest page size to shrink to.
+      maximum:       Largest page size to probe. Defaults to the largest
+                     search count Voyager accepts.
+      fast_response: Number of seconds under which a response counts as fast.
+    """
+    self.minimum = minimum
+    self.maximum = maximum
+    self.fast_response = fast_response
+    self.size = max(minimum, min(initial, maximum))
+    self._accepted = None
+    self._lock = threading.Lock()
+
+  def on_page(self, requested: int, received: int, elapsed: float) -> None:
+    """Records a page of `received` elements served for a request of
+    `requested` elements in `elapsed` seconds.
+    """
+    with self._lock:
+      if received:
+        self._accepted = max(self._accepted or 0, min(requested, received))
+      if 0 < received < requested:
+        self.maximum = max(self.minimum, received)
+        self.size = self.maximum
+      elif (received == requested == self.size and
+            elapsed <= self.fast_response):
+        self.size += (self.maximum - self.size + 1) // 2
+
+  def on_error(self, requested: int) -> bool:
+    """Records a rejected request of `requested` elements.
+
+    Returns:
+      Whether the request is worth retrying with the (now smaller) size.
+    """
+    with self._lock:
+      if requested <= self.minimum:
+        return False
+      self.maximum = max(self.minimum, min(self.maximum, requested - 1))
+      fallback_ = self._accepted if self._accepted is not None else (
+          requested // 2)
+      self.size = max(self.minimum, min(self.maximum, fallback_))
+      return True
@@ -0,0 +1,170 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Offset based pagination over the Voyager collection end-points."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Hashable, Iterator
+
+STOP_EXHAUSTED = 'exhausted'
+STOP_LIMIT = 'limit'
+STOP_MAX_PAGES = 'max_pages'
+STOP_TOTAL = 'total'
+STOP_LOW_YIELD = 'low_yield'
+STOP_CLOSED = 'closed'
+
+
+class Paginator(object):
+  """Lazily walks an offset paginated collection one page at a time.
+
+  Pages are fetched by `fetch_page(start, count)`, which returns the list of
+  elements of the page starting at `start`. Iteration stops when a page comes
+  back empty, once `limit` elements have been yielded, after `max_pages`
+  requests or once `start` passes `total`, whichever happens first; the cause
+  is kept in `stop_reason` (`STOP_CLOSED` if the consumer stopped first).
+
+  Given a `key`, elements whose key was already yielded are dropped while
+  streaming, and iteration also stops after `max_low_yield_pages`
+  consecutive pages in which less than `min_yield` of the elements were new,
+  since a collection serving mostly repeats rarely recovers.
+  """
+
+  def __init__(self,
+               fetch_page: Callable[[int, int], list],
+               *,
+               page_size: int,
+               limit: int = -1,
+               offset: int = 0,
+               max_pages: int = None,
+               key: Callable[[Any], Hashable] = None,
+               min_yield: float = 0.1,
+               max_low_yield_pages: int = None) -> None:
+    """Initializes the paginator.
+
+    Args:
+      fetch_page:          Function returning the elements of the page at the
+                           given start offset with at most the given count.
+      page_size:           Number of elements to request per page.
+      limit:               Maximum number of elements to yield, -1 (or
+                           `None`) for no limit.
+      offset:              Offset of the first element to fetch.
+      max_pages:           Maximum number of pages to fetch, `None` for no
+                           limit.
+      key:                 Function returning the identity of an element, used
+                           to drop duplicates. `None` disables deduplication;
+                           elements with a `None` identity are always kept.
+      min_yield:           Fraction of new elements below which a page counts
+                           as low-yield.
+      max_low_yield_pages: Number of consecutive low-yield pages after which
+                           iteration stops, `None` to never stop on yield.
+    """
+    self.page_size = page_size
+    self.limit = -1 if limit is None else limit
+    self.max_pages = max_pages
+    self.min_yield = min_yield
+    self.max_low_yield_pages = max_low_yield_pages
+
+    # Offset of the next page to fetch.
+    self.start = offset
+    # Size of the collection, set by `fetch_page` when the server reports it.
+    self.total = None
+    self.pages_fetched = 0
+    self.elements_fetched = 0
+    self.elements_yielded = 0
+    self.duplicates = 0
+    self.stop_reason = None
+
+    self._fetch_page = fetch_page
+    self._key = key
+    self._seen_keys = set()
+    self._low_yield_pages = 0
+
+  def rewind(self, count: int) -> None:
+    """Moves the offset of the next page back by `count` elements.
+
+    Used when the consumer removes elements from the collection while walking
+    it (e.g., withdrawing invitations): every removed element shifts the ones
+    after it one position towards the front.
+    """
+    self.start = max(self.start - count, 0)
+
+  def counters(self) -> dict:
+    """Returns the request and yield counters of the walk so far."""
+    return {
+        'pages_fetched': self.pages_fetched,
+        'elements_fetched': self.elements_fetched,
+        'elements_yielded': self.elements_yielded,
+        'duplicates': self.duplicates,
+        'stop_reason': self.stop_reason,
+    }
+
+  def _deduplicate(self, elements: list) -> list:
+    if self._key is None:
+      return elements
+    unique_ = []
+    for element in elements:
+      key_ = self._key(element)
+      if key_ is not None:
+        if key_ in self._seen_keys:
+          continue
+        self._seen_keys.add(key_)
+      unique_.append(element)
+    self.duplicates += len(elements) - len(unique_)
+    return unique_
+
+  def _next_stop_reason(self, fetched: int, unique: int) -> str | None:
+    if not fetched:
+      return STOP_EXHAUSTED
+    if -1 < self.limit <= self.elements_yielded:
+      return STOP_LIMIT
+    if self.total is not None and self.start >= self.total:
+      return STOP_TOTAL
+    if self.max_low_yield_pages is not None:
+      if unique < self.min_yield * fetched:
+        self._low_yield_pages += 1
+      else:
+        self._low_yield_pages = 0
+      if self._low_yield_pages >= self.max_low_yield_pages:
+        return STOP_LOW_YIELD
+    if self.max_pages is not None and self.pages_fetched >= self.max_pages:
+      return STOP_MAX_PAGES
+    return None
+
+  def __iter__(self) -> Iterator[list]:
+    if self.limit == 0:
+      self.stop_reason = STOP_LIMIT
+    while self.stop_reason is None:
+      count_ = self.page_size
+      if self.limit > -1:
+        count_ = min(count_, self.limit - self.elements_yielded)
+
+      fetched_ = self._fetch_page(self.start, count_)
+      self.pages_fetched += 1
+      self.elements_fetched += len(fetched_)
+      self.start += len(fetched_)
+      elements_ = self._deduplicate(fetched_)
+      if self.limit > -1:
+        elements_ = elements_[:self.limit - self.elements_yielded]
+      self.elements_yielded += len(elements_)
+      # Decided before yielding, so the counters are final by the time the
+      # consumer sees the last page.
+      self.stop_reason = self._next_stop_reason(len(fetched_), len(elements_))
+
+      if elements_:
+        try:
+          yield elements_
+        except GeneratorExit:
+          self.stop_reason = self.stop_reason or STOP_CLOSED
+          raise
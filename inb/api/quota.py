@@ -0,0 +1,161 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rolling window tracker of the invitations sent by an account."""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import os
+import time
+import pathlib
+import sqlite3
+import threading
+
+from api import settings, exceptions as linkedin_api_exceptions
+
+# LinkedIn caps invitations per week.
+WEEK = 7 * 24 * 3600.0
+
+
+class InvitationQuota(object):
+  """Counts the invitations an account sent within a rolling window.
+
+  The count lives in a SQLite database under `settings.INB_USER_DIR`, shared
+  by every process of every account, so consecutive runs and the daemon all
+  draw from the same budget. Once LinkedIn reports the quota as exceeded the
+  account is blocked until the oldest invitation in the window ages out, even
+  if the local count says otherwise (e.g. invitations sent from a browser).
+  """
+
+  _FILE_NAME = 'quota.sqlite3'
+
+  def __init__(self,
+               account: str,
+               *,
+               limit: int = 100,
+               window: float = WEEK,
+               quota_dir: str = None,
+               clock: Callable[[], float] = time.time) -> None:
+    """Initializes the tracker.
+
+    Args:
+      account:   Account whose invitations are counted.
+      limit:     Number of invitations allowed within `window`.
+      window:    Length of the rolling window in seconds. Defaults to a week.
+      quota_dir: Directory to store the database in. Defaults to
+                 `settings.INB_USER_DIR`.
+      clock:     Function returning the current time in seconds since the
+                 epoch.
+    """
+    if quota_dir is None:
+      quota_dir = settings.INB_USER_DIR
+    self.quota_dir = pathlib.Path(quota_dir)
+    if not os.path.exists(os.fspath(self.quota_dir)):
+      os.makedirs(os.fspath(self.quota_dir))
+
+    self.account = account
+    self.limit = limit
+    self.window = window
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._connection = sqlite3.connect(os.fspath(self.quota_dir /
+                                                 InvitationQuota._FILE_NAME),
+                                       timeout=30.0,
+                                       check_same_thread=False)
+    self._connection.execute('CREATE TABLE IF NOT EXISTS invitations ('
+                             ' account TEXT NOT NULL,'
+                             ' sent REAL NOT NULL'
+                             ')')
+    self._connection.execute('CREATE INDEX IF NOT EXISTS invitations_account'
+                             ' ON invitations (account, sent)')
+    self._connection.execute('CREATE TABLE IF NOT EXISTS blocks ('
+                             ' account TEXT PRIMARY KEY,'
+                             ' until REAL NOT NULL'
+                             ')')
+    self._connection.commit()
+
+  def used(self) -> int:
+    """Returns the number of invitations sent within the window."""
+    with self._lock:
+      return self._connection.execute(
+          'SELECT COUNT(*) FROM invitations WHERE account = ? AND sent > ?',
+          (self.account, self._clock() - self.window)).fetchone()[0]
+
+  def blocked_until(self) -> float | None:
+    """Returns when the block set by `mark_exhausted()` lifts, or `None` if
+    the account is not blocked.
+    """
+    with self._lock:
+      row_ = self._connection.execute(
+          'SELECT until FROM blocks WHERE account = ?',
+          (self.account,)).fetchone()
+    if row_ is None or row_[0] <= self._clock():
+      return None
+    return row_[0]
+
+  def remaining(self) -> int:
+    """Returns the number of invitations left within the window."""
+    if self.blocked_until() is not None:
+      return 0
+    return max(self.limit - self.used(), 0)
+
+  def check(self) -> None:
+    """Raises if no invitation is left.
+
+    Raises:
+      LinkedInQuotaExceededException: If the budget is spent.
+    """
+    if self.remaining() == 0:
+      until_ = self.blocked_until()
+      raise linkedin_api_exceptions.LinkedInQuotaExceededException(
+          f'Invitation quota of "{self.account}" exhausted'
+          f' ({self.limit} per {self.window / 3600:g}h)' +
+          (f', blocked until {time.ctime(until_)}' if until_ else ''))
+
+  def record(self) -> None:
+    """Records an invitation sent now, forgetting those out of the window."""
+    now_ = self._clock()
+    with self._lock:
+      self._connection.execute(
+          'DELETE FROM invitations WHERE account = ? AND sent <= ?',
+          (self.account, now_ - self.window))
+      self._connection.execute(
+          'INSERT INTO invitations (account, sent) VALUES (?, ?)',
+          (self.account, now_))
+      self._connection.commit()
+
+  def mark_exhausted(self, until: float = None) -> None:
+    """Blocks the account after LinkedIn reported the quota as exceeded.
+
+    Args:
+      until: When the block lifts. Defaults to when the oldest invitation in
+             the window ages out, or a day from now if none is recorded.
+    """
+    now_ = self._clock()
+    with self._lock:
+      if until is None:
+        oldest_ = self._connection.execute(
+            'SELECT MIN(sent) FROM invitations WHERE account = ? AND sent > ?',
+            (self.account, now_ - self.window)).fetchone()[0]
+        until = (oldest_ + self.window if oldest_ is not None else now_ +
+                 24 * 3600.0)
+      self._connection.execute(
+          'INSERT OR REPLACE INTO blocks (account, until) VALUES (?, ?)',
+          (self.account, until))
+      self._connection.commit()
+
+  def close(self) -> None:
+    self._connection.close()
@@ -0,0 +1,274 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local filtering and ranking of search results before they are invited.
+
+Pages of normalized search results are turned into columns, and predicates
+run once per column instead of once per result: the values of a column are
+joined into a single string that a compiled pattern scans in one pass, and
+the matches are mapped back to rows by their offsets. Every keyword of a
+filter (included, excluded and scored) gets its own pattern, so keywords
+nested in one another (e.g. "engineer" in "senior engineer") all match. Masks
+and scores are combined with NumPy when it is installed.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Sequence
+
+import re
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+# Columns the keywords and regular expressions run against.
+TEXT_FIELDS = ('jobtitle', 'location')
+
+_ROW_SEPARATOR = '\n'
+
+
+def to_columns(page: list[dict], fields: Iterable[str]) -> dict[str, list]:
+  """Returns the values of the given fields of a page, one list per field."""
+  return {field: [row.get(field) for row in page] for field in fields}
+
+
+class _Column(object):
+  """Text values joined into a single string, one row per line."""
+
+  def __init__(self, values: Sequence[str | None]) -> None:
+    values = [value or '' for value in values]
+    self._lowered = None
+    text_ = _ROW_SEPARATOR.join(values)
+    # Values spanning lines are rare, so they are only cleaned up when the
+    # joined text has more lines than rows.
+    if text_.count(_ROW_SEPARATOR) > len(values) - 1:
+      values = [value.replace(_ROW_SEPARATOR, ' ') for value in values]
+      text_ = _ROW_SEPARATOR.join(values)
+    self.values = values
+    self.text = text_
+
+  @property
+  def lowered(self) -> str:
+    """The joined text in lower case, for the case sensitive (and faster)
+    keyword pattern.
+    """
+    if self._lowered is None:
+      self._lowered = self.text.lower()
+    return self._lowered
+
+  def iter_matches(self,
+                   pattern: re.Pattern,
+                   lowered: bool = False) -> Iterator[tuple[int, re.Match]]:
+    """Yields the matches of `pattern` along with the row they start in,
+    scanning the lower case text if `lowered` is set.
+    """
+    text_ = self.lowered if lowered else self.text
+    row_, position_ = 0, 0
+    for match in pattern.finditer(text_):
+      start_ = match.start()
+      row_ += text_.count(_ROW_SEPARATOR, position_, start_)
+      position_ = start_
+      yield row_, match
+
+  def matching_rows(self, pattern: re.Pattern) -> set[int]:
+    """Returns the indices of the rows `pattern` matches."""
+    rows_ = set()
+    for row, match in self.iter_matches(pattern):
+      if row in rows_:
+        continue
+      # A match running into the next row (e.g. through `\s`) does not count,
+      # but may hide a match within its own row.
+      if (self.text.find(_ROW_SEPARATOR, *match.span()) == -1 or
+          pattern.search(self.values[row])):
+        rows_.add(row)
+    return rows_
+
+
+class _Mask(object):
+  """Boolean mask over the rows of a page, backed by NumPy when available."""
+
+  @staticmethod
+  def full(size: int, value: bool):
+    if numpy is not None:
+      return numpy.full(size, value, dtype=bool)
+    return [value] * size
+
+  @staticmethod
+  def from_rows(size: int, rows: Iterable[int]):
+    mask_ = _Mask.full(size, False)
+    for row in rows:
+      mask_[row] = True
+    return mask_
+
+  @staticmethod
+  def and_(mask, other):
+    if numpy is not None:
+      return mask & other
+    return [a and b for a, b in zip(mask, other)]
+
+  @staticmethod
+  def and_not(mask, other):
+    if numpy is not None:
+      return mask & ~other
+    return [a and not b for a, b in zip(mask, other)]
+
+
+class PageFilter(object):
+  """Filters and ranks pages of normalized search results.
+
+  A result is kept if its job title or location mentions one of `include`
+  (when given) and none of `exclude`, its job title and location match the
+  `jobtitle` and `location` regular expressions, its distance is one of
+  `distances` (when given) and its score reaches `min_score`.
+
+  The score of a result is the sum of the weights of the `terms` its job
+  title or location mention, every `include` keyword weighing 1 unless it is
+  given a weight in `terms`. Kept results are ranked by score within their
+  page, so the pipeline keeps streaming.
+
+  Keywords match whole words, case insensitively, each on its own: a text
+  mentioning "senior engineer" mentions "engineer" as well. A keyword may
+  start or end with punctuation (e.g. "c++" or ".net"), as long as it is not
+  glued to a letter or digit.
+  """
+
+  def __init__(self,
+               *,
+               include: Iterable[str] = (),
+               exclude: Iterable[str] = (),
+               jobtitle: str = None,
+               location: str = None,
+               distances: Iterable[str] = (),
+               terms: dict[str, float] = None,
+               min_score: float = None) -> None:
+    """Initializes the filter, compiling all of its patterns.
+
+    Args:
+      include:   Keywords a result must mention, any one of them.
+      exclude:   Keywords a result must not mention.
+      jobtitle:  Regular expression the job title must match (searched, case
+                 insensitive, `^` and `$` anchor to the value).
+      location:  Regular expression the location must match (same as
+                 `jobtitle`).
+      distances: Network distances to keep, e.g. `DISTANCE_2`.
+      terms:     Keywords scoring the results, mapped to their weight.
+      min_score: Minimum score of the kept results.
+
+    Raises:
+      re.error: If `jobtitle` or `location` is not a valid regular expression.
+    """
+    include = [keyword.lower() for keyword in include if keyword]
+    exclude = [keyword.lower() for keyword in exclude if keyword]
+    weights_ = {keyword: 1.0 for keyword in include}
+    weights_.update({
+        keyword.lower(): weight
+        for keyword, weight in (terms or {}).items()
+        if keyword
+    })
+
+    self._keywords = sorted({*include, *exclude, *weights_})
+    # One pattern per keyword, since the matches of a single alternation
+    # cannot overlap and a keyword would hide the ones nested in it. Matched
+    # against lower case text, as case insensitive matching is much slower.
+    # Lookarounds rather than `\b`, which needs a word character on the inner
+    # side and never matches around keywords such as "c++".
+    self._keyword_patterns = [
+        re.compile(rf'(?<!\w){re.escape(keyword)}(?!\w)')
+        for keyword in self._keywords
+    ]
+    index_ = {keyword: i for i, keyword in enumerate(self._keywords)}
+    self._include = frozenset(index_[keyword] for keyword in include)
+    self._exclude = frozenset(index_[keyword] for keyword in exclude)
+    self._weights = [weights_.get(keyword, 0.0) for keyword in self._keywords]
+
+    self._patterns = {
+        # Multi-line, so `^` and `$` anchor to every row of the joined column.
+        field: re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+        for field, pattern in (('jobtitle', jobtitle), ('location', location))
+        if pattern
+    }
+    self._distances = frozenset(distances)
+    self._min_score = min_score
+
+  def __bool__(self) -> bool:
+    return bool(self._keywords or self._patterns or self._distances or
+                self._min_score is not None)
+
+  def _keyword_hits(self, columns: dict[str, _Column]) -> set[tuple[int, int]]:
+    """Returns the distinct `(row, keyword index)` pairs of a page."""
+    return {(row, keyword)
+            for keyword, pattern in enumerate(self._keyword_patterns)
+            for field in TEXT_FIELDS
+            for row, _ in columns[field].iter_matches(pattern, lowered=True)}
+
+  def evaluate(self, page: list[dict]) -> tuple[object, object]:
+    """Returns the keep mask and the scores of the rows of a page."""
+    size_ = len(page)
+    columns_ = {
+        field: _Column(values) for field, values in to_columns(
+            page, {*TEXT_FIELDS, *self._patterns}).items()
+    }
+    mask_ = _Mask.full(size_, True)
+    scores_ = numpy.zeros(size_) if numpy is not None else [0.0] * size_
+
+    if self._keywords:
+      hits_ = self._keyword_hits(columns_)
+      if self._include:
+        mask_ = _Mask.from_rows(
+            size_, (row for row, keyword in hits_ if keyword in self._include))
+      if self._exclude:
+        mask_ = _Mask.and_not(
+            mask_,
+            _Mask.from_rows(
+                size_,
+                (row for row, keyword in hits_ if keyword in self._exclude)))
+      if numpy is not None and hits_:
+        rows_, keywords_ = numpy.array(list(hits_)).T
+        numpy.add.at(scores_, rows_, numpy.array(self._weights)[keywords_])
+      else:
+        for row, keyword in hits_:
+          scores_[row] += self._weights[keyword]
+
+    for field, pattern in self._patterns.items():
+      mask_ = _Mask.and_(
+          mask_, _Mask.from_rows(size_, columns_[field].matching_rows(pattern)))
+    if self._distances:
+      mask_ = _Mask.and_(
+          mask_,
+          _Mask.from_rows(size_,
+                          (row for row, person in enumerate(page)
+                           if person.get('distance') in self._distances)))
+    if self._min_score is not None:
+      mask_ = _Mask.and_(mask_,
+                         (scores_ >= self._min_score) if numpy is not None else
+                         [score >= self._min_score for score in scores_])
+    return mask_, scores_
+
+  def apply(self, page: list[dict]) -> list[dict]:
+    """Returns the kept results of a page, highest score first."""
+    if not page or not self:
+      return page
+    mask_, scores_ = self.evaluate(page)
+    kept_ = [row for row, keep in enumerate(mask_) if keep]
+    # Stable, so equally scored results keep the server order.
+    kept_.sort(key=lambda row: -scores_[row])
+    return [page[row] for row in kept_]
+
+  def iter_pages(self, pages: Iterable[list[dict]]) -> Iterator[list[dict]]:
+    """Applies the filter to a stream of pages, skipping emptied pages."""
+    for page in pages:
+      if page := self.apply(page):
+        yield page
@@ -0,0 +1,94 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rate scheduler to pace the requests sent to the Voyager API."""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import time
+import random
+import threading
+import collections
+
+
+class RateScheduler(object):
+  """Paces calls so that they respect a minimum spacing and an optional cap on
+  the number of calls in a rolling window.
+
+  An instance is a drop-in replacement for `linkedin_api.default_evade`: pass
+  it as the `evade` argument of `linkedin_api.LinkedIn` and every request goes
+  through the scheduler. Unlike `default_evade`, which always sleeps, the
+  scheduler only sleeps for whatever part of the spacing has not already
+  elapsed since the previous call (e.g., while the caller was busy parsing a
+  response or reading an input file).
+
+  The scheduler is thread safe, so a single instance can be shared by all the
+  workers sending requests on behalf of the same account.
+  """
+
+  def __init__(self,
+               *,
+               min_interval: float = 2.0,
+               jitter: float = 3.0,
+               max_calls: int = None,
+               period: float = 3600.0,
+               clock: Callable[[], float] = time.monotonic,
+               sleep: Callable[[float], None] = time.sleep) -> None:
+    """Initializes the scheduler.
+
+    Args:
+      min_interval: Minimum number of seconds between two calls.
+      jitter:       Upper bound of the random number of seconds added on top of
+                    `min_interval` for every call.
+      max_calls:    Maximum number of calls in any `period` seconds long
+                    window, `None` for no cap.
+      period:       Length of the rolling window in seconds.
+      clock:        Monotonic clock, overridable for testing.
+      sleep:        Sleep function, overridable for testing.
+    """
+    self.min_interval = min_interval
+    self.jitter = jitter
+    self.max_calls = max_calls
+    self.period = period
+
+    self._clock = clock
+    self._sleep = sleep
+    self._lock = threading.Lock()
+    self._last_call = None
+    # Only the last `max_calls` timestamps matter for the rolling window, so
+    # memory stays bounded no matter how long the scheduler lives.
+    self._calls = collections.deque(maxlen=max_calls or 1)
+
+  def delay(self) -> float:
+    """Returns the number of seconds the next call has to wait for."""
+    now_ = self._clock()
+    delay_ = 0.0
+    if self._last_call is not None:
+      delay_ = self._last_call + self.min_interval - now_
+    if self.max_calls and len(self._calls) == self.max_calls:
+      delay_ = max(delay_, self._calls[0] + self.period - now_)
+    return max(delay_, 0.0)
+
+  def __call__(self) -> None:
+    """Blocks until the next call is allowed and records it."""
+    with self._lock:
+      delay_ = self.delay()
+      if self.jitter:
+        delay_ += random.uniform(0, self.jitter)
+      if delay_ > 0:
+        self._sleep(delay_)
+      self._last_call = self._clock()
+      self._calls.append(self._last_call)
@@ -0,0 +1,176 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Request templates for the Voyager end-points.
+
+The static parts of a request (the encoded query string of a search, the
+serialized skeleton of a payload) are built once, and every request only
+encodes the fields that vary from one request to the next.
+"""
+
+from __future__ import annotations
+
+import re
+import json
+
+from urllib.parse import urlencode
+
+from api.utils import utils
+
+# Headers of the requests answered with normalized JSON. Shared by every
+# request, since requests never mutates the headers it is given.
+NORMALIZED_JSON_HEADERS = {
+    'accept': 'application/vnd.linkedin.normalized+json+2.1'
+}
+
+SEARCH_QUERY_CONTEXT = ('List('
+                        'spellCorrectionEnabled->true,'
+                        'relatedSearchesEnabled->true,'
+                        'kcardType->PROFILE|COMPANY'
+                        ')')
+
+
+class JsonTemplate(object):
+  """A JSON document serialized once with placeholders for its variable
+  fields.
+
+  The document is serialized with a sentinel string in place of every
+  variable field and split around the sentinels, so rendering only serializes
+  the values of the fields and joins the pieces. The rendered text is
+  identical to `json.dumps` of the filled in document.
+  """
+
+  def __init__(self, skeleton: dict, fields: tuple[str, ...]) -> None:
+    """Serializes the skeleton.
+
+    Args:
+      skeleton: Document whose variable fields hold the name of the field
+                between `{{` and `}}`, e.g. `{'message': '{{message}}'}`.
+      fields:   Names of the variable fields.
+
+    Raises:
+      ValueError: If a field is missing from the skeleton or appears in it
+        more than once.
+    """
+    self.fields = fields
+    pattern_ = '"{{(' + '|'.join(re.escape(field) for field in fields) + ')}}"'
+    pieces_ = re.split(pattern_, json.dumps(skeleton))
+    self._literals = pieces_[::2]
+    self._order = pieces_[1::2]
+    if sorted(self._order) != sorted(fields):
+      raise ValueError(f'Every field of {list(fields)} must appear once in the'
+                       f' skeleton, found {self._order}')
+
+  def render(self, **values) -> str:
+    """Returns the document serialized with the given field values."""
+    parts_ = [self._literals[0]]
+    for field, literal in zip(self._order, self._literals[1:]):
+      parts_.append(json.dumps(values[field]))
+      parts_.append(literal)
+    return ''.join(parts_)
+
+
+INVITATION_PAYLOAD = JsonTemplate(
+    {
+        'trackingId': '{{tracking_id}}',
+        'message': '{{message}}',
+        'invitations': [],
+        'excludeInvitations': [],
+        'invitee': {
+            'com.linkedin.voyager.growth.invitation.InviteeProfile': {
+                'profileId': '{{profile_urn}}'
+            }
+        }
+    }, ('tracking_id', 'message', 'profile_urn'))
+
+WITHDRAW_PAYLOAD = JsonTemplate(
+    {
+        'invitationId': '{{invitation_id}}',
+        'invitationSharedSecret': '{{shared_secret}}',
+        'isGenericInvitation': False
+    }, ('invitation_id', 'shared_secret'))
+
+UNFOLLOW_PAYLOAD = JsonTemplate({'urn': '{{urn}}'}, ('urn',))
+
+
+def invitation_payload(profile_urn: str, message: str = '') -> str:
+  """Returns the serialized payload of an invitation, with a fresh tracking
+  id.
+  """
+  return INVITATION_PAYLOAD.render(tracking_id=utils.generate_tracking_id(),
+                                   message=message,
+                                   profile_urn=profile_urn)
+
+
+class SearchQuery(object):
+  """The blended search URIs of a query, encoded once for all its pages.
+
+  Only `start` and `count` change from one page to the next, so the query
+  string is encoded once around them. The URIs are the same as encoding the
+  full parameters of every page, parameter order included.
+  """
+
+  PATH = '/search/blended'
+  # Parameters of every search, in the order they are sent; `start` and
+  # `count` take the place of their `None`.
+  DEFAULT_PARAMS = {
+      'count': None,
+      'filters': 'List()',
+      'origin': 'GLOBAL_SEARCH_HEADER',
+      'q': 'all',
+      'start': None,
+      'queryContext': SEARCH_QUERY_CONTEXT,
+  }
+  _SAFE = '(),'
+
+  def __init__(self, params: dict) -> None:
+    """Encodes the static part of the query.
+
+    Args:
+      params: Parameters of the search, overriding or adding to
+              `DEFAULT_PARAMS`; `start` and `count` are ignored.
+    """
+    self.params = params
+    self._static = {
+        key: value
+        for key, value in params.items()
+        if key not in ('start', 'count')
+    }
+    # Encodes the runs of static parameters between the variable ones; the
+    # encoded text holds no braces, so it is safe to use as a format string.
+    parts_ = []
+    run_ = {}
+    for key, value in {**SearchQuery.DEFAULT_PARAMS, **self._static}.items():
+      if value is not None:
+        run_[key] = value
+        continue
+      if run_:
+        parts_.append(urlencode(run_, safe=SearchQuery._SAFE))
+      parts_.append(f'{key}={{{key}}}')
+      run_ = {}
+    if run_:
+      parts_.append(urlencode(run_, safe=SearchQuery._SAFE))
+    self._uri_format = f"{SearchQuery.PATH}?{'&'.join(parts_)}"
+
+  def page_params(self, start: int, count: int) -> dict:
+    """Returns the full parameters of a page, e.g. to key a page cache."""
+    return {
+        **SearchQuery.DEFAULT_PARAMS, 'count': str(count),
+        'start': start,
+        **self._static
+    }
+
+  def uri(self, start: int, count: int) -> str:
+    """Returns the URI of the page of `count` results from `start`."""
+    return self._uri_format.format(start=start, count=count)
@@ -0,0 +1,114 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-query record of the search results surfaced by previous runs."""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+import os
+import struct
+import hashlib
+import pathlib
+import threading
+
+from api import settings
+from api.utils import utils
+
+
+class SeenSet(object):
+  """Compact on-disk set of the URN ids a search query has already returned.
+
+  Every URN id is stored as an 8 byte fingerprint (the head of its blake2b
+  digest) appended to a file named after the query key, so a million results
+  take 8MB on disk and loading the set is a single read. Collisions are
+  possible in principle, but with 64 bit fingerprints they are negligible for
+  the result set sizes LinkedIn serves.
+  """
+
+  _SUFFIX = '.seen'
+  _RECORD = struct.Struct('<Q')
+
+  def __init__(self, query_key: str, seen_dir: str = None) -> None:
+    """Initializes the set, loading the fingerprints recorded so far.
+
+    Args:
+      query_key: Key of the query, see `key()`.
+      seen_dir:  Directory to store the sets in. Defaults to `seen/` in
+                 `settings.INB_CACHE_DIR`.
+    """
+    if seen_dir is None:
+      seen_dir = settings.INB_CACHE_DIR / 'seen'
+    self.seen_dir = pathlib.Path(seen_dir)
+    if not os.path.exists(os.fspath(self.seen_dir)):
+      os.makedirs(os.fspath(self.seen_dir))
+
+    self.query_key = query_key
+    self._lock = threading.Lock()
+    self._path = self.seen_dir / f'{query_key}{SeenSet._SUFFIX}'
+    self._fingerprints = set()
+    if os.path.exists(os.fspath(self._path)):
+      with open(os.fspath(self._path), 'rb') as file:
+        data_ = file.read()
+      self._fingerprints.update(record[0]
+                                for record in SeenSet._RECORD.iter_unpack(
+                                    data_[:self._aligned(len(data_))]))
+    self._file = open(os.fspath(self._path), 'ab')  # pylint: disable=consider-using-with
+    # Drops a partial trailing record left by an interrupted write, so the
+    # records appended from now on stay aligned.
+    self._file.truncate(self._aligned(self._file.tell()))
+
+  @staticmethod
+  def key(params: dict) -> str:
+    """Returns the canonical key of the given search parameters."""
+    return utils.canonical_hash(params)
+
+  @staticmethod
+  def _aligned(size: int) -> int:
+    return size - size % SeenSet._RECORD.size
+
+  @staticmethod
+  def _fingerprint(urn_id: str) -> int:
+    return SeenSet._RECORD.unpack(
+        hashlib.blake2b(urn_id.encode('utf-8'),
+                        digest_size=SeenSet._RECORD.size).digest())[0]
+
+  def __contains__(self, urn_id: str) -> bool:
+    return SeenSet._fingerprint(urn_id) in self._fingerprints
+
+  def __len__(self) -> int:
+    return len(self._fingerprints)
+
+  def add_many(self, urn_ids: Iterable[str]) -> None:
+    """Records the given URN ids as seen."""
+    with self._lock:
+      new_ = []
+      for urn_id in urn_ids:
+        fingerprint_ = SeenSet._fingerprint(urn_id)
+        if fingerprint_ not in self._fingerprints:
+          self._fingerprints.add(fingerprint_)
+          new_.append(SeenSet._RECORD.pack(fingerprint_))
+      if new_:
+        self._file.write(b''.join(new_))
+        self._file.flush()
+
+  def clear(self) -> None:
+    """Forgets every URN id recorded for the query."""
+    with self._lock:
+      self._fingerprints.clear()
+      self._file.truncate(0)
+
+  def close(self) -> None:
+    self._file.close()
@@ -21,6 +21,8 @@ USER_HOME_DIR = pathlib.Path.home()
 INB_USER_DIR = USER_HOME_DIR / '.inb/'
 INB_COOKIE_DIR = INB_USER_DIR / 'cookies/'
 INB_LOG_DIR = INB_USER_DIR / 'logs'
+INB_CACHE_DIR = INB_USER_DIR / 'cache/'
+INB_CHECKPOINT_DIR = INB_USER_DIR / 'checkpoints/'
 
 # Variable's value decides whether logging to stream is allowed
 # in the entire project.
@@ -38,6 +40,25 @@ if not os.path.exists(INB_COOKIE_DIR):
 if not os.path.exists(INB_LOG_DIR):
   os.makedirs(INB_LOG_DIR)
 
+# Cassette recording or replaying the HTTP traffic of the Voyager sessions,
+# and whether to record or replay it (see `api.cassette`).
+INB_CASSETTE = os.environ.get('INB_CASSETTE')
+INB_CASSETTE_MODE = os.environ.get('INB_CASSETTE_MODE', 'replay')
+
+# File the trace of the run is written to, a HAR file (`.har`) or a Chrome
+# trace-event file (`.json`), see `api.trace`.
+INB_TRACE = os.environ.get('INB_TRACE')
+
+# Seconds before the session cookies expire at which a client with the
+# account credentials logs in again in the background.
+INB_COOKIE_REFRESH_MARGIN = float(
+    os.environ.get('INB_COOKIE_REFRESH_MARGIN', 6 * 3600))
+
+# Bytes of results the list-returning searches keep in memory before spilling
+# them to a temporary file (see `api.spillbuffer`).
+INB_SPILL_MEMORY_BYTES = int(
+    os.environ.get('INB_SPILL_MEMORY_BYTES', 32 * 1024 * 1024))
+
 LOG_FORMAT_STR = (
     '%(asctime)s:%(name)s:%(levelname)s:%(funcName)s\n%(message)s')
 
@@ -0,0 +1,192 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Result buffers bounded in memory, spilling to disk once they grow."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator
+
+import os
+import json
+import array
+import weakref
+import tempfile
+
+from collections import abc
+
+_SEPARATORS = (',', ':')
+
+
+def _remove(file, path: str) -> None:
+  file.close()
+  try:
+    os.remove(path)
+  except FileNotFoundError:
+    pass
+
+
+class SpillBuffer(abc.Sequence):
+  """Append-only sequence of JSON serializable items, kept in memory up to a
+  byte budget and in a temporary file past it.
+
+  The budget is measured on the compact JSON of the items, estimated from the
+  first item of every batch until half of it is used; the Python objects take
+  a few times more. Once it is exceeded, all the items move to an
+  append-only JSON lines file and so do the items appended later, so memory
+  only grows by the 8 byte offset kept per item to index the file. Iterating
+  and indexing work the same either way, except that items read back from the
+  file are fresh copies: changing them leaves the buffer untouched.
+
+  The file is removed by `close()`, or when the buffer is garbage collected.
+  """
+
+  def __init__(self,
+               memory_bytes: int | None,
+               *,
+               directory: str | os.PathLike = None) -> None:
+    """Initializes an empty buffer.
+
+    Args:
+      memory_bytes: Bytes of items to keep in memory before spilling, `None`
+                    to never spill.
+      directory:    Directory of the spill file. Defaults to the temporary
+                    directory of the system.
+    """
+    self.memory_bytes = memory_bytes
+    self.directory = directory
+    self._memory = []
+    self._memory_size = 0
+    self._path = None
+    self._file = None
+    self._dirty = False
+    self._offsets = array.array('q')
+    self._end = 0
+    self._finalizer = None
+
+  @property
+  def spilled(self) -> bool:
+    """Whether the items are held in the spill file."""
+    return self._file is not None
+
+  def _spill(self) -> None:
+    fd_, self._path = tempfile.mkstemp(prefix='inb-spill-',
+                                       suffix='.jsonl',
+                                       dir=self.directory)
+    self._file = os.fdopen(fd_, 'wb')
+    self._finalizer = weakref.finalize(self, _remove, self._file, self._path)
+    memory_, self._memory, self._memory_size = self._memory, [], 0
+    self._write(memory_)
+
+  def _write(self, items: Iterable[Any]) -> None:
+    for item in items:
+      line_ = json.dumps(item, separators=_SEPARATORS).encode('utf-8') + b'\n'
+      self._offsets.append(self._end)
+      self._file.write(line_)
+      self._end += len(line_)
+    self._dirty = True
+
+  def append(self, item: Any) -> None:
+    self.extend((item,))
+
+  def extend(self, items: Iterable[Any]) -> None:
+    """Appends `items`, spilling the buffer if they exceed its budget."""
+    if self._file is not None:
+      self._write(items)
+      return
+    items = list(items)
+    if not items:
+      return
+    self._memory.extend(items)
+    if self.memory_bytes is None:
+      return
+    # Far from the budget, the size of a batch is extrapolated from its first
+    # item, since the items of a batch (e.g. a search page) share their shape
+    # and serializing all of them costs about as much as collecting them.
+    size_ = len(json.dumps(items[0], separators=_SEPARATORS)) * len(items)
+    if self._memory_size + size_ > self.memory_bytes // 2:
+      size_ = len(json.dumps(items, separators=_SEPARATORS))
+    self._memory_size += size_
+    if self._memory_size > self.memory_bytes:
+      self._spill()
+
+  def _flush(self) -> None:
+    if self._dirty:
+      self._file.flush()
+      self._dirty = False
+
+  def __len__(self) -> int:
+    return len(self._offsets) if self._file is not None else len(self._memory)
+
+  def __getitem__(self, index: int | slice) -> Any:
+    if isinstance(index, slice):
+      return [self[i] for i in range(*index.indices(len(self)))]
+    if self._file is None:
+      return self._memory[index]
+    if index < 0:
+      index += len(self._offsets)
+    if not 0 <= index < len(self._offsets):
+      raise IndexError('SpillBuffer index out of range')
+    self._flush()
+    with open(self._path, 'rb') as file_:
+      file_.seek(self._offsets[index])
+      return json.loads(file_.readline())
+
+  def __iter__(self) -> Iterator[Any]:
+    # Iterates by position, so items appended while iterating are visited,
+    # like a list would, even if the buffer spills in the meantime.
+    index_ = 0
+    reader_ = None
+    try:
+      while index_ < len(self):
+        if self._file is None:
+          yield self._memory[index_]
+        else:
+          self._flush()
+          if reader_ is None:
+            reader_ = open(self._path, 'rb')  # pylint: disable=consider-using-with
+            reader_.seek(self._offsets[index_])
+          yield json.loads(reader_.readline())
+        index_ += 1
+    finally:
+      if reader_ is not None:
+        reader_.close()
+
+  def __eq__(self, other: object) -> bool:
+    if not isinstance(other, abc.Sequence) or isinstance(other, (str, bytes)):
+      return NotImplemented
+    return len(self) == len(other) and all(
+        mine == theirs for mine, theirs in zip(self, other))
+
+  __hash__ = None
+
+  def __repr__(self) -> str:
+    return (f'{type(self).__name__}(len={len(self)},'
+            f' spilled={self.spilled})')
+
+  def close(self) -> None:
+    """Drops the items and removes the spill file."""
+    if self._finalizer is not None:
+      self._finalizer()
+    self._memory = []
+    self._memory_size = 0
+    self._file = None
+    self._offsets = array.array('q')
+    self._end = 0
+
+  def __enter__(self) -> SpillBuffer:
+    return self
+
+  def __exit__(self, *exc_info) -> None:
+    self.close()
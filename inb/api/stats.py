@@ -0,0 +1,63 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Run statistics shared across the API package."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import threading
+
+
+class Stats(object):
+  """Thread safe registry of named counters and values.
+
+  Counters are incremented with `incr()`, gauges (e.g. a breaker state) are
+  overwritten with `set()` and `snapshot()` returns a consistent copy of
+  everything recorded so far.
+  """
+
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self._values = {}
+
+  def incr(self, name: str, value: int | float = 1) -> None:
+    """Increments the counter `name` by `value`."""
+    with self._lock:
+      self._values[name] = self._values.get(name, 0) + value
+
+  def set(self, name: str, value: Any) -> None:
+    """Sets `name` to `value`."""
+    with self._lock:
+      self._values[name] = value
+
+  def get(self, name: str, default: Any = 0) -> Any:
+    """Returns the value of `name` or `default`."""
+    with self._lock:
+      return self._values.get(name, default)
+
+  def snapshot(self) -> dict:
+    """Returns a copy of all the values sorted by name."""
+    with self._lock:
+      return dict(sorted(self._values.items()))
+
+  def reset(self) -> None:
+    """Forgets every value."""
+    with self._lock:
+      self._values.clear()
+
+
+# Process wide statistics.
+STATS = Stats()
@@ -0,0 +1,169 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming reader for invitation target files.
+
+A target file lists the profiles to invite, either as CSV (with a header line)
+or as JSONL. Every target needs a `public_id` and may carry a `urn_id`, which
+spares a lookup when sending the invitation. Full URNs (e.g.,
+`urn:li:fs_miniProfile:ACoAAB...`) are accepted for `urn_id` as well.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import os
+import csv
+import json
+import pathlib
+
+from api import checkpoint
+from api.utils import utils
+
+# Column names accepted for every target field, in order of preference.
+_FIELD_ALIASES = {
+    'public_id': ('public_id', 'publicIdentifier', 'public_identifier'),
+    'urn_id': ('urn_id', 'urn', 'profile_urn', 'targetUrn'),
+    'name': ('name',),
+    'jobtitle': ('jobtitle', 'occupation', 'headline'),
+    'location': ('location',),
+}
+
+_TARGET_FORMAT_BY_SUFFIX = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+FORMATS = ('csv', 'jsonl')
+
+
+def _normalize_target(record: dict) -> dict:
+  """Maps the aliased columns of a raw record to the target fields."""
+  target_ = {}
+  for field, aliases in _FIELD_ALIASES.items():
+    value_ = next((record[alias] for alias in aliases if record.get(alias)),
+                  None)
+    target_[field] = str(value_) if value_ else None
+  if target_['urn_id'] and target_['urn_id'].startswith('urn:'):
+    target_['urn_id'] = utils.get_id_from_urn(target_['urn_id'])
+  return target_
+
+
+def resolve_format(path: str | os.PathLike, format_: str = None) -> str:
+  """Returns the format of the given target file.
+
+  Args:
+    path:    Path of the target file.
+    format_: One of `FORMATS`, inferred from the suffix of `path` when not
+             given.
+
+  Raises:
+    ValueError: If the format is unknown or cannot be inferred.
+  """
+  if format_ is None:
+    format_ = _TARGET_FORMAT_BY_SUFFIX.get(pathlib.Path(path).suffix.lower())
+  if format_ not in FORMATS:
+    raise ValueError(f'Cannot read targets from "{os.fspath(path)}" with'
+                     f' format "{format_}", expected one of {list(FORMATS)}')
+  return format_
+
+
+def iter_targets(path: str | os.PathLike,
+                 format_: str = None,
+                 offset: int = 0) -> Iterator[tuple[int, dict]]:
+  """Streams the targets from the given file.
+
+  The file is read line by line, so memory usage does not depend on its size.
+  Every target is yielded together with the byte offset right past its record
+  (quoted CSV values may span lines); passing that offset back in resumes
+  reading after the target.
+
+  Args:
+    path:    Path of the target file.
+    format_: One of `FORMATS`, inferred from the suffix of `path` when not
+             given.
+    offset:  Byte offset to resume reading from.
+
+  Yields:
+    `(next_offset, target)` pairs, where `target` is a dictionary with the
+    keys `public_id`, `urn_id`, `name`, `jobtitle` and `location`. Rows
+    without a public id or URN id are skipped.
+
+  Raises:
+    ValueError: If the format is unknown or cannot be inferred.
+  """
+  format_ = resolve_format(path, format_)
+
+  # The file is opened in binary mode since text mode files do not support
+  # `tell()` while iterating. Lines are read lazily, so the position of the
+  # file is right past a record when it is yielded, even for CSV records
+  # spanning several lines.
+  with open(path, 'rb') as target_file:
+    lines_ = (
+        line.decode('utf-8-sig') for line in iter(target_file.readline, b''))
+    if format_ == 'csv':
+      reader_ = csv.reader(lines_)
+      header_ = next(reader_, None)
+      if header_ is None:
+        return
+      records_ = (dict(zip(header_, row))
+                  for row in reader_
+                  if any(value.strip() for value in row))
+    else:
+      records_ = (json.loads(line) for line in lines_ if line.strip())
+    if offset:
+      target_file.seek(offset)
+
+    for record in records_:
+      target_ = _normalize_target(record)
+      if target_['public_id'] or target_['urn_id']:
+        yield target_file.tell(), target_
+
+
+def iter_targets_with_checkpoint(path: str | os.PathLike,
+                                 checkpoint_: checkpoint.Checkpoint,
+                                 *,
+                                 format_: str = None,
+                                 every: int = 25) -> Iterator[dict]:
+  """Streams the targets from the given file, resuming from and saving the
+  progress to `checkpoint_`.
+
+  A target counts as processed once the consumer asks for the next one, so a
+  consumer that stops iterating (or crashes) while handling a target will see
+  that target again on the next run. The progress is saved every `every`
+  processed targets and when the iteration ends for any reason.
+
+  Args:
+    path:        Path of the target file.
+    checkpoint_: Checkpoint holding the byte offset to resume from.
+    format_:     One of `FORMATS`, inferred from the suffix of `path` when not
+                 given.
+    every:       Number of processed targets between two saves.
+
+  Yields:
+    Targets as yielded by `iter_targets`.
+  """
+  offset_ = checkpoint_.load().get('offset', 0)
+  processed_ = 0
+  try:
+    for next_offset, target in iter_targets(path, format_, offset_):
+      yield target
+      offset_ = next_offset
+      processed_ += 1
+      if processed_ % every == 0:
+        checkpoint_.save({'offset': offset_})
+  finally:
+    checkpoint_.save({'offset': offset_})
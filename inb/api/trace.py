@@ -0,0 +1,536 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Trace of a run: the timings of every request and the spans of the work
+around them.
+
+Tracing is opt-in: `INB_TRACE=run.har` writes a HAR 1.2 file and
+`INB_TRACE=run.json` a Chrome trace-event file when the process exits, e.g.:
+
+  INB_TRACE=run.json ./inb/inb.py search ...
+
+Every request gets its DNS, connect, TLS, wait and receive times; the spans
+(evade sleeps, normalization, console rendering) are events of the Chrome
+trace, and are kept under `log._spans` in a HAR file, where viewers ignore
+them. Credentials never reach the file: cookie values and the authentication
+headers are redacted, and bodies are only recorded by size.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import os
+import json
+import time
+import socket
+import atexit
+import pathlib
+import datetime
+import requests
+import threading
+import contextlib
+
+from requests import adapters
+from urllib3 import (connection as urllib3_connection, connectionpool,
+                     exceptions as urllib3_exceptions)
+from urllib3.util import connection as urllib3_connection_util
+
+import api
+
+FORMAT_HAR = 'har'
+FORMAT_CHROME = 'chrome'
+_FORMAT_BY_SUFFIX = {'.har': FORMAT_HAR, '.json': FORMAT_CHROME}
+
+REDACTED = '[redacted]'
+# Headers whose values are credentials; cookies are recorded by name only.
+REDACTED_HEADERS = frozenset(('authorization', 'cookie', 'csrf-token',
+                              'proxy-authorization', 'set-cookie'))
+
+# Connection timings of the request being sent by the current thread, filled
+# in by the timed connections.
+_local = threading.local()
+
+
+class _TimedConnectionMixin(object):
+  """Times the name resolution, TCP connection and TLS handshake of the
+  connections opened while a traced request is sent.
+  """
+
+  _TLS = False
+
+  def _new_conn(self) -> socket.socket:
+    timings_ = getattr(_local, 'timings', None)
+    host_ = getattr(self, '_dns_host', None)
+    if timings_ is None or host_ is None:
+      return super()._new_conn()
+    started_ = time.perf_counter()
+    try:
+      # Resolves the host ahead of urllib3, which would time the lookup and
+      # the connection as one.
+      addresses_ = dict.fromkeys(info[4][0] for info in socket.getaddrinfo(
+          host_, self.port, urllib3_connection_util.allowed_gai_family(),
+          socket.SOCK_STREAM))
+    except OSError:
+      # Lets urllib3 raise its own resolution error.
+      return super()._new_conn()
+    resolved_ = time.perf_counter()
+    timings_['dns'] = resolved_ - started_
+    error_ = None
+    try:
+      # Tries every address in turn, as urllib3 does.
+      for address in addresses_:
+        self._dns_host = address
+        try:
+          return super()._new_conn()
+        except (urllib3_exceptions.NewConnectionError,
+                urllib3_exceptions.ConnectTimeoutError) as exc:
+          error_ = exc
+      if error_ is None:
+        # Nothing resolved; leaves the lookup to urllib3.
+        self._dns_host = host_
+        return super()._new_conn()
+      raise error_
+    finally:
+      self._dns_host = host_
+      timings_['connect'] = time.perf_counter() - resolved_
+
+  def connect(self) -> None:
+    started_ = time.perf_counter()
+    super().connect()
+    timings_ = getattr(_local, 'timings', None)
+    if timings_ is not None and self._TLS:
+      timings_['ssl'] = (time.perf_counter() - started_ -
+                         timings_.get('dns', 0.0) -
+                         timings_.get('connect', 0.0))
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin,
+                           urllib3_connection.HTTPConnection):
+  pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin,
+                            urllib3_connection.HTTPSConnection):
+  _TLS = True
+
+
+class _TimedHTTPConnectionPool(connectionpool.HTTPConnectionPool):
+  ConnectionCls = _TimedHTTPConnection  # pylint: disable=invalid-name
+
+
+class _TimedHTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+  ConnectionCls = _TimedHTTPSConnection  # pylint: disable=invalid-name
+
+
+def _redacted_headers(headers) -> list[dict]:
+  return [{
+      'name': name,
+      'value': REDACTED if name.lower() in REDACTED_HEADERS else value
+  } for name, value in headers.items()]
+
+
+def _cookie_names(header: str | None, *, set_cookie: bool) -> list[dict]:
+  if not header:
+    return []
+  if set_cookie:
+    # Merged `Set-Cookie` headers are comma separated, attributes included.
+    names_ = [
+        part.split('=', 1)[0].strip()
+        for part in header.split(',')
+        if '=' in part.split(';', 1)[0]
+    ]
+  else:
+    names_ = [part.split('=', 1)[0].strip() for part in header.split(';')]
+  return [{'name': name, 'value': REDACTED} for name in names_ if name]
+
+
+def _ms(seconds: float | None) -> float:
+  return -1 if seconds is None else round(seconds * 1e3, 3)
+
+
+def _iso(timestamp: float) -> str:
+  return datetime.datetime.fromtimestamp(timestamp,
+                                         datetime.timezone.utc).isoformat()
+
+
+def _har_request(request: requests.PreparedRequest) -> dict:
+  body_ = request.body or b''
+  har_request_ = {
+      'method': request.method,
+      'url': request.url,
+      'httpVersion': 'HTTP/1.1',
+      'cookies': _cookie_names(request.headers.get('cookie'), set_cookie=False),
+      'headers': _redacted_headers(request.headers),
+      'queryString': [],
+      'headersSize': -1,
+      'bodySize': len(body_),
+  }
+  if body_:
+    har_request_['postData'] = {
+        'mimeType': request.headers.get('content-type', ''),
+        'text': REDACTED,
+    }
+  return har_request_
+
+
+def _har_response(response: requests.Response, timings: dict) -> dict:
+  version_ = getattr(response.raw, 'version', None) or 11
+  headers_ = response.headers
+  content_ = {
+      # Streamed bodies are left unread, so their size is unknown and left
+      # at 0, as HAR has no marker for an unknown content size.
+      'size': timings.get('decoded_bytes', 0),
+      'mimeType': headers_.get('content-type', ''),
+  }
+  return {
+      'status': response.status_code,
+      'statusText': response.reason or '',
+      'httpVersion': f'HTTP/{version_ // 10}.{version_ % 10}',
+      'cookies': _cookie_names(headers_.get('set-cookie'), set_cookie=True),
+      'headers': _redacted_headers(headers_),
+      'content': content_,
+      'redirectURL': headers_.get('location', ''),
+      'headersSize': -1,
+      'bodySize': timings.get('wire_bytes', -1),
+  }
+
+
+def _har_error(error: str) -> dict:
+  return {
+      'status': 0,
+      'statusText': '',
+      'httpVersion': '',
+      'cookies': [],
+      'headers': [],
+      'content': {
+          'size': 0,
+          'mimeType': ''
+      },
+      'redirectURL': '',
+      'headersSize': -1,
+      'bodySize': -1,
+      '_error': error,
+  }
+
+
+class Tracer(object):
+  """Collects the requests and spans of a run and writes them to a file.
+
+  The tracer is thread safe; every event is recorded with the thread it ran
+  on, so the workers of a daemon show up as separate tracks.
+  """
+
+  def __init__(self, path: str | os.PathLike) -> None:
+    """Initializes the tracer.
+
+    Args:
+      path: Output file, a HAR file if its suffix is `.har` or a Chrome
+            trace-event file if it is `.json`.
+
+    Raises:
+      ValueError: If the format can't be inferred from the suffix.
+    """
+    self.path = pathlib.Path(path)
+    self.format = _FORMAT_BY_SUFFIX.get(self.path.suffix.lower())
+    if self.format is None:
+      raise ValueError(f'Cannot trace to "{os.fspath(path)}", expected one of'
+                       f' the suffixes {list(_FORMAT_BY_SUFFIX)}')
+    self._lock = threading.Lock()
+    self._entries = []
+    self._spans = []
+    self._wall_start = time.time()
+    self._perf_start = time.perf_counter()
+
+  def _wall(self, perf: float) -> float:
+    return self._wall_start + perf - self._perf_start
+
+  def add_span(self, name: str, category: str, started: float, ended: float,
+               args: dict) -> None:
+    """Records a span between two `time.perf_counter()` readings."""
+    with self._lock:
+      self._spans.append({
+          'name': name,
+          'category': category,
+          'started': started,
+          'ended': ended,
+          'thread': threading.get_ident(),
+          'args': args,
+      })
+
+  def add_request(self, request: requests.PreparedRequest,
+                  response: requests.Response | None, error: str | None,
+                  started: float, timings: dict) -> None:
+    """Records a request sent at the `time.perf_counter()` reading `started`,
+    along with its timings in seconds.
+
+    Only the redacted HAR request and response are kept, not the bodies, so
+    a long run does not hold every response in memory.
+    """
+    entry_ = {
+        'request': _har_request(request),
+        'response': (_har_response(response, timings)
+                     if response is not None else _har_error(error)),
+        'method': request.method,
+        'path': request.path_url.split('?', 1)[0],
+        'started': started,
+        'thread': threading.get_ident(),
+        'timings': timings,
+    }
+    with self._lock:
+      self._entries.append(entry_)
+
+  def _har_entry(self, entry: dict) -> dict:
+    timings_ = {
+        'blocked': -1,
+        'dns': _ms(entry['timings'].get('dns')),
+        'connect': _ms(entry['timings'].get('connect')),
+        'ssl': _ms(entry['timings'].get('ssl')),
+        'send': 0,
+        'wait': _ms(entry['timings'].get('wait')),
+        'receive': _ms(entry['timings'].get('receive')),
+    }
+    # Connect includes the TLS handshake in HAR.
+    if timings_['ssl'] != -1:
+      timings_['connect'] = round(timings_['connect'] + timings_['ssl'], 3)
+    time_ = sum(value for name, value in timings_.items()
+                if name != 'ssl' and value != -1)
+    return {
+        'pageref': 'run',
+        'startedDateTime': _iso(self._wall(entry['started'])),
+        'time': round(time_, 3),
+        'request': entry['request'],
+        'response': entry['response'],
+        'cache': {},
+        'timings': timings_,
+    }
+
+  def har(self) -> dict:
+    """Returns the trace as a HAR 1.2 document."""
+    with self._lock:
+      entries_, spans_ = list(self._entries), list(self._spans)
+    spans_ = [{
+        'name': span_record['name'],
+        'category': span_record['category'],
+        'startedDateTime': _iso(self._wall(span_record['started'])),
+        'time': _ms(span_record['ended'] - span_record['started']),
+        'args': span_record['args'],
+    } for span_record in spans_]
+    page_ = {
+        'startedDateTime': _iso(self._wall_start),
+        'id': 'run',
+        'title': 'inb run',
+        'pageTimings': {},
+    }
+    return {
+        'log': {
+            'version': '1.2',
+            'creator': {
+                'name': 'inb',
+                'version': api.__version__
+            },
+            'pages': [page_],
+            'entries': [self._har_entry(entry) for entry in entries_],
+            '_spans': spans_,
+        }
+    }
+
+  def _us(self, perf: float) -> float:
+    return round((perf - self._perf_start) * 1e6, 1)
+
+  def chrome_trace(self) -> dict:
+    """Returns the trace as a Chrome trace-event document, with a complete
+    event per request, per request phase and per span.
+    """
+    with self._lock:
+      entries_, spans_ = list(self._entries), list(self._spans)
+    pid_ = os.getpid()
+    events_ = []
+    for entry in entries_:
+      timings_ = entry['timings']
+      phases_ = [(name, timings_.get(name))
+                 for name in ('dns', 'connect', 'ssl', 'wait', 'receive')]
+      total_ = sum(seconds for _, seconds in phases_ if seconds is not None)
+      response_ = entry['response']
+      events_.append({
+          'name': f'{entry["method"]} {entry["path"]}',
+          'cat': 'request',
+          'ph': 'X',
+          'ts': self._us(entry['started']),
+          'dur': round(total_ * 1e6, 1),
+          'pid': pid_,
+          'tid': entry['thread'],
+          'args': {
+              'url': entry['request']['url'],
+              'status': response_['status'] or response_.get('_error'),
+          },
+      })
+      offset_ = entry['started']
+      for name, seconds in phases_:
+        if seconds is None:
+          continue
+        events_.append({
+            'name': name,
+            'cat': 'request.phase',
+            'ph': 'X',
+            'ts': self._us(offset_),
+            'dur': round(seconds * 1e6, 1),
+            'pid': pid_,
+            'tid': entry['thread'],
+        })
+        offset_ += seconds
+    for span_record in spans_:
+      events_.append({
+          'name':
+              span_record['name'],
+          'cat':
+              span_record['category'],
+          'ph':
+              'X',
+          'ts':
+              self._us(span_record['started']),
+          'dur':
+              round((span_record['ended'] - span_record['started']) * 1e6, 1),
+          'pid':
+              pid_,
+          'tid':
+              span_record['thread'],
+          'args':
+              span_record['args'],
+      })
+    return {'traceEvents': events_, 'displayTimeUnit': 'ms'}
+
+  def write(self) -> None:
+    """Writes the trace recorded so far to `path`."""
+    document_ = self.har() if self.format == FORMAT_HAR else self.chrome_trace()
+    tmp_path_ = self.path.with_name(f'{self.path.name}.tmp')
+    with open(tmp_path_, 'w', encoding='utf-8') as file_:
+      json.dump(document_, file_, default=str)
+    os.replace(tmp_path_, self.path)
+
+
+class TracingAdapter(adapters.BaseAdapter):
+  """Sends requests through `inner` and records them in a tracer.
+
+  Connection timings are only measured when `inner` is a
+  `requests.adapters.HTTPAdapter`, whose connection pools `install()` swaps
+  for timed ones; responses replayed from a cassette only get their wait and
+  receive times. The body of a streamed response (`stream=True`) is read by
+  the caller after `send()` returns, so it has no receive time and no size in
+  the trace, only the phases up to its headers.
+  """
+
+  def __init__(self, tracer: Tracer, inner: adapters.BaseAdapter) -> None:
+    super().__init__()
+    self.tracer = tracer
+    self.inner = inner
+
+  def send(self,
+           request: requests.PreparedRequest,
+           stream: bool = False,
+           timeout: float | tuple = None,
+           verify: bool | str = True,
+           cert: str | tuple = None,
+           proxies: dict = None) -> requests.Response:
+    timings_ = _local.timings = {}
+    started_ = time.perf_counter()
+    try:
+      response_ = self.inner.send(request,
+                                  stream=stream,
+                                  timeout=timeout,
+                                  verify=verify,
+                                  cert=cert,
+                                  proxies=proxies)
+      headers_at_ = time.perf_counter()
+      if not stream:
+        # Reads the body here, so its transfer is timed as the receive phase.
+        timings_['decoded_bytes'] = len(response_.content or b'')
+        tell_ = getattr(response_.raw, 'tell', None)
+        if callable(tell_):
+          timings_['wire_bytes'] = tell_()
+        timings_['receive'] = time.perf_counter() - headers_at_
+    except Exception as exc:
+      self.tracer.add_request(request, None, f'{type(exc).__name__}: {exc}',
+                              started_, timings_)
+      raise
+    finally:
+      _local.timings = None
+    timings_['wait'] = (headers_at_ - started_ - timings_.get('dns', 0.0) -
+                        timings_.get('connect', 0.0) - timings_.get('ssl', 0.0))
+    self.tracer.add_request(request, response_, None, started_, timings_)
+    return response_
+
+  def close(self) -> None:
+    self.inner.close()
+
+
+def install(session: requests.Session, tracer: Tracer) -> TracingAdapter:
+  """Traces every request of `session` with `tracer`.
+
+  Returns:
+    The mounted adapter.
+  """
+  inner_ = session.get_adapter('https://')
+  if isinstance(inner_, adapters.HTTPAdapter):
+    inner_.poolmanager.pool_classes_by_scheme = {
+        'http': _TimedHTTPConnectionPool,
+        'https': _TimedHTTPSConnectionPool,
+    }
+  adapter_ = TracingAdapter(tracer, inner_)
+  session.mount('https://', adapter_)
+  session.mount('http://', adapter_)
+  return adapter_
+
+
+# Tracer of the process, if tracing was started.
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def start(path: str | os.PathLike) -> Tracer:
+  """Starts tracing the process to `path`, written when the process exits.
+
+  Returns:
+    The tracer of the process; the one already started, if any.
+
+  Raises:
+    ValueError: If the format can't be inferred from the suffix of `path`.
+  """
+  global _tracer  # pylint: disable=global-statement
+  with _tracer_lock:
+    if _tracer is None:
+      _tracer = Tracer(path)
+      atexit.register(_tracer.write)
+    return _tracer
+
+
+def current() -> Tracer | None:
+  """Returns the tracer of the process, `None` if not tracing."""
+  return _tracer
+
+
+@contextlib.contextmanager
+def span(name: str, category: str = 'inb', **args) -> Iterator[None]:
+  """Records the enclosed block as a span of the process trace; a no-op when
+  not tracing.
+  """
+  tracer_ = _tracer
+  if tracer_ is None:
+    yield
+    return
+  started_ = time.perf_counter()
+  try:
+    yield
+  finally:
+    tracer_.add_span(name, category, started_, time.perf_counter(), args)
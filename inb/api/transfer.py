@@ -0,0 +1,137 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content encoding negotiation and per-endpoint transfer accounting.
+
+Responses are decoded by urllib3, which handles brotli when `brotli` (or
+`brotlicffi`) is installed and zstd when `zstandard` is installed (urllib3 2
+or later). `ACCEPT_ENCODING` offers the encodings it can decode, most compact
+first, so installing a decoder is all it takes to use it.
+"""
+
+from __future__ import annotations
+
+import re
+import requests
+
+from urllib.parse import urlsplit
+from urllib3 import response as urllib3_response
+
+from api import stats
+
+# Endpoints transfers are accounted to, matched in order against the path of
+# the request URL; the rest are accounted to `other`.
+ENDPOINTS = (
+    ('search', re.compile(r'/search/')),
+    ('profile_view', re.compile(r'/identity/profiles/[^/]+/profileView$')),
+    ('profile_actions',
+     re.compile(r'/identity/profiles/[^/]+/profileActions$')),
+    ('profiles', re.compile(r'/identity/profiles$')),
+    ('invitations', re.compile(r'/growth/normInvitations$')),
+    ('sent_invitations', re.compile(r'/relationships/sentInvitationViews')),
+    ('withdrawals', re.compile(r'/relationships/invitations/')),
+    ('connections', re.compile(r'/relationships/connections$')),
+    ('follows', re.compile(r'/feed/follows$')),
+)
+
+
+def decodable_encodings() -> tuple[str, ...]:
+  """Returns the content encodings urllib3 can decode, most compact first."""
+  encodings_ = []
+  if getattr(urllib3_response, 'HAS_ZSTD', False):
+    encodings_.append('zstd')
+  if getattr(urllib3_response, 'brotli', None) is not None:
+    encodings_.append('br')
+  return (*encodings_, 'gzip', 'deflate')
+
+
+ACCEPT_ENCODING = ', '.join(decodable_encodings())
+
+
+def endpoint(url: str) -> str:
+  """Returns the name of the endpoint `url` is accounted to."""
+  path_ = urlsplit(url).path
+  for name, pattern in ENDPOINTS:
+    if pattern.search(path_):
+      return name
+  return 'other'
+
+
+def wire_bytes(response: requests.Response) -> int:
+  """Returns the number of body bytes `response` took on the wire, before
+  decoding.
+
+  Falls back to the decoded length for responses that did not come from the
+  network, e.g. replayed ones.
+  """
+  tell_ = getattr(response.raw, 'tell', None)
+  if callable(tell_):
+    try:
+      return tell_()
+    except (OSError, ValueError):
+      pass
+  return len(response.content or b'')
+
+
+class TransferCounter(object):
+  """Response hook counting the wire and decoded bytes of every response.
+
+  The counts are kept in `stats_` as `transfer.<endpoint>.wire_bytes`,
+  `transfer.<endpoint>.decoded_bytes` and `transfer.<endpoint>.responses`.
+  Streamed responses are left alone, since counting them would consume their
+  body.
+  """
+
+  def __init__(self, stats_: stats.Stats = None) -> None:
+    self._stats = stats_ or stats.STATS
+
+  def __call__(self, response: requests.Response, *args,
+               **kwargs) -> requests.Response:
+    del args  # Unused.
+    if kwargs.get('stream'):
+      return response
+    decoded_ = len(response.content or b'')
+    prefix_ = f'transfer.{endpoint(response.url)}'
+    self._stats.incr(f'{prefix_}.wire_bytes', wire_bytes(response))
+    self._stats.incr(f'{prefix_}.decoded_bytes', decoded_)
+    self._stats.incr(f'{prefix_}.responses')
+    return response
+
+
+def install(session: requests.Session,
+            stats_: stats.Stats = None) -> TransferCounter:
+  """Negotiates the decodable content encodings and counts the transfers of
+  every response of `session`.
+
+  Returns:
+    The installed response hook.
+  """
+  session.headers['accept-encoding'] = ACCEPT_ENCODING
+  counter_ = TransferCounter(stats_)
+  session.hooks['response'].append(counter_)
+  return counter_
+
+
+def counters(stats_: stats.Stats = None) -> dict[str, dict[str, int]]:
+  """Returns the transfer counters recorded in `stats_`, keyed by endpoint
+  name.
+  """
+  counters_ = {}
+  for name, value in (stats_ or stats.STATS).snapshot().items():
+    kind_, rest_ = name.partition('.')[::2]
+    if kind_ != 'transfer':
+      continue
+    endpoint_, counter_ = rest_.rpartition('.')[::2]
+    counters_.setdefault(endpoint_, {})[counter_] = value
+  return counters_
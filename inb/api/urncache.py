@@ -0,0 +1,83 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent mapping of profile public ids to profile URN ids."""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+import os
+import pathlib
+import sqlite3
+import threading
+
+from api import settings
+
+
+class UrnCache(object):
+  """A SQLite backed cache of `public_id -> urn_id` pairs.
+
+  Resolving the URN id of a profile otherwise costs a `profileView` request
+  (plus an evade sleep) per profile. The cache lives on disk, so lookups stay
+  cheap and memory stays flat even with millions of entries.
+  """
+
+  _FILE_NAME = 'urns.sqlite3'
+
+  def __init__(self, cache_dir: str = None) -> None:
+    if cache_dir is None:
+      cache_dir = settings.INB_CACHE_DIR
+    self.cache_dir = pathlib.Path(cache_dir)
+    if not os.path.exists(os.fspath(self.cache_dir)):
+      os.makedirs(os.fspath(self.cache_dir))
+
+    self._lock = threading.Lock()
+    self._connection = sqlite3.connect(os.fspath(self.cache_dir /
+                                                 UrnCache._FILE_NAME),
+                                       check_same_thread=False)
+    self._connection.execute('CREATE TABLE IF NOT EXISTS urns ('
+                             ' public_id TEXT PRIMARY KEY,'
+                             ' urn_id TEXT NOT NULL'
+                             ')')
+    self._connection.commit()
+
+  def get(self, public_id: str) -> str | None:
+    """Returns the cached URN id for `public_id` or `None`."""
+    with self._lock:
+      row_ = self._connection.execute(
+          'SELECT urn_id FROM urns WHERE public_id = ?',
+          (public_id,)).fetchone()
+    return row_[0] if row_ else None
+
+  def put(self, public_id: str, urn_id: str) -> None:
+    """Caches the URN id of `public_id`."""
+    self.put_many(((public_id, urn_id),))
+
+  def put_many(self, pairs: Iterable[tuple[str, str]]) -> None:
+    """Caches the given `(public_id, urn_id)` pairs in a single transaction."""
+    with self._lock:
+      self._connection.executemany(
+          'INSERT OR REPLACE INTO urns (public_id, urn_id) VALUES (?, ?)',
+          ((public_id, urn_id)
+           for public_id, urn_id in pairs
+           if public_id and urn_id))
+      self._connection.commit()
+
+  def __len__(self) -> int:
+    with self._lock:
+      return self._connection.execute('SELECT COUNT(*) FROM urns').fetchone()[0]
+
+  def close(self) -> None:
+    self._connection.close()
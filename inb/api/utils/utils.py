@@ -14,8 +14,10 @@
 
 """Utility module for the LinkedIn API package."""
 
+import os
+import json
 import base64
-import random
+import hashlib
 
 
 def get_id_from_urn(urn: str) -> str:
@@ -27,9 +29,21 @@ def generate_tracking_id() -> str:
   """Generates a tracking id to attach to the payload being sent to the voyager
   endpoints.
 
+  The 16 random bytes come from `os.urandom` in a single call.
+
   Returns:
     Tracking id for a payload.
   """
-  return str(
-      base64.b64encode(bytearray([random.randrange(256) for _ in range(16)
-                                 ])))[2:-1]
+  return base64.b64encode(os.urandom(16)).decode('ascii')
+
+
+def canonical_hash(value: dict) -> str:
+  """Returns the SHA-256 hex digest of the canonical JSON of `value`, with
+  sorted keys and no whitespace, so equal dictionaries hash alike whatever
+  their key order. Values JSON can't encode are hashed by their `str()`.
+  """
+  canonical_ = json.dumps(value,
+                          sort_keys=True,
+                          separators=(',', ':'),
+                          default=str)
+  return hashlib.sha256(canonical_.encode('utf-8')).hexdigest()
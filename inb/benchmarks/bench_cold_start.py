@@ -0,0 +1,105 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cold-start time of inb from the source tree, from the zipapp built by
+`./manage.sh --zipapp` and from container images.
+
+The source tree runs with every package of the current environment, the
+zipapp with the interpreter alone (`-S`), as on a bare runner. Images are
+only timed when given, e.g. to compare the image built from the current
+Dockerfile with one built from requirements.txt:
+
+  cd inb
+  python -m benchmarks.bench_cold_start
+  python -m benchmarks.bench_cold_start --image inb:full --image inb:slim
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import shutil
+import pathlib
+import argparse
+import statistics
+import subprocess
+
+_ROOT = pathlib.Path(__file__).resolve().parents[2]
+_ARGS = ('--help',)
+
+
+def _time(command: list[str], runs: int) -> list[float]:
+  timings_ = []
+  for _ in range(runs):
+    started_ = time.perf_counter()
+    subprocess.run(command,
+                   check=True,
+                   stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL)
+    timings_.append(time.perf_counter() - started_)
+  return timings_
+
+
+def _image_size(image: str) -> int | None:
+  result_ = subprocess.run(
+      ['docker', 'image', 'inspect', '--format', '{{.Size}}', image],
+      capture_output=True,
+      text=True,
+      check=False)
+  return int(result_.stdout) if result_.returncode == 0 else None
+
+
+def _report(label: str, timings: list[float], size: int | None) -> None:
+  size_ = f'{size / 2**20:8.1f}MiB' if size is not None else f'{"-":>11}'
+  print(f'{label:<32} median {statistics.median(timings) * 1e3:7.1f}ms'
+        f'  min {min(timings) * 1e3:7.1f}ms  size {size_}')
+
+
+def main() -> None:
+  parser_ = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser_.add_argument('--runs', type=int, default=10)
+  parser_.add_argument('--pyz',
+                       type=pathlib.Path,
+                       default=_ROOT / 'dist' / 'inb.pyz')
+  parser_.add_argument('--image',
+                       action='append',
+                       default=[],
+                       help='Container image to time, may be repeated.')
+  args_ = parser_.parse_args()
+
+  print(f'inb {" ".join(_ARGS)}, {args_.runs} runs each')
+  # Warms up the bytecode cache of the source tree, as a second run would.
+  _time([sys.executable, str(_ROOT / 'inb' / 'inb.py'), *_ARGS], 1)
+  _report(
+      'source tree (full environment)',
+      _time([sys.executable,
+             str(_ROOT / 'inb' / 'inb.py'), *_ARGS], args_.runs), None)
+  if args_.pyz.exists():
+    _report('zipapp (bare interpreter)',
+            _time([sys.executable, '-S',
+                   str(args_.pyz), *_ARGS], args_.runs),
+            args_.pyz.stat().st_size)
+  else:
+    print(f'{args_.pyz} not found, build it with ./manage.sh --zipapp')
+  if args_.image and shutil.which('docker') is None:
+    print('docker not found, skipping the images')
+    return
+  for image in args_.image:
+    _report(f'image {image}',
+            _time(['docker', 'run', '--rm', image, *_ARGS], args_.runs),
+            _image_size(image))
+
+
+if __name__ == '__main__':
+  main()
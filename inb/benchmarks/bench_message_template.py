@@ -0,0 +1,63 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rendering throughput of a compiled invitation message template.
+
+  cd inb && python -m benchmarks.bench_message_template
+"""
+
+from __future__ import annotations
+
+import time
+import random
+
+from api import messagetemplate
+
+_MESSAGES = 20_000
+# Distinct names, as a search crawl repeats few of them.
+_NAMES = 5_000
+
+_FIRST = ('Jane', 'John', 'Dr. Ana', 'Mohammed', 'Li', 'Sofía', 'Pierre')
+_LAST = ('Doe', 'Smith Jr.', 'García', 'Wang', 'Müller', 'van der Berg')
+_TEMPLATE = ('Hi {first_name|there}, I came across your profile as a'
+             ' {jobtitle|professional} in {location|your area} and would love'
+             ' to connect and exchange notes on what you are working on.')
+
+
+def _people() -> list[dict]:
+  random_ = random.Random(0)
+  names_ = [
+      f'{random_.choice(_FIRST)} {i} {random_.choice(_LAST)}'
+      for i in range(_NAMES)
+  ]
+  return [{
+      'name': random_.choice(names_),
+      'jobtitle': 'Senior Python Engineer at Company ' * random_.randint(0, 6),
+      'location': random_.choice(('Berlin', 'Remote', None)),
+  } for _ in range(_MESSAGES)]
+
+
+def main() -> None:
+  people_ = _people()
+  started_ = time.perf_counter()
+  template_ = messagetemplate.MessageTemplate(_TEMPLATE)
+  longest_ = max(len(template_.render(person)) for person in people_)
+  elapsed_ = time.perf_counter() - started_
+  print(f'{_MESSAGES} messages, longest {longest_} characters'
+        f' (nameparser {"on" if messagetemplate.nameparser else "off"})')
+  print(f'render: {elapsed_:.3f}s ({_MESSAGES / elapsed_:,.0f} messages/s)')
+
+
+if __name__ == '__main__':
+  main()
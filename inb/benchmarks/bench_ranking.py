@@ -0,0 +1,114 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Throughput of the local result filter over a 100k result crawl.
+
+  cd inb && python -m benchmarks.bench_ranking
+"""
+
+from __future__ import annotations
+
+import re
+import time
+import random
+
+from api import ranking
+
+_RESULTS = 100_000
+_PAGE_SIZE = 49
+
+_TITLES = ('Senior Python Engineer', 'Recruiter', 'Junior Go Developer',
+           'Engineering Manager', 'Data Scientist | Python | SQL',
+           'Talent Acquisition')
+_LOCATIONS = ('Berlin', 'Munich', 'Hamburg', 'Remote', 'London')
+
+
+def _pages() -> list[list[dict]]:
+  random_ = random.Random(0)
+  people_ = [{
+      'public_id': f'person-{i}',
+      'jobtitle': f'{random_.choice(_TITLES)} at Company {i % 997}',
+      'location': random_.choice(_LOCATIONS),
+      'distance': random_.choice(('DISTANCE_2', 'DISTANCE_3')),
+  } for i in range(_RESULTS)]
+  return [
+      people_[start:start + _PAGE_SIZE]
+      for start in range(0, _RESULTS, _PAGE_SIZE)
+  ]
+
+
+_INCLUDE = ('python', 'go', 'engineer', 'developer', 'scientist')
+_EXCLUDE = ('recruiter', 'talent', 'junior')
+_TERMS = {
+    'senior': 2.0,
+    'lead': 2.0,
+    'staff': 2.0,
+    'principal': 2.0,
+    'manager': 1.0,
+    'sql': 0.5,
+    'data': 0.5,
+    'remote': 0.5,
+}
+_LOCATION = '^(berlin|remote)$'
+
+
+def _per_row(pages: list[list[dict]]) -> int:
+  """The same filter and ranking evaluated one result at a time."""
+
+  def compile_(keyword):
+    return re.compile(rf'\b{keyword}\b', re.IGNORECASE)
+
+  include_ = [compile_(keyword) for keyword in _INCLUDE]
+  exclude_ = [compile_(keyword) for keyword in _EXCLUDE]
+  location_ = re.compile(_LOCATION, re.IGNORECASE)
+  terms_ = [(pattern, 1.0) for pattern in include_]
+  terms_ += [(compile_(keyword), weight) for keyword, weight in _TERMS.items()]
+  kept_ = 0
+  for page in pages:
+    scored_ = []
+    for person in page:
+      text_ = f"{person['jobtitle']}\n{person['location']}"
+      if (any(pattern.search(text_) for pattern in include_) and
+          not any(pattern.search(text_) for pattern in exclude_) and
+          location_.search(person['location'])):
+        scored_.append((
+            -sum(weight for pattern, weight in terms_ if pattern.search(text_)),
+            person))
+    scored_.sort(key=lambda item: item[0])
+    kept_ += len(scored_)
+  return kept_
+
+
+def main() -> None:
+  pages_ = _pages()
+  page_filter_ = ranking.PageFilter(include=_INCLUDE,
+                                    exclude=_EXCLUDE,
+                                    location=_LOCATION,
+                                    terms=_TERMS)
+  started_ = time.perf_counter()
+  kept_ = sum(len(page) for page in page_filter_.iter_pages(pages_))
+  columnar_ = time.perf_counter() - started_
+
+  started_ = time.perf_counter()
+  assert _per_row(pages_) == kept_
+  per_row_ = time.perf_counter() - started_
+
+  print(f'{_RESULTS} results, {kept_} kept'
+        f' (numpy {"on" if ranking.numpy is not None else "off"})')
+  print(f'columnar: {columnar_:.3f}s ({_RESULTS / columnar_:,.0f} results/s)')
+  print(f'per row:  {per_row_:.3f}s ({_RESULTS / per_row_:,.0f} results/s)')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,77 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Client side cost of a people search replayed from a cassette.
+
+Replays a cassette recorded with `INB_CASSETTE_MODE=record ./inb/inb.py
+search --keyword KEYWORD ...` (or, without arguments, one recorded from the
+offline Voyager stand-in), so two releases can be compared on identical
+traffic:
+
+  cd inb && python -m benchmarks.bench_replay [CASSETTE KEYWORD]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import tempfile
+
+from api import cassette, linkedin_api
+from tests import voyager_stub
+
+_RUNS = 5
+
+
+def _linkedin() -> linkedin_api.LinkedIn:
+  return linkedin_api.LinkedIn('username',
+                               'password',
+                               authenticate=False,
+                               evade=lambda: None)
+
+
+def _record_stub(path: str, keyword: str) -> None:
+  linkedin_ = _linkedin()
+  linkedin_.client.session.mount('https://',
+                                 voyager_stub.VoyagerStub(5000).adapter())
+  recorder_ = cassette.mount(linkedin_.client.session, path,
+                             cassette.MODE_RECORD)
+  linkedin_.search_people(keywords=keyword)
+  recorder_.close()
+
+
+def main() -> None:
+  if len(sys.argv) == 3:
+    path_, keyword_ = sys.argv[1:]
+  else:
+    keyword_ = 'Software developer'
+    path_ = f'{tempfile.mkdtemp()}/stub.jsonl.gz'
+    _record_stub(path_, keyword_)
+
+  timings_ = []
+  for _ in range(_RUNS):
+    linkedin_ = _linkedin()
+    replayer_ = cassette.mount(linkedin_.client.session, path_)
+    started_ = time.perf_counter()
+    results_ = linkedin_.search_people(keywords=keyword_)
+    timings_.append(time.perf_counter() - started_)
+  best_ = min(timings_)
+  print(f'{len(results_)} results from {replayer_.replayed} responses'
+        f' ({len(replayer_)} left unreplayed)')
+  print(f'best of {_RUNS}: {best_:.3f}s'
+        f' ({len(results_) / best_:,.0f} results/s)')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,94 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-request CPU time of building Voyager requests from templates, against
+building every request from scratch as the client used to.
+
+  cd inb && python -m benchmarks.bench_request_builder
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import base64
+import random
+
+from urllib.parse import urlencode
+
+from api import requestbuilder
+
+_REQUESTS = 50_000
+_PARAMS = {
+    'filters': 'List(resultType->PEOPLE,network->F|S,geoUrn->103644278)',
+    'keywords': 'senior python engineer'
+}
+
+
+def _legacy_invitation(profile_urn: str, message: str) -> str:
+  tracking_id_ = str(
+      base64.b64encode(bytearray([random.randrange(256) for _ in range(16)
+                                 ])))[2:-1]
+  return json.dumps({
+      'trackingId': tracking_id_,
+      'message': message,
+      'invitations': [],
+      'excludeInvitations': [],
+      'invitee': {
+          'com.linkedin.voyager.growth.invitation.InviteeProfile': {
+              'profileId': profile_urn
+          }
+      }
+  })
+
+
+def _legacy_search_uri(start: int, count: int) -> str:
+  params_ = {
+      'count': str(count),
+      'filters': 'List()',
+      'origin': 'GLOBAL_SEARCH_HEADER',
+      'q': 'all',
+      'start': start,
+      'queryContext': requestbuilder.SEARCH_QUERY_CONTEXT,
+  }
+  params_.update(_PARAMS)
+  return f'/search/blended?{urlencode(params_, safe="(),")}'
+
+
+def _time(label: str, build) -> float:
+  started_ = time.process_time()
+  for i in range(_REQUESTS):
+    build(i)
+  per_request_ = (time.process_time() - started_) / _REQUESTS * 1e6
+  print(f'{label:<24} {per_request_:6.2f}µs/request')
+  return per_request_
+
+
+def main() -> None:
+  message_ = 'Hi Jane, I came across your profile and would love to connect.'
+  query_ = requestbuilder.SearchQuery(_PARAMS)
+  print(f'{_REQUESTS} requests of each kind')
+  for kind, legacy, templated in (
+      ('invitation', lambda i: _legacy_invitation(f'ACo{i}', message_),
+       lambda i: requestbuilder.invitation_payload(f'ACo{i}', message_)),
+      ('search page', lambda i: _legacy_search_uri(i, 49),
+       lambda i: query_.uri(i, 49)),
+  ):
+    before_ = _time(f'{kind} (legacy)', legacy)
+    after_ = _time(f'{kind} (template)', templated)
+    print(f'{kind}: {1 - after_ / before_:.0%} less CPU per request')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,78 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Requests per 1,000 search results, fixed versus adaptive page size.
+
+A fixed count fails outright on a server that rejects it, and shrinking
+alone settles on half the rejected count; growing back after a rejection
+recovers most of the gap to the actual limit.
+
+Runs against the offline Voyager stand-in, so it needs no account:
+
+  cd inb && python -m benchmarks.bench_search_pagination
+"""
+
+from __future__ import annotations
+
+from api import linkedin_api, pagesize
+from tests import voyager_stub
+
+_RESULTS = 1000
+
+# (server count limit, whether larger counts are capped instead of rejected)
+_SERVERS = ((49, False), (40, False), (30, False), (30, True))
+
+_MODES = ('fixed', 'shrink-only', 'adaptive')
+
+
+def requests_per_results(max_count: int, cap: bool, *, mode: str) -> int | None:
+  """Returns the number of requests a search of `_RESULTS` results takes in
+  `mode`, or None if the search does not get all of them.
+  """
+  stub = voyager_stub.VoyagerStub(_RESULTS,
+                                  max_count=max_count,
+                                  cap=cap,
+                                  latency=0.1)
+  linkedin = stub.linkedin()
+  count_ = linkedin_api.LinkedIn.MAX_SEARCH_COUNT
+  if mode == 'fixed':
+    linkedin._search_page_size = pagesize.AdaptivePageSize(  # pylint: disable=protected-access
+        initial=count_,
+        minimum=count_,
+        maximum=count_)
+  elif mode == 'shrink-only':
+    # No response is ever fast enough to grow the size.
+    linkedin._search_page_size = pagesize.AdaptivePageSize(  # pylint: disable=protected-access
+        initial=count_,
+        maximum=count_,
+        fast_response=-1)
+  if len(linkedin.search({})) < _RESULTS:
+    return None
+  return stub.requests
+
+
+def main() -> None:
+  print(f'{"server limit":>14}' + ''.join(f' {mode_:>11}' for mode_ in _MODES))
+  for max_count, cap in _SERVERS:
+    label_ = f'{max_count}{" (capped)" if cap else ""}'
+    requests_ = [
+        requests_per_results(max_count, cap, mode=mode_) for mode_ in _MODES
+    ]
+    print(f'{label_:>14}' +
+          ''.join(f' {"failed" if value_ is None else value_:>11}'
+                  for value_ in requests_))
+
+
+if __name__ == '__main__':
+  main()
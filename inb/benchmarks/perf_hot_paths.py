@@ -0,0 +1,122 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""pytest-benchmark suite over the pure-Python hot paths of inb.
+
+The file does not match the test file pattern, so the regular test run skips
+it; `python -m benchmarks.regress` runs it and compares the timings with the
+committed baselines.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from requests import cookies
+
+from api import cookierepo, linkedin_api, requestbuilder
+from api.invitation import status
+from api.utils import utils
+from tests import voyager_stub
+
+pytest.importorskip('pytest_benchmark')
+
+_PAGE_SIZE = 1000
+_SEARCH_RESULTS = 2000
+
+
+def _calibration() -> int:
+  """Fixed pure-Python workload timings are expressed relative to, which
+  makes baselines comparable across machines of different speed.
+  """
+  total_ = 0
+  words_ = {}
+  for i in range(5000):
+    word_ = f'word{i % 97}'
+    words_[word_] = words_.get(word_, 0) + i
+    total_ += len(word_.split('d'))
+  return total_ + len(words_)
+
+
+def test_calibration(benchmark):
+  assert benchmark(_calibration) > 0
+
+
+def test_fill_search_message_template(benchmark):
+  invitation = status.Invitation()
+  invitation.set_invitation_fields(name='Jane Doe',
+                                   occupation='Senior Python Engineer',
+                                   location='Berlin, Germany',
+                                   profileid='jane-doe',
+                                   profileurl='https://linkedin.com/in/jane',
+                                   status='sent',
+                                   elapsed_time=12.345678)
+  assert 'Jane Doe' in benchmark(invitation._fill_search_message_template)  # pylint: disable=protected-access
+
+
+def test_get_id_from_urn(benchmark):
+  urns = [f'urn:li:fs_miniProfile:ACoAA{i:08d}' for i in range(_PAGE_SIZE)]
+  ids = benchmark(lambda: [utils.get_id_from_urn(urn) for urn in urns])
+  assert ids[-1] == f'ACoAA{_PAGE_SIZE - 1:08d}'
+
+
+def test_generate_tracking_id(benchmark):
+  assert len(benchmark(utils.generate_tracking_id)) == 24
+
+
+def test_invitation_payload(benchmark):
+  payload = benchmark(requestbuilder.invitation_payload, 'ACoAA00000001',
+                      'Hi Jane, I would love to connect.')
+  assert 'ACoAA00000001' in payload
+
+
+def test_search_query_uri(benchmark):
+  query = requestbuilder.SearchQuery({
+      'filters': 'List(resultType->PEOPLE,network->F|S)',
+      'keywords': 'senior python engineer'
+  })
+  assert 'start=980' in benchmark(query.uri, 980, 49)
+
+
+@pytest.fixture()
+def cookie_repository(tmp_path):
+  jar = cookies.RequestsCookieJar()
+  for i in range(20):
+    jar.set(f'cookie{i}', 'x' * 64, domain='.linkedin.com', path='/')
+  return cookierepo.CookieRepository('username', jar, tmp_path)
+
+
+def test_cookie_repository_save(benchmark, cookie_repository):  # pylint: disable=redefined-outer-name
+  benchmark(cookie_repository.save)
+
+
+def test_cookie_repository_get_cookies(benchmark, cookie_repository):  # pylint: disable=redefined-outer-name
+  cookie_repository.save()
+  assert len(benchmark(cookie_repository.get_cookies)) == 20
+
+
+def test_normalize_search_page(benchmark):
+  elements = [voyager_stub.VoyagerStub.element(i) for i in range(_PAGE_SIZE)]
+  normalize = linkedin_api.LinkedIn._normalize_search_person  # pylint: disable=protected-access
+  people = benchmark(lambda: [normalize(element) for element in elements])
+  assert len(people) == _PAGE_SIZE
+
+
+def test_search_over_stub(benchmark):
+
+  def search():
+    stub = voyager_stub.VoyagerStub(_SEARCH_RESULTS, max_count=100)
+    return stub.linkedin().search({})
+
+  assert len(benchmark(search)) == _SEARCH_RESULTS
@@ -0,0 +1,121 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs the pytest-benchmark suite and compares it with the baselines.
+
+Every timing is divided by the timing of the calibration benchmark of the same
+run, so the committed baselines hold across machines of different speed. A
+benchmark regresses when its relative timing grows by more than the threshold.
+Needs pytest-benchmark; the exit status is 1 on regressions.
+
+  cd inb && python -m benchmarks.regress [--threshold 0.3]
+  cd inb && python -m benchmarks.regress --save
+"""
+
+from __future__ import annotations
+
+import sys
+import json
+import pathlib
+import argparse
+import tempfile
+
+import pytest
+
+_SUITE = pathlib.Path(__file__).with_name('perf_hot_paths.py')
+_BASELINES = pathlib.Path(__file__).with_name('baselines.json')
+_CALIBRATION = 'test_calibration'
+# The minimum is the statistic least disturbed by a busy machine.
+_STATISTIC = 'min'
+
+
+def run_suite() -> dict[str, float]:
+  """Runs the suite and returns the timing of every benchmark relative to the
+  calibration benchmark.
+
+  Raises:
+    RuntimeError: If the suite fails.
+  """
+  with tempfile.TemporaryDirectory() as tmp_dir:
+    report_ = pathlib.Path(tmp_dir) / 'report.json'
+    exit_code_ = pytest.main([
+        '-q', '-p', 'no:cacheprovider', f'--benchmark-json={report_}',
+        '--benchmark-disable-gc', '--benchmark-warmup=on',
+        str(_SUITE)
+    ])
+    if exit_code_ != 0:
+      raise RuntimeError(f'The benchmark suite failed with {exit_code_}')
+    benchmarks_ = json.loads(report_.read_text())['benchmarks']
+  timings_ = {
+      benchmark['name']: benchmark['stats'][_STATISTIC]
+      for benchmark in benchmarks_
+  }
+  calibration_ = timings_.pop(_CALIBRATION)
+  return {
+      name: timing / calibration_ for name, timing in sorted(timings_.items())
+  }
+
+
+def compare(current: dict[str, float], baselines: dict[str, float],
+            threshold: float) -> list[str]:
+  """Prints the comparison table and returns the regressed benchmarks."""
+  regressions_ = []
+  print(f'\n{"benchmark":<40} {"baseline":>10} {"current":>10} {"change":>8}')
+  for name, timing in current.items():
+    baseline_ = baselines.get(name)
+    if baseline_ is None:
+      print(f'{name:<40} {"-":>10} {timing:>10.4f} {"new":>8}')
+      continue
+    change_ = timing / baseline_ - 1
+    flag_ = ''
+    if change_ > threshold:
+      regressions_.append(name)
+      flag_ = '  REGRESSION'
+    print(f'{name:<40} {baseline_:>10.4f} {timing:>10.4f}'
+          f' {change_:>+8.1%}{flag_}')
+  return regressions_
+
+
+def main(argv: list[str] = None) -> int:
+  parser_ = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser_.add_argument('--threshold',
+                       type=float,
+                       default=0.3,
+                       help='Relative slowdown flagged as a regression.')
+  parser_.add_argument('--baselines',
+                       type=pathlib.Path,
+                       default=_BASELINES,
+                       help='Baselines file to compare with or to save.')
+  parser_.add_argument('--save',
+                       action='store_true',
+                       help='Saves the timings as the new baselines.')
+  args_ = parser_.parse_args(argv)
+
+  current_ = run_suite()
+  if args_.save:
+    args_.baselines.write_text(json.dumps(current_, indent=2) + '\n')
+    print(f'\nSaved {len(current_)} baselines to {args_.baselines}')
+    return 0
+
+  baselines_ = json.loads(args_.baselines.read_text())
+  regressions_ = compare(current_, baselines_, args_.threshold)
+  if regressions_:
+    print(f'\n{len(regressions_)} benchmarks regressed by more than'
+          f' {args_.threshold:.0%}: {", ".join(regressions_)}')
+    return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -16,12 +16,26 @@
 
 """Command line interface for automation tool inb."""
 
+from __future__ import annotations
+
+from typing import Callable
+
+import os
+import re
+import json
 import time
 import click
+import signal
+import itertools
+import contextlib
 
 import api
 
-from api import linkedin_api, client
+from api import (linkedin_api, campaign, client, export, checkpoint,
+                 connections, daemon, deadline, exceptions as
+                 linkedin_api_exceptions, jobqueue, messagetemplate, outcome,
+                 pagecache, quota, ranking, ratelimit, stats, targets, trace,
+                 transfer, urncache)
 from api.invitation import status
 
 try:
@@ -32,7 +46,7 @@ except ImportError:
 
 # pylint: disable=pointless-statement
 @click.group()
-def Inb():
+def Inb():  # pylint: disable=invalid-name
   f"""inb version {api.__version__}
 
   Command line utility to automate the world of LinkedIn.
@@ -48,51 +62,387 @@ def Inb():
   pass
 
 
+def _apply_options(*options: Callable) -> Callable:
+  """Returns a decorator applying the given `click` options in the order they
+  are listed.
+  """
+
+  def decorator(func: Callable) -> Callable:
+    for option in reversed(options):
+      func = option(func)
+    return func
+
+  return decorator
+
+
+# Options shared by every command that needs an authenticated session.
+_auth_options = _apply_options(
+    click.option('--email',
+                 type=str,
+                 required=True,
+                 help=_('LinkedIn username.')),
+    click.password_option('--password',
+                          type=str,
+                          required=True,
+                          help=_('LinkedIn password.')),
+)
+
+# Options of how the people searches of a command are run.
+_search_run_options = _apply_options(
+    click.option('--cache-ttl',
+                 type=click.FloatRange(min=0),
+                 default=0,
+                 show_default=True,
+                 help=_('Serves search pages fetched within these many seconds'
+                        ' from the local page cache, 0 disables the cache.')),
+    click.option('--only-new',
+                 is_flag=True,
+                 required=False,
+                 help=_('Skips the results returned by previous runs of the'
+                        ' same search.')),
+    click.option('--max-stale-pages',
+                 type=click.IntRange(min=1),
+                 default=3,
+                 show_default=True,
+                 help=_('Stops an --only-new search after these many'
+                        ' consecutive pages without a new result.')),
+)
+
+# Options shared by every command that performs a people search.
+_search_options = _apply_options(
+    click.option('--keyword',
+                 type=str,
+                 required=True,
+                 help=_('Keyword to search for.')),
+    click.option('--regions',
+                 multiple=True,
+                 required=False,
+                 help=_('Search people based on these regions.')),
+    click.option('--connection-of',
+                 type=str,
+                 required=False,
+                 help=_('Profile id for mutual connection.')),
+    click.option('--network_depths',
+                 multiple=True,
+                 required=False,
+                 help=_('Network depths to dig into.')),
+    click.option('--network-depth',
+                 type=str,
+                 required=False,
+                 help=_('Network depth to dig into.')),
+    click.option('--industries',
+                 multiple=True,
+                 required=False,
+                 help=_('Search people from these industries.')),
+    click.option('--current-company',
+                 type=str,
+                 required=False,
+                 help=_('Search people working at this company.')),
+    click.option('--profile-languages',
+                 multiple=True,
+                 required=False,
+                 help=_('Person profile languages.')),
+    click.option('--schools',
+                 multiple=True,
+                 required=False,
+                 help=_('Search for profiles mentioning this school.')),
+    _search_run_options,
+)
+
+# Options of the local filtering and ranking of search results.
+_filter_options = _apply_options(
+    click.option('--include',
+                 multiple=True,
+                 required=False,
+                 help=_('Keeps only the results whose job title or location'
+                        ' mention one of these keywords.')),
+    click.option('--exclude',
+                 multiple=True,
+                 required=False,
+                 help=_('Drops the results whose job title or location mention'
+                        ' any of these keywords.')),
+    click.option('--jobtitle-regex',
+                 type=str,
+                 required=False,
+                 help=_('Keeps only the results whose job title matches this'
+                        ' regular expression.')),
+    click.option('--location-regex',
+                 type=str,
+                 required=False,
+                 help=_('Keeps only the results whose location matches this'
+                        ' regular expression.')),
+    click.option('--distance',
+                 'distances',
+                 multiple=True,
+                 type=click.Choice(
+                     ['DISTANCE_1', 'DISTANCE_2', 'DISTANCE_3',
+                      'OUT_OF_NETWORK']),
+                 required=False,
+                 help=_('Keeps only the results at these network distances.')),
+    click.option('--rank-term',
+                 'rank_terms',
+                 multiple=True,
+                 required=False,
+                 help=_('Ranks the results of every page by the keywords they'
+                        ' mention, given as "keyword=weight".')),
+    click.option('--min-score',
+                 type=float,
+                 required=False,
+                 help=_('Drops the results scoring less than this.')),
+)
+
+_quota_options = _apply_options(
+    click.option('--weekly-limit',
+                 type=click.IntRange(min=1),
+                 default=100,
+                 show_default=True,
+                 help=_('Invitations the account may send within any seven'
+                        ' days, across runs.')),)
+
+_message_options = _apply_options(
+    click.option('--message-template',
+                 type=str,
+                 required=False,
+                 help=_('Message sent with every invitation, personalized with'
+                        ' the fields {name}, {first_name}, {last_name},'
+                        ' {jobtitle}, {location} and {public_id}; a fallback'
+                        ' follows a "|", e.g. "Hi {first_name|there}".')),)
+
+# Options bounding the runtime of a run and of each of its requests.
+_runtime_options = _apply_options(
+    click.option('--max-runtime',
+                 type=click.FloatRange(min=0),
+                 required=False,
+                 help=_('Stops the run cleanly after these many seconds.')),
+    click.option('--connect-timeout',
+                 type=click.FloatRange(min=0.1),
+                 default=deadline.CONNECT_TIMEOUT,
+                 show_default=True,
+                 help=_('Seconds to wait for a connection to LinkedIn.')),
+    click.option('--read-timeout',
+                 type=click.FloatRange(min=0.1),
+                 default=deadline.READ_TIMEOUT,
+                 show_default=True,
+                 help=_('Seconds to wait for each read of a response.')),
+)
+
+# Options shared by every command that talks to LinkedIn.
+_session_options = _apply_options(
+    click.option('--refresh-cookies',
+                 is_flag=True,
+                 required=False,
+                 help=_('Update cookies if given.')),
+    click.option('--debug',
+                 is_flag=True,
+                 required=False,
+                 help=_('Prints out debugging information at runtime.')),
+)
+
+
+def _page_cache(email: str, cache_ttl: float) -> pagecache.PageCache | None:
+  """Returns the search page cache of `email` for the given `--cache-ttl` or
+  `None` if caching is disabled.
+  """
+  if not cache_ttl:
+    return None
+  return pagecache.PageCache(email, ttl=cache_ttl)
+
+
+def _page_filter(include: list, exclude: list, jobtitle_regex: str,
+                 location_regex: str, distances: list, rank_terms: list,
+                 min_score: float) -> ranking.PageFilter:
+  """Builds the local filter of search results from the `_filter_options`.
+
+  Raises:
+    click.BadParameter: If a regular expression or a rank term is invalid.
+  """
+  terms_ = {}
+  for term in rank_terms:
+    keyword_, weight_ = term.rpartition('=')[::2]
+    try:
+      terms_[keyword_] = float(weight_)
+    except ValueError as exc:
+      raise click.BadParameter(f'Expected "keyword=weight", got "{term}"',
+                               param_hint='--rank-term') from exc
+  try:
+    return ranking.PageFilter(include=include,
+                              exclude=exclude,
+                              jobtitle=jobtitle_regex,
+                              location=location_regex,
+                              distances=distances,
+                              terms=terms_,
+                              min_score=min_score)
+  except re.error as exc:
+    raise click.BadParameter(f'Invalid regular expression: {exc}') from exc
+
+
+def _message_template(
+    message_template: str | None) -> messagetemplate.MessageTemplate | None:
+  """Compiles the `--message-template`, if any.
+
+  Raises:
+    click.BadParameter: If the template is invalid, before any request is
+      made.
+  """
+  if message_template is None:
+    return None
+  try:
+    return messagetemplate.MessageTemplate(message_template)
+  except ValueError as exc:
+    raise click.BadParameter(str(exc), param_hint='--message-template') from exc
+
+
+def _invitation_quota(email: str, weekly_limit: int) -> quota.InvitationQuota:
+  """Opens the invitation quota of the account and reports the remaining
+  budget.
+
+  Raises:
+    click.ClickException: If no invitation is left, before any request is
+      made.
+  """
+  quota_ = quota.InvitationQuota(email, limit=weekly_limit)
+  click.echo(
+      _('Invitation budget: {remaining} of {limit} left for the week').format(
+          remaining=quota_.remaining(), limit=weekly_limit))
+  try:
+    quota_.check()
+  except linkedin_api_exceptions.LinkedInQuotaExceededException as exc:
+    quota_.close()
+    raise click.ClickException(str(exc)) from exc
+  return quota_
+
+
+def _echo_invitation_counts() -> None:
+  """Prints how many invitations the run sent and failed."""
+  sent_, failed_ = status.invitation_counts()
+  click.echo(
+      _('Invitations sent: {sent}, failed: {failed}').format(sent=sent_,
+                                                             failed=failed_))
+
+
+def _echo_search_counters(linkedin: linkedin_api.LinkedIn) -> None:
+  """Prints how many pages the searches of the run cost and what they
+  yielded.
+  """
+  for counters in linkedin.search_counters.values():
+    click.echo(
+        _('Search fetched {pages_fetched} pages: {elements_yielded} unique'
+          ' results, {duplicates} repeats, stopped on {stop_reason}').format(
+              **counters))
+
+
+def _echo_transfer_counters() -> None:
+  """Prints how many bytes the responses of every endpoint took on the wire
+  and once decoded.
+  """
+  for endpoint, counters in transfer.counters().items():
+    click.echo(
+        _('Transferred from {endpoint}: {responses} responses, {wire_bytes:,}'
+          ' bytes on the wire, {decoded_bytes:,} decoded').format(
+              endpoint=endpoint, **counters))
+
+
+def _echo_breaker_counters() -> None:
+  """Prints the circuit breakers that opened during the run."""
+  snapshot_ = stats.STATS.snapshot()
+  for name, value in snapshot_.items():
+    kind_, rest_ = name.partition('.')[::2]
+    endpoint_, counter_ = rest_.rpartition('.')[::2]
+    if kind_ != 'breaker' or counter_ != 'opened':
+      continue
+    click.echo(
+        _('Circuit breaker of {endpoint} opened {opened} times, rejected'
+          ' {rejected} requests, now {state}').format(
+              endpoint=endpoint_,
+              opened=value,
+              rejected=snapshot_.get(f'breaker.{endpoint_}.rejected', 0),
+              state=snapshot_.get(f'breaker.{endpoint_}.state')))
+
+
+def _connection_snapshot(
+    linkedin: linkedin_api.LinkedIn, email: str,
+    skip_connections: bool) -> connections.ConnectionSnapshot | None:
+  """Returns the synced connection snapshot of the account if
+  `--skip-connections` is given, `None` otherwise.
+  """
+  if not skip_connections:
+    return None
+  snapshot = connections.ConnectionSnapshot(email)
+  added = snapshot.sync(linkedin)
+  click.echo(
+      _('Synced {added} new connections, {total} known').format(
+          added=added, total=len(snapshot)))
+  return snapshot
+
+
+def _is_connected(target: dict,
+                  snapshot: connections.ConnectionSnapshot | None) -> bool:
+  """Returns whether the target is already a first degree connection, going by
+  its search distance and the connection snapshot, if any.
+  """
+  if target.get('distance') == 'DISTANCE_1':
+    return True
+  return snapshot is not None and snapshot.is_connected(
+      urn_id=target['urn_id'], public_id=target['public_id'])
+
+
+def _send_invitation(linkedin: linkedin_api.LinkedIn,
+                     target: dict,
+                     *,
+                     nofollow: bool,
+                     start_time: float,
+                     template: messagetemplate.MessageTemplate = None) -> bool:
+  """Sends an invitation to the given target and displays its status.
+
+  Args:
+    linkedin:   Authenticated LinkedIn client.
+    target:     A search result or a target read from a target file, i.e. a
+                dictionary with the keys `public_id`, `urn_id`, `name`,
+                `jobtitle` and `location`.
+    nofollow:   Whether to unfollow the profile after sending the invitation.
+    start_time: Clock in time of the invitation process.
+    template:   Template of the message to send with the invitation, if any.
+
+  Returns:
+    Whether the invitation was sent. Profiles that are already invited,
+    already connected or not invitable are skipped without a status line.
+  """
+  person = status.Person(
+      name=target['name'] or target['public_id'],
+      occupation=target['jobtitle'],
+      location=target['location'],
+      profileid=target['public_id'],
+      profileurl=f'{client.Client.LINKEDIN_BASE_URL}/in/{target["public_id"]}')
+  invitation = status.Invitation()
+  outcome_ = linkedin.add_connection(
+      profile_pub_id=target['public_id'],
+      message=template.render(target) if template is not None else '',
+      profile_urn=target['urn_id'])
+  if outcome_:
+    if nofollow is True:
+      linkedin.unfollow_connection(target['urn_id'] or
+                                   linkedin.resolve_urn_id(target['public_id']))
+    with trace.span('render invitation status', 'console'):
+      invitation.display_invitation_status_on_console(person=person,
+                                                      status='sent',
+                                                      start_time=start_time)
+    return True
+  if outcome_.is_permanent:
+    return False
+  with trace.span('render invitation status', 'console'):
+    invitation.display_invitation_status_on_console(person=person,
+                                                    status='failed',
+                                                    start_time=start_time)
+  return False
+
+
 @click.command()
-@click.option('--email',
-              type=str,
-              required=True,
-              help=_('LinkedIn username.'))
-@click.password_option('--password',
-                       type=str,
-                       required=True,
-                       help=_('LinkedIn password.'))
-@click.option('--keyword',
-              type=str,
-              required=True,
-              help=_('Keyword to search for.'))
-@click.option('--regions',
-              multiple=True,
-              required=False,
-              help=_('Search people based on these regions.'))
-@click.option('--connection-of',
-              type=str,
-              required=False,
-              help=_('Profile id for mutual connection.'))
-@click.option('--network_depths',
-              multiple=True,
-              required=False,
-              help=_('Network depths to dig into.'))
-@click.option('--network-depth',
-              type=str,
-              required=False,
-              help=_('Network depth to dig into.'))
-@click.option('--industries',
-              multiple=True,
-              required=False,
-              help=_('Search people from these industries.'))
-@click.option('--current-company',
-              type=str,
-              required=False,
-              help=_('Search people working at this company.'))
-@click.option('--profile-languages',
-              multiple=True,
-              required=False,
-              help=_('Person profile languages.'))
-@click.option('--schools',
-              multiple=True,
-              required=False,
-              help=_('Search for profiles mentioning this school.'))
+@_auth_options
+@_search_options
+@_filter_options
+@_quota_options
+@_message_options
+@_runtime_options
 @click.option('--refresh-cookies',
               is_flag=True,
               required=False,
@@ -106,6 +456,11 @@ def Inb():
               required=False,
               help=_(
                   'Unfollows the LinkedIn profile after sending invitation.'))
+@click.option('--skip-connections',
+              is_flag=True,
+              required=False,
+              help=_('Syncs the local snapshot of your connections and skips'
+                     ' the profiles already connected.'))
 @click.option('--debug',
               is_flag=True,
               required=False,
@@ -114,7 +469,12 @@ def search(  # pylint: disable=invalid-name
     email: str, password: str, keyword: str, regions: list, connection_of: str,
     network_depths: list, network_depth: str, industries: list,
     current_company: str, profile_languages: list, schools: list,
-    refresh_cookies: bool, limit: int, nofollow: bool, debug: bool) -> None:
+    cache_ttl: float, only_new: bool, max_stale_pages: int, include: list,
+    exclude: list, jobtitle_regex: str, location_regex: str, distances: list,
+    rank_terms: list, min_score: float, weekly_limit: int,
+    message_template: str, max_runtime: float, connect_timeout: float,
+    read_timeout: float, refresh_cookies: bool, limit: int, nofollow: bool,
+    skip_connections: bool, debug: bool) -> None:
   """Searches for the specific keyword given and sends invitation to them.
 
   Usage:
@@ -139,52 +499,684 @@ def search(  # pylint: disable=invalid-name
   
       ./inb/inb.py search --email "username" --password "password"
         --regions "India" --regions "United States" --regions "United Kingdom"
+
+  Results can be filtered and ranked locally before any invitation is sent,
+  which costs no requests.
+
+      ./inb/inb.py search --email "username" --keyword "Software developer"
+        --include python --exclude recruiter --rank-term "senior=2"
+
+  Invitations carry a message personalized for every profile with
+  --message-template.
+
+      ./inb/inb.py search --email "username" --keyword "Software developer"
+        --message-template "Hi {first_name|there}, fellow {jobtitle} here!"
+
+  Ctrl-C (or SIGTERM) lets the request in flight complete and stops the run
+  cleanly; press it twice to abort right away. --max-runtime does the same
+  after the given number of seconds.
+  """
+  page_filter = _page_filter(include, exclude, jobtitle_regex, location_regex,
+                             distances, rank_terms, min_score)
+  template = _message_template(message_template)
+  deadline_ = deadline.Deadline(max_runtime,
+                                connect_timeout=connect_timeout,
+                                read_timeout=read_timeout)
+  with deadline.cancel_on_signals(deadline_):
+    quota_ = _invitation_quota(email, weekly_limit)
+    negative_cache = outcome.NegativeCache(email)
+    linkedin = linkedin_api.LinkedIn(email,
+                                     password,
+                                     authenticate=True,
+                                     debug=debug,
+                                     refresh_cookies=refresh_cookies,
+                                     page_cache=_page_cache(email, cache_ttl),
+                                     quota_=quota_,
+                                     negative_cache=negative_cache,
+                                     deadline_=deadline_)
+
+    count = 0
+    search_pages = linkedin.iter_search_people_pages(
+        keywords=keyword,
+        regions=regions,
+        connection_of=connection_of,
+        network_depths=network_depths,
+        network_depth=network_depth,
+        industries=industries,
+        current_company=current_company,
+        profile_languages=profile_languages,
+        schools=schools,
+        only_new=only_new,
+        max_stale_pages=max_stale_pages)
+    start_time = time.time()
+    snapshot = None
+    try:
+      snapshot = _connection_snapshot(linkedin, email, skip_connections)
+      for result in itertools.chain.from_iterable(
+          page_filter.iter_pages(search_pages)):
+        if limit is not None and count >= limit:
+          break
+        if _is_connected(result, snapshot):
+          continue
+        if _send_invitation(linkedin,
+                            result,
+                            nofollow=nofollow,
+                            start_time=start_time,
+                            template=template):
+          count += 1
+    except (linkedin_api_exceptions.LinkedInQuotaExceededException,
+            linkedin_api_exceptions.LinkedInDeadlineExceededException,
+            linkedin_api_exceptions.LinkedInCircuitOpenException) as exc:
+      click.echo(str(exc))
+    finally:
+      # Stops the search right away, without fetching another page.
+      search_pages.close()
+      # Also closes the quota and the negative cache.
+      linkedin.close()
+      if snapshot is not None:
+        snapshot.close()
+    _echo_invitation_counts()
+    _echo_search_counters(linkedin)
+    _echo_transfer_counters()
+    _echo_breaker_counters()
+
+
+@click.command()
+@_auth_options
+@click.option('--spec',
+              type=click.Path(exists=True, dir_okay=False),
+              required=True,
+              help=_('JSON or YAML file listing the searches of the campaign.'))
+@click.option('--interleave',
+              type=click.Choice(campaign.INTERLEAVINGS),
+              required=False,
+              help=_('How the searches take turns, overriding the spec.'))
+@_search_run_options
+@_filter_options
+@_quota_options
+@_message_options
+@_runtime_options
+@click.option('--limit',
+              type=int,
+              required=False,
+              help=_('Number of invitations to send.'))
+@click.option('--nofollow',
+              is_flag=True,
+              required=False,
+              help=_(
+                  'Unfollows the LinkedIn profile after sending invitation.'))
+@click.option('--skip-connections',
+              is_flag=True,
+              required=False,
+              help=_('Syncs the local snapshot of your connections and skips'
+                     ' the profiles already connected.'))
+@_session_options
+def campaign_(  # pylint: disable=invalid-name
+    email: str, password: str, spec: str, interleave: str, cache_ttl: float,
+    only_new: bool, max_stale_pages: int, include: list, exclude: list,
+    jobtitle_regex: str, location_regex: str, distances: list, rank_terms: list,
+    min_score: float, weekly_limit: int, message_template: str,
+    max_runtime: float, connect_timeout: float, read_timeout: float, limit: int,
+    nofollow: bool, skip_connections: bool, refresh_cookies: bool,
+    debug: bool) -> None:
+  """Runs the searches of a campaign as a single stream and sends invitations
+  to the results.
+
+  Usage:
+
+    ./inb/inb.py campaign --email "username" --spec campaign.yaml
+
+  A profile found by several searches is invited once. The searches share the
+  rate limiting and the weekly invitation budget, and a search whose results
+  mostly repeat the others is cut early (see "min_yield" in the spec).
+  """
+  try:
+    campaign_plan = campaign.Campaign.load(spec)
+  except (ValueError, RuntimeError) as exc:
+    raise click.BadParameter(str(exc), param_hint='--spec') from exc
+  if interleave is not None:
+    campaign_plan.interleave = interleave
+  page_filter = _page_filter(include, exclude, jobtitle_regex, location_regex,
+                             distances, rank_terms, min_score)
+  template = _message_template(message_template)
+  deadline_ = deadline.Deadline(max_runtime,
+                                connect_timeout=connect_timeout,
+                                read_timeout=read_timeout)
+  with deadline.cancel_on_signals(deadline_):
+    quota_ = _invitation_quota(email, weekly_limit)
+    negative_cache = outcome.NegativeCache(email)
+    linkedin = linkedin_api.LinkedIn(email,
+                                     password,
+                                     authenticate=True,
+                                     debug=debug,
+                                     refresh_cookies=refresh_cookies,
+                                     page_cache=_page_cache(email, cache_ttl),
+                                     quota_=quota_,
+                                     negative_cache=negative_cache,
+                                     deadline_=deadline_)
+
+    count = 0
+    search_pages = campaign_plan.iter_pages(linkedin,
+                                            only_new=only_new,
+                                            max_stale_pages=max_stale_pages)
+    start_time = time.time()
+    snapshot = None
+    try:
+      snapshot = _connection_snapshot(linkedin, email, skip_connections)
+      for result in itertools.chain.from_iterable(
+          page_filter.iter_pages(search_pages)):
+        if limit is not None and count >= limit:
+          break
+        if _is_connected(result, snapshot):
+          continue
+        if _send_invitation(linkedin,
+                            result,
+                            nofollow=nofollow,
+                            start_time=start_time,
+                            template=template):
+          count += 1
+    except (linkedin_api_exceptions.LinkedInQuotaExceededException,
+            linkedin_api_exceptions.LinkedInDeadlineExceededException,
+            linkedin_api_exceptions.LinkedInCircuitOpenException) as exc:
+      click.echo(str(exc))
+    finally:
+      search_pages.close()
+      linkedin.close()
+      if snapshot is not None:
+        snapshot.close()
+    _echo_invitation_counts()
+    for counters in campaign_plan.counters():
+      click.echo(
+          _('Search "{name}": {pages} pages, {new} new of {results} results'
+            ' ({yield:.0%}), stopped on {stop_reason}').format(**counters))
+    _echo_transfer_counters()
+    _echo_breaker_counters()
+
+
+@click.command()
+@_auth_options
+@_search_options
+@_filter_options
+@click.option('--output',
+              type=click.Path(dir_okay=False, writable=True),
+              required=True,
+              help=_('File to write the search results to.'))
+@click.option('--format',
+              'format_',
+              type=click.Choice(list(export.SINKS)),
+              required=False,
+              help=_('Output format, inferred from the --output suffix by'
+                     ' default.'))
+@click.option('--limit',
+              type=int,
+              required=False,
+              help=_('Number of search results to export.'))
+@_runtime_options
+@_session_options
+def export_(  # pylint: disable=invalid-name
+    email: str, password: str, keyword: str, regions: list, connection_of: str,
+    network_depths: list, network_depth: str, industries: list,
+    current_company: str, profile_languages: list, schools: list,
+    cache_ttl: float, only_new: bool, max_stale_pages: int, include: list,
+    exclude: list, jobtitle_regex: str, location_regex: str, distances: list,
+    rank_terms: list, min_score: float, output: str, format_: str, limit: int,
+    max_runtime: float, connect_timeout: float, read_timeout: float,
+    refresh_cookies: bool, debug: bool) -> None:
+  """Searches for the specific keyword given and streams the results to a
+  JSONL, CSV or Parquet file.
+
+  Usage:
+
+    ./inb/inb.py export --email "username" --password "password"
+      --keyword "Software developer" --output results.jsonl
+
+  Results are written page by page as they arrive, so exporting a large search
+  does not hold the results in memory. Parquet output requires pyarrow.
   """
+  page_filter = _page_filter(include, exclude, jobtitle_regex, location_regex,
+                             distances, rank_terms, min_score)
+  try:
+    sink = export.open_sink(output, linkedin_api.LinkedIn.SEARCH_PEOPLE_FIELDS,
+                            format_)
+  except (ValueError, RuntimeError) as exc:
+    raise click.BadParameter(str(exc)) from exc
+
+  deadline_ = deadline.Deadline(max_runtime,
+                                connect_timeout=connect_timeout,
+                                read_timeout=read_timeout)
+  with deadline.cancel_on_signals(deadline_):
+    linkedin = linkedin_api.LinkedIn(email,
+                                     password,
+                                     authenticate=True,
+                                     debug=debug,
+                                     refresh_cookies=refresh_cookies,
+                                     page_cache=_page_cache(email, cache_ttl),
+                                     deadline_=deadline_)
+    with contextlib.closing(linkedin), sink:
+      try:
+        export.export_pages(
+            page_filter.iter_pages(
+                linkedin.iter_search_people_pages(
+                    keywords=keyword,
+                    regions=regions,
+                    connection_of=connection_of,
+                    network_depths=network_depths,
+                    network_depth=network_depth,
+                    industries=industries,
+                    current_company=current_company,
+                    profile_languages=profile_languages,
+                    schools=schools,
+                    only_new=only_new,
+                    max_stale_pages=max_stale_pages,
+                    limit=limit)), sink)
+      except (linkedin_api_exceptions.LinkedInDeadlineExceededException,
+              linkedin_api_exceptions.LinkedInCircuitOpenException) as exc:
+        click.echo(str(exc))
+    click.echo(
+        _('Exported {count} search results to {output}').format(
+            count=sink.rows_written, output=output))
+    _echo_search_counters(linkedin)
+    _echo_transfer_counters()
+    _echo_breaker_counters()
+
+
+@click.command()
+@_auth_options
+@click.option('--from-file',
+              type=click.Path(exists=True, dir_okay=False),
+              required=True,
+              help=_('CSV or JSONL file listing the profiles to invite.'))
+@click.option('--format',
+              'format_',
+              type=click.Choice(targets.FORMATS),
+              required=False,
+              help=_('Format of the --from-file file, inferred from its'
+                     ' suffix by default.'))
+@click.option('--limit',
+              type=int,
+              required=False,
+              help=_('Number of invitations to send.'))
+@click.option('--min-interval',
+              type=float,
+              default=2.0,
+              show_default=True,
+              help=_('Minimum number of seconds between two requests.'))
+@click.option('--max-per-hour',
+              type=int,
+              required=False,
+              help=_('Maximum number of requests per hour.'))
+@click.option('--checkpoint-every',
+              type=click.IntRange(min=1),
+              default=25,
+              show_default=True,
+              help=_('Number of targets to process between two checkpoints.'))
+@click.option('--restart',
+              is_flag=True,
+              required=False,
+              help=_('Ignores the saved progress and starts from the top of'
+                     ' the file.'))
+@click.option('--nofollow',
+              is_flag=True,
+              required=False,
+              help=_(
+                  'Unfollows the LinkedIn profile after sending invitation.'))
+@click.option('--skip-connections',
+              is_flag=True,
+              required=False,
+              help=_('Syncs the local snapshot of your connections and skips'
+                     ' the profiles already connected.'))
+@_quota_options
+@_message_options
+@_runtime_options
+@_session_options
+def invite(  # pylint: disable=invalid-name
+    email: str, password: str, from_file: str, format_: str, limit: int,
+    min_interval: float, max_per_hour: int, checkpoint_every: int,
+    restart: bool, nofollow: bool, skip_connections: bool, weekly_limit: int,
+    message_template: str, max_runtime: float, connect_timeout: float,
+    read_timeout: float, refresh_cookies: bool, debug: bool) -> None:
+  """Sends invitations to the profiles listed in a CSV or JSONL file.
+
+  Usage:
+
+    ./inb/inb.py invite --email "username" --password "password"
+      --from-file targets.csv
+
+  Every row needs a public_id and may carry a urn_id; missing URN ids are
+  resolved through a local cache before falling back to a profile lookup. The
+  file is streamed and the progress is saved every --checkpoint-every rows, so
+  running the same command again resumes where the previous run stopped.
+  Ctrl-C (or SIGTERM) and --max-runtime stop the run cleanly after the request
+  in flight, with the checkpoint saved.
+  """
+  try:
+    format_ = targets.resolve_format(from_file, format_)
+  except ValueError as exc:
+    raise click.BadParameter(str(exc)) from exc
+  template = _message_template(message_template)
+
+  checkpoint_ = checkpoint.Checkpoint(
+      checkpoint.Checkpoint.name_for('invite', email,
+                                     os.path.abspath(from_file)))
+  if restart is True:
+    checkpoint_.clear()
+  offset = checkpoint_.load().get('offset', 0)
+  if offset:
+    click.echo(_('Resuming {file} from byte {offset}').format(file=from_file,
+                                                              offset=offset))
+
+  deadline_ = deadline.Deadline(max_runtime,
+                                connect_timeout=connect_timeout,
+                                read_timeout=read_timeout)
+  with deadline.cancel_on_signals(deadline_):
+    quota_ = _invitation_quota(email, weekly_limit)
+    negative_cache = outcome.NegativeCache(email)
+    urn_cache = urncache.UrnCache()
+    linkedin = linkedin_api.LinkedIn(email,
+                                     password,
+                                     authenticate=True,
+                                     debug=debug,
+                                     refresh_cookies=refresh_cookies,
+                                     evade=ratelimit.RateScheduler(
+                                         min_interval=min_interval,
+                                         max_calls=max_per_hour,
+                                         sleep=deadline_.sleep),
+                                     urn_cache=urn_cache,
+                                     quota_=quota_,
+                                     negative_cache=negative_cache,
+                                     deadline_=deadline_)
+
+    count = 0
+    start_time = time.time()
+    # The generator is closed explicitly so the checkpoint is saved as soon as
+    # the loop ends, even when it ends early because of `--limit`.
+    with contextlib.closing(
+        targets.iter_targets_with_checkpoint(
+            from_file, checkpoint_, format_=format_,
+            every=checkpoint_every)) as targets_, contextlib.closing(
+                urn_cache), contextlib.closing(linkedin):
+      snapshot = None
+      try:
+        snapshot = _connection_snapshot(linkedin, email, skip_connections)
+        for target in targets_:
+          if limit is not None and count >= limit:
+            break
+          if _is_connected(target, snapshot):
+            continue
+          if _send_invitation(linkedin,
+                              target,
+                              nofollow=nofollow,
+                              start_time=start_time,
+                              template=template):
+            count += 1
+      except (linkedin_api_exceptions.LinkedInQuotaExceededException,
+              linkedin_api_exceptions.LinkedInDeadlineExceededException,
+              linkedin_api_exceptions.LinkedInCircuitOpenException) as exc:
+        # The target is not marked as processed, so the next run retries it.
+        click.echo(str(exc))
+      finally:
+        if snapshot is not None:
+          snapshot.close()
+    _echo_invitation_counts()
+    _echo_transfer_counters()
+    _echo_breaker_counters()
+
+
+@click.command()
+@click.option('--workers',
+              type=click.IntRange(min=1),
+              default=2,
+              show_default=True,
+              help=_('Maximum number of jobs running at the same time.'))
+@click.option('--poll-interval',
+              type=click.FloatRange(min=0.1),
+              default=5.0,
+              show_default=True,
+              help=_('Seconds to wait for new jobs when the queue is empty.'))
+@click.option('--min-interval',
+              type=float,
+              default=2.0,
+              show_default=True,
+              help=_('Minimum number of seconds between two requests of the'
+                     ' same account.'))
+@click.option('--max-per-hour',
+              type=int,
+              required=False,
+              help=_('Maximum number of requests per hour and account.'))
+@_quota_options
+@click.option('--debug',
+              is_flag=True,
+              required=False,
+              help=_('Prints out debugging information at runtime.'))
+def serve(workers: int, poll_interval: float, min_interval: float,
+          max_per_hour: int, weekly_limit: int, debug: bool) -> None:
+  """Runs the jobs queued with the submit command until interrupted.
+
+  Usage:
+
+    ./inb/inb.py serve --workers 4 --max-per-hour 60
+
+  Authenticated sessions are kept alive across jobs, one per account, and are
+  created from the cookies cached by a previous run of any other command for
+  that account. Jobs interrupted by Ctrl-C are put back in the queue.
+  """
+  queue = jobqueue.JobQueue()
+  sessions = daemon.SessionPool(
+      scheduler_factory=lambda: ratelimit.RateScheduler(
+          min_interval=min_interval, max_calls=max_per_hour),
+      weekly_limit=weekly_limit,
+      debug=debug)
+  daemon_ = daemon.Daemon(queue,
+                          sessions,
+                          max_workers=workers,
+                          poll_interval=poll_interval)
+  signal.signal(signal.SIGINT, lambda *_: daemon_.stop())
+  signal.signal(signal.SIGTERM, lambda *_: daemon_.stop())
+
+  click.echo(_('Serving jobs from {path}, press Ctrl-C to stop').format(
+      path=queue.queue_dir))
+  try:
+    daemon_.serve_forever()
+  finally:
+    sessions.close()
+    queue.close()
+  click.echo(json.dumps(stats.STATS.snapshot(), indent=2))
+
+
+@click.command()
+@click.option('--email',
+              type=str,
+              required=True,
+              help=_('LinkedIn username of the account to run the job as.'))
+@click.option('--kind',
+              type=click.Choice(jobqueue.KINDS),
+              required=True,
+              help=_('Kind of the job.'))
+@click.option('--params',
+              type=str,
+              default='{}',
+              show_default=True,
+              help=_('Job parameters as a JSON object, e.g.'
+                     ' \'{"keywords": "Software developer", "limit": 10}\'.'))
+def submit(email: str, kind: str, params: str) -> None:
+  """Queues a job for the serve command.
+
+  Usage:
+
+    ./inb/inb.py submit --email "username" --kind export
+      --params '{"keywords": "Software developer", "output": "out.jsonl"}'
+
+  search and export jobs take the keyword arguments of search_people
+  (keywords, regions, network_depth, ...) plus limit; export jobs also need
+  output. invite jobs take from_file. search and invite jobs accept nofollow
+  and message_template.
+  """
+  try:
+    params_ = json.loads(params)
+  except ValueError as exc:
+    raise click.BadParameter(str(exc), param_hint='--params') from exc
+  if not isinstance(params_, dict):
+    raise click.BadParameter(_('Expected a JSON object'),
+                             param_hint='--params')
+  _message_template(params_.get('message_template'))
+
+  queue = jobqueue.JobQueue()
+  with contextlib.closing(queue):
+    job_id = queue.submit(email, kind, params_)
+  click.echo(_('Queued job {id}').format(id=job_id))
+
+
+@click.command()
+@click.option('--state',
+              type=click.Choice([
+                  jobqueue.STATE_QUEUED, jobqueue.STATE_RUNNING,
+                  jobqueue.STATE_DONE, jobqueue.STATE_FAILED
+              ]),
+              required=False,
+              help=_('Only lists the jobs in this state.'))
+@click.option('--limit',
+              type=int,
+              default=20,
+              show_default=True,
+              help=_('Number of jobs to list.'))
+def jobs(state: str, limit: int) -> None:
+  """Lists the most recent jobs along with their progress."""
+  queue = jobqueue.JobQueue()
+  with contextlib.closing(queue):
+    for job in queue.list(state, limit):
+      click.echo(f'{job.id:>6}  {job.state:<8}  {job.kind:<6}  {job.account}'
+                 f'  {json.dumps(job.progress)}'
+                 f'{"  " + job.error if job.error else ""}')
+
+
+@click.command()
+@_auth_options
+@click.option('--older-than',
+              type=click.FloatRange(min=0),
+              required=True,
+              help=_('Withdraws the invitations sent more than these many days'
+                     ' ago.'))
+@click.option('--limit',
+              type=int,
+              required=False,
+              help=_('Number of invitations to withdraw.'))
+@click.option('--min-interval',
+              type=float,
+              default=2.0,
+              show_default=True,
+              help=_('Minimum number of seconds between two requests.'))
+@click.option('--max-per-hour',
+              type=int,
+              required=False,
+              help=_('Maximum number of requests per hour.'))
+@click.option('--restart',
+              is_flag=True,
+              required=False,
+              help=_('Ignores the progress saved by an interrupted run.'))
+@_session_options
+def withdraw(  # pylint: disable=invalid-name
+    email: str, password: str, older_than: float, limit: int,
+    min_interval: float, max_per_hour: int, restart: bool,
+    refresh_cookies: bool, debug: bool) -> None:
+  """Withdraws the pending invitations older than the given number of days.
+
+  Usage:
+
+    ./inb/inb.py withdraw --email "username" --password "password"
+      --older-than 30
+
+  The sent invitations are walked once, newest first, and the stale ones are
+  withdrawn page by page. An interrupted run resumes from where it stopped.
+  """
+  checkpoint_ = checkpoint.Checkpoint(
+      checkpoint.Checkpoint.name_for('withdraw', email))
+  if restart is True:
+    checkpoint_.clear()
+  offset = checkpoint_.load().get('offset', 0)
+
   linkedin = linkedin_api.LinkedIn(email,
                                    password,
                                    authenticate=True,
                                    debug=debug,
-                                   refresh_cookies=refresh_cookies)
+                                   refresh_cookies=refresh_cookies,
+                                   evade=ratelimit.RateScheduler(
+                                       min_interval=min_interval,
+                                       max_calls=max_per_hour))
 
-  count = 0
-  search_results = linkedin.search_people(keywords=keyword,
-                                          regions=regions,
-                                          connection_of=connection_of,
-                                          network_depths=network_depths,
-                                          network_depth=network_depth,
-                                          industries=industries,
-                                          current_company=current_company,
-                                          profile_languages=profile_languages,
-                                          schools=schools)
-  start_time = time.time()
-  for result in search_results:
-    if limit is not None and count >= limit:
-      break
-
-    person = status.Person(
-        name=result['name'],
-        occupation=result['jobtitle'],
-        location=result['location'],
-        profileid=result['public_id'],
-        profileurl=f'{client.Client.LINKEDIN_BASE_URL}/in/{result["public_id"]}'
-    )
-    invitation = status.Invitation()
-    if linkedin.add_connection(profile_pub_id=result['public_id'],
-                               message='',
-                               profile_urn=result['urn_id']) is True:
-      if nofollow is True:
-        linkedin.unfollow_connection(result['urn_id'])
-      invitation.display_invitation_status_on_console(person=person,
-                                                      status='sent',
-                                                      start_time=start_time)
-      count += 1
-    else:
-      invitation.display_invitation_status_on_console(person=person,
-                                                      status='failed',
-                                                      start_time=start_time)
+  kept = 0
+  withdrawn = 0
+  failed = 0
+  now = time.time()
+  with contextlib.closing(linkedin):
+    for invitation, ok in linkedin.withdraw_stale_invitations(
+        older_than * 24 * 60 * 60,
+        offset=offset,
+        limit=-1 if limit is None else limit,
+        now=now):
+      if ok is None:
+        kept += 1
+        # Everything in front of the first stale invitation is fresh, so a
+        # resumed run can skip it.
+        if not withdrawn and not failed and kept % 100 == 0:
+          checkpoint_.save({'offset': offset + kept})
+        continue
+      if ok:
+        withdrawn += 1
+      else:
+        failed += 1
+      click.echo(
+          _('  {status}  {name}  ({days} days old)').format(
+              status=_('withdrawn') if ok else _('failed'),
+              name=invitation['name'] or invitation['public_id'],
+              days=int((now - invitation['sent_time']) / (24 * 60 * 60))))
+  checkpoint_.clear()
+  click.echo(
+      _('Withdrawn: {withdrawn}  Failure: {failed}  Kept: {kept}').format(
+          withdrawn=withdrawn, failed=failed, kept=kept))
+
+
+@click.command(name='connections')
+@_auth_options
+@click.option('--full',
+              is_flag=True,
+              required=False,
+              help=_('Rebuilds the snapshot from scratch, which also drops the'
+                     ' connections removed since the last sync.'))
+@_session_options
+def connections_(  # pylint: disable=invalid-name
+    email: str, password: str, full: bool, refresh_cookies: bool,
+    debug: bool) -> None:
+  """Syncs the local snapshot of your connections.
+
+  Usage:
+
+    ./inb/inb.py connections --email "username" --password "password"
+
+  Only the connections made since the previous sync are fetched, unless
+  --full is given. search and invite use the snapshot with --skip-connections.
+  """
+  linkedin = linkedin_api.LinkedIn(email,
+                                   password,
+                                   authenticate=True,
+                                   debug=debug,
+                                   refresh_cookies=refresh_cookies)
+  snapshot = connections.ConnectionSnapshot(email)
+  with contextlib.closing(linkedin), contextlib.closing(snapshot):
+    added = snapshot.sync(linkedin, full=full)
+    click.echo(
+        _('Synced {added} new connections, {total} known').format(
+            added=added, total=len(snapshot)))
 
 
 Inb.add_command(search)
+Inb.add_command(campaign_, name='campaign')
+Inb.add_command(export_, name='export')
+Inb.add_command(invite)
+Inb.add_command(withdraw)
+Inb.add_command(connections_)
+Inb.add_command(serve)
+Inb.add_command(submit)
+Inb.add_command(jobs)
 
 if __name__ == '__main__':
   Inb()
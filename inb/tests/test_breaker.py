@@ -0,0 +1,101 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from api import breaker, stats
+from api.exceptions import LinkedInCircuitOpenException
+
+
+def _breaker(now: list, stats_: stats.Stats) -> breaker.CircuitBreaker:
+  return breaker.CircuitBreaker('invitations',
+                                window=4,
+                                min_calls=4,
+                                failure_rate=0.5,
+                                cooldown=10,
+                                max_cooldown=30,
+                                clock=lambda: now[0],
+                                stats_=stats_)
+
+
+def _request(breaker_: breaker.CircuitBreaker, success: bool) -> None:
+  breaker_.before_request()
+  breaker_.record(success)
+
+
+def test_opens_on_failure_rate_and_probes_after_cooldown():
+  now, stats_ = [0.0], stats.Stats()
+  breaker_ = _breaker(now, stats_)
+  for success in (True, False, True):
+    _request(breaker_, success)
+  assert breaker_.state == breaker.STATE_CLOSED
+  _request(breaker_, False)
+  assert breaker_.state == breaker.STATE_OPEN
+  assert breaker_.retry_after() == 10
+
+  with pytest.raises(LinkedInCircuitOpenException, match='invitations'):
+    breaker_.check()
+  now[0] = 10
+  breaker_.check()
+  breaker_.before_request()
+  assert breaker_.state == breaker.STATE_HALF_OPEN
+  # Only one probe is in flight at a time.
+  with pytest.raises(LinkedInCircuitOpenException):
+    breaker_.before_request()
+  breaker_.record(True)
+  assert breaker_.state == breaker.STATE_CLOSED
+
+  assert stats_.get('breaker.invitations.state') == breaker.STATE_CLOSED
+  assert stats_.get('breaker.invitations.opened') == 1
+  assert stats_.get('breaker.invitations.rejected') == 2
+
+
+def test_failed_probes_double_the_cooldown():
+  now = [0.0]
+  breaker_ = _breaker(now, stats.Stats())
+  for _ in range(4):
+    _request(breaker_, False)
+  for cooldown in (10, 20, 30, 30):
+    assert breaker_.retry_after() == cooldown
+    now[0] += cooldown
+    _request(breaker_, False)
+    assert breaker_.state == breaker.STATE_OPEN
+
+
+def test_released_probe_lets_another_one_through():
+  now = [0.0]
+  breaker_ = _breaker(now, stats.Stats())
+  for _ in range(4):
+    _request(breaker_, False)
+  now[0] = 10
+  breaker_.before_request()
+  breaker_.release()
+  _request(breaker_, True)
+  assert breaker_.state == breaker.STATE_CLOSED
+
+
+def test_breakers_are_kept_per_endpoint():
+  breakers = breaker.CircuitBreakers(min_calls=1, stats_=stats.Stats())
+  invitations = breakers.get(
+      'https://www.linkedin.com/voyager/api/growth/normInvitations')
+  _request(invitations, False)
+  search = breakers.get(
+      'https://www.linkedin.com/voyager/api/search/blended?q=all')
+  search.check()
+  assert breakers.states() == {
+      'invitations': breaker.STATE_OPEN,
+      'search': breaker.STATE_CLOSED
+  }
@@ -0,0 +1,188 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import json
+import pytest
+
+from api import campaign
+
+
+class _FakeLinkedIn(object):
+  """Serves canned result pages per keyword and records the pages fetched."""
+
+  def __init__(self, pages: dict[str, list[list[int]]]) -> None:
+    self.pages = pages
+    self.fetched = []
+    self.closed = []
+
+  def iter_search_people_pages(self, *, keywords, **kwargs):
+    del kwargs  # Unused.
+    try:
+      for page in self.pages[keywords]:
+        self.fetched.append(keywords)
+        yield [{'urn_id': f'urn{i}', 'public_id': f'p{i}'} for i in page]
+    finally:
+      self.closed.append(keywords)
+
+
+def _urns(pages):
+  return [[person['urn_id'] for person in page] for page in pages]
+
+
+def test_round_robin_dedups_across_queries():
+  linkedin = _FakeLinkedIn({'a': [[1, 2], [3, 4]], 'b': [[2, 5], [1, 3]]})
+  campaign_ = campaign.Campaign.from_spec(
+      {'queries': [{
+          'keywords': 'a'
+      }, {
+          'keywords': 'b'
+      }]})
+
+  pages = list(campaign_.iter_pages(linkedin))
+
+  assert _urns(pages) == [['urn1', 'urn2'], ['urn5'], ['urn3', 'urn4']]
+  assert linkedin.fetched == ['a', 'b', 'a', 'b']
+  counters = {query['name']: query for query in campaign_.counters()}
+  assert counters['b'] == {
+      'name': 'b',
+      'pages': 2,
+      'results': 4,
+      'new': 1,
+      'duplicates': 3,
+      'yield': 0.25,
+      'stop_reason': 'exhausted'
+  }
+
+
+def test_priority_runs_queries_in_order():
+  linkedin = _FakeLinkedIn({'a': [[1], [2]], 'b': [[3], [4]]})
+  campaign_ = campaign.Campaign.from_spec({
+      'interleave': 'priority',
+      'queries': [{
+          'keywords': 'a'
+      }, {
+          'keywords': 'b',
+          'priority': 1
+      }]
+  })
+
+  assert _urns(campaign_.iter_pages(linkedin)) == [['urn3'], ['urn4'], ['urn1'],
+                                                   ['urn2']]
+
+
+def test_low_yield_queries_and_limits_cut_queries():
+  linkedin = _FakeLinkedIn({
+      'a': [[1, 2, 3], [4, 5, 6], [7]],
+      'b': [[1, 2], [3, 4], [10, 11]],
+      'c': [[20, 21, 22, 23]],
+  })
+  campaign_ = campaign.Campaign.from_spec({
+      'min_yield':
+          0.5,
+      'min_pages':
+          2,
+      'queries': [{
+          'keywords': 'a'
+      }, {
+          'keywords': 'b'
+      }, {
+          'keywords': 'c',
+          'limit': 2
+      }]
+  })
+
+  pages = _urns(campaign_.iter_pages(linkedin))
+
+  assert ['urn10', 'urn11'] not in pages
+  assert ['urn20', 'urn21'] in pages
+  stop_reasons = {
+      query['name']: query['stop_reason'] for query in campaign_.counters()
+  }
+  assert stop_reasons == {'a': 'exhausted', 'b': 'low yield', 'c': 'limit'}
+  assert sorted(linkedin.closed) == ['a', 'b', 'c']
+
+
+def test_closing_the_stream_closes_the_searches():
+  linkedin = _FakeLinkedIn({'a': [[1], [2]], 'b': [[3], [4]]})
+  campaign_ = campaign.Campaign.from_spec(
+      {'queries': [{
+          'keywords': 'a'
+      }, {
+          'keywords': 'b'
+      }]})
+
+  pages = campaign_.iter_pages(linkedin)
+  next(pages)
+  pages.close()
+
+  # The search of "b" never started, so it holds nothing to release.
+  assert linkedin.closed == ['a']
+  assert [query['stop_reason'] for query in campaign_.counters()
+         ] == ['closed', 'closed']
+
+
+@pytest.mark.parametrize('spec', [
+    {},
+    {
+        'queries': []
+    },
+    {
+        'queries': [{
+            'keywords': 'a',
+            'colour': 'red'
+        }]
+    },
+    {
+        'queries': [{
+            'name': 'no filters'
+        }]
+    },
+    {
+        'queries': [{
+            'keywords': 'a',
+            'limit': 0
+        }]
+    },
+    {
+        'interleave': 'random',
+        'queries': [{
+            'keywords': 'a'
+        }]
+    },
+])
+def test_invalid_specs(spec):
+  with pytest.raises(ValueError):
+    campaign.Campaign.from_spec(spec)
+
+
+def test_load(tmp_path):
+  spec = {'queries': [{'keywords': 'a', 'regions': ['1', '2']}]}
+  path = tmp_path / 'campaign.json'
+  path.write_text(json.dumps(spec))
+  assert campaign.Campaign.load(path).queries[0].filters == spec['queries'][0]
+
+  if campaign.yaml is not None:
+    path = tmp_path / 'campaign.yaml'
+    path.write_text('queries:\n  - keywords: a\n    regions: ["1", "2"]\n')
+    assert campaign.Campaign.load(path).queries[0].filters == (
+        spec['queries'][0])
+
+  path = tmp_path / 'broken.json'
+  path.write_text('{')
+  with pytest.raises(ValueError):
+    campaign.Campaign.load(path)
@@ -0,0 +1,128 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import gzip
+import pytest
+import requests
+
+from requests import adapters
+
+from api import cassette, linkedin_api
+
+from tests import voyager_stub
+
+
+def _linkedin() -> linkedin_api.LinkedIn:
+  return linkedin_api.LinkedIn('username',
+                               'password',
+                               authenticate=False,
+                               evade=lambda: None)
+
+
+def _record_search(path, stub) -> list[dict]:
+  linkedin = _linkedin()
+  linkedin.client.session.mount('https://', stub.adapter())
+  recorder = cassette.mount(linkedin.client.session, path, cassette.MODE_RECORD)
+  results = linkedin.search({})
+  recorder.close()
+  assert recorder.records == stub.requests
+  return results
+
+
+def test_replayed_search_matches_the_recording(tmp_path):
+  path = tmp_path / 'search.jsonl.gz'
+  stub = voyager_stub.VoyagerStub(120, max_count=49)
+  recorded = _record_search(path, stub)
+  requests_ = stub.requests
+
+  linkedin = _linkedin()
+  replayer = cassette.mount(linkedin.client.session, path)
+  assert linkedin.search({}) == recorded
+  assert len(replayer) == 0
+  assert replayer.replayed == requests_
+  assert stub.requests == requests_
+
+
+def test_replay_waits_for_recorded_latencies(tmp_path):
+  path = tmp_path / 'search.jsonl.gz'
+  _record_search(path, voyager_stub.VoyagerStub(10))
+  recorded = [record['elapsed'] for record in cassette.read_records(path)]
+
+  slept = []
+  session = requests.Session()
+  session.mount('https://',
+                cassette.ReplayAdapter(path, realtime=True, sleep=slept.append))
+  for record in cassette.read_records(path):
+    session.get(record['url'])
+  assert slept == recorded
+
+
+class _FixedAdapter(adapters.BaseAdapter):
+  """Answers every request with a binary body and a session cookie."""
+
+  def send(self, request, **_):  # pylint: disable=arguments-differ
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Set-Cookie'] = 'li_at=secret'
+    response.headers['Content-Type'] = 'image/png'
+    response._content = b'\x89PNG\xff'  # pylint: disable=protected-access
+    response.request = request
+    return response
+
+  def close(self):
+    pass
+
+
+def test_cassette_keeps_binary_bodies_and_drops_cookies(tmp_path):
+  path = tmp_path / 'binary.jsonl.gz'
+  recorder = cassette.RecordingAdapter(path, _FixedAdapter())
+  session = requests.Session()
+  session.mount('https://', recorder)
+  session.get('https://example.com/a.png')
+  session.get('https://example.com/a.png')
+
+  session = requests.Session()
+  session.mount('https://', cassette.ReplayAdapter(path))
+  response = session.get('https://example.com/a.png')
+  assert response.content == b'\x89PNG\xff'
+  assert 'Set-Cookie' not in response.headers
+  assert response.headers['content-type'] == 'image/png'
+  session.get('https://example.com/a.png')
+  with pytest.raises(requests.ConnectionError):
+    session.get('https://example.com/a.png')
+
+
+def test_unclosed_cassette_is_readable(tmp_path):
+  path = tmp_path / 'cut.jsonl.gz'
+  recorder = cassette.RecordingAdapter(path, _FixedAdapter())
+  session = requests.Session()
+  session.mount('https://', recorder)
+  session.get('https://example.com/1')
+  session.get('https://example.com/2')
+  # As if the recording process had been killed.
+  assert len(list(cassette.read_records(path))) == 2
+
+
+def test_invalid_cassettes_and_modes(tmp_path):
+  path = tmp_path / 'other.gz'
+  with gzip.open(path, 'wt') as file_:
+    file_.write('{"version": 0}\n')
+  with pytest.raises(ValueError):
+    cassette.ReplayAdapter(path)
+  with pytest.raises(ValueError):
+    cassette.mount(requests.Session(), path, 'rewind')
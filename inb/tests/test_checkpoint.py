@@ -0,0 +1,38 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from api import checkpoint
+
+
+def test_checkpoint_save_and_load(tmp_path):
+  checkpoint_ = checkpoint.Checkpoint('job', tmp_path / 'checkpoints')
+  assert checkpoint_.load() == {}
+
+  checkpoint_.save({'offset': 42})
+  assert checkpoint_.load() == {'offset': 42}
+  assert not list((tmp_path / 'checkpoints').glob('*.tmp'))
+
+  checkpoint_.clear()
+  assert checkpoint_.load() == {}
+
+
+def test_checkpoint_name_for():
+  name = checkpoint.Checkpoint.name_for('invite', 'user', '/tmp/targets.csv')
+  assert name == checkpoint.Checkpoint.name_for('invite', 'user',
+                                                '/tmp/targets.csv')
+  assert name != checkpoint.Checkpoint.name_for('invite', 'user',
+                                                '/tmp/other.csv')
+  assert name.isalnum()
@@ -0,0 +1,154 @@
+# pylint: disable=missing-module-docstring,protected-access
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+
+import time
+import pytest
+import threading
+
+from unittest import mock
+
+from requests import cookies
+
+from api import client, cookierepo, exceptions, linkedin_api, stats
+
+
+def _jar(expires: float, value: str = 'ajax:1') -> cookies.RequestsCookieJar:
+  jar = cookies.RequestsCookieJar()
+  jar.set_cookie(
+      cookies.create_cookie(name='JSESSIONID', value=value, expires=expires))
+  return jar
+
+
+def _client(tmp_path,
+            cached: cookies.RequestsCookieJar = None,
+            **kwargs) -> client.Client:
+  if cached is not None:
+    cookierepo.CookieRepository('username', cached, tmp_path).save()
+  return client.Client(cookies_dir=tmp_path, **kwargs)
+
+
+def _login(client_, jar):
+  """Returns a fake `_fallback_authentication` setting `jar`."""
+  return mock.patch.object(
+      client_,
+      '_fallback_authentication',
+      side_effect=lambda *_: client_._set_session_cookies(jar))
+
+
+def test_authenticate_probes_valid_cached_cookies(tmp_path):
+  client_ = _client(tmp_path, _jar(time.time() + 7 * 86400))
+  with mock.patch.object(client_.session, 'get',
+                         return_value=mock.Mock(status_code=200)) as mk_get, \
+      mock.patch.object(client_, '_fallback_authentication') as mk_login, \
+      mock.patch.object(client_, '_fetch_metadata') as mk_metadata:
+    client_.authenticate('username', 'password')
+
+  assert mk_get.call_args.args[0].endswith(client.Client.PROBE_URI)
+  mk_login.assert_not_called()
+  mk_metadata.assert_not_called()
+  assert client_.session.headers['csrf-token'] == 'ajax:1'
+  client_.close()
+
+
+@pytest.mark.parametrize('expires, probe_status', [
+    (time.time() - 60, None),
+    (time.time() + 60, None),
+    (time.time() + 7 * 86400, 401),
+])
+def test_authenticate_logs_in_without_valid_cached_cookies(
+    tmp_path, expires, probe_status):
+  client_ = _client(tmp_path, _jar(expires), refresh_margin=3600)
+  with mock.patch.object(
+      client_.session, 'get',
+      return_value=mock.Mock(status_code=probe_status)) as mk_get, \
+      _login(client_, _jar(time.time() + 7 * 86400, 'ajax:2')) as mk_login, \
+      mock.patch.object(client_, '_fetch_metadata'):
+    client_.authenticate('username', 'password')
+
+  assert mk_get.call_count == (probe_status is not None)
+  mk_login.assert_called_once_with('username', 'password')
+  assert client_.session.headers['csrf-token'] == 'ajax:2'
+  client_.close()
+
+
+def test_requests_log_in_again_when_rejected(tmp_path):
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   cookies_dir=tmp_path,
+                                   evade=lambda: None)
+  client_ = linkedin.client
+  client_._credentials = ('username', 'password')
+  client_._set_session_cookies(_jar(time.time() + 60))
+  reauthenticated = stats.STATS.get('session.reauthenticated')
+
+  with mock.patch.object(client_.session, 'get',
+                         side_effect=[mock.Mock(status_code=401),
+                                      mock.Mock(status_code=200)]) as mk_get, \
+      _login(client_, _jar(time.time() + 7 * 86400, 'ajax:2')) as mk_login:
+    assert linkedin._fetch('/me').status_code == 200
+
+  assert mk_get.call_count == 2
+  mk_login.assert_called_once()
+  assert stats.STATS.get('session.reauthenticated') == reauthenticated + 1
+  client_.close()
+
+
+def test_rejected_sessions_are_renewed_once(tmp_path):
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   cookies_dir=tmp_path,
+                                   evade=lambda: None)
+  client_ = linkedin.client
+  client_._credentials = ('username', 'password')
+  client_._set_session_cookies(_jar(time.time() + 60))
+
+  with mock.patch.object(client_.session, 'get',
+                         return_value=mock.Mock(status_code=401)) as mk_get, \
+      _login(client_, _jar(time.time() + 7 * 86400, 'ajax:2')) as mk_login:
+    assert linkedin._fetch('/me').status_code == 401
+    with pytest.raises(exceptions.LinkedInUnauthorizedException):
+      linkedin._fetch('/me')
+
+  assert mk_get.call_count == 3
+  mk_login.assert_called_once()
+  client_.close()
+
+
+def test_clients_without_password_do_not_log_in_again(tmp_path):
+  client_ = _client(tmp_path)
+  client_._set_session_cookies(_jar(time.time() + 60))
+  assert not client_.reauthenticate()
+  client_._credentials = ('username', '')
+  assert not client_.reauthenticate()
+
+
+def test_session_is_refreshed_before_it_expires(tmp_path):
+  client_ = _client(tmp_path, refresh_margin=3600)
+  client_._credentials = ('username', 'password')
+  client_._set_session_cookies(_jar(time.time() + 3601))
+  refreshed = threading.Event()
+
+  def login(*_):
+    client_._set_session_cookies(_jar(time.time() + 7 * 86400, 'ajax:2'))
+    refreshed.set()
+
+  with mock.patch.object(client_, '_fallback_authentication',
+                         side_effect=login):
+    client_._schedule_refresh()
+    assert refreshed.wait(10)
+
+  assert client_.session.headers['csrf-token'] == 'ajax:2'
+  client_.close()
@@ -0,0 +1,128 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import pytest
+
+from api import connections, paginator
+
+
+def _connection(i: int) -> dict:
+  return {
+      'urn_id': f'urn{i}',
+      'public_id': f'person-{i}',
+      'name': f'Person {i}',
+      'created_at': float(i)
+  }
+
+
+class _FakeLinkedIn(object):
+  """Serves `count` connections, newest first, in pages of `page_size`, at
+  most `max_pages` pages per walk, and fails on the page at `fail_at`.
+  """
+
+  def __init__(self,
+               count: int,
+               page_size: int = 2,
+               max_pages: int = None,
+               fail_at: int = None) -> None:
+    self.count = count
+    self.page_size = page_size
+    self.max_pages = max_pages
+    self.fail_at = fail_at
+    self.pages_fetched = 0
+
+  def fetch_page(self, start: int, count: int) -> list[dict]:
+    if start == self.fail_at:
+      raise ConnectionError
+    self.pages_fetched += 1
+    # Newest first.
+    return [
+        _connection(self.count - 1 - i)
+        for i in range(start, min(start + count, self.count))
+    ]
+
+  def iter_connections(self, offset: int = 0):
+    return paginator.Paginator(self.fetch_page,
+                               page_size=self.page_size,
+                               offset=offset,
+                               max_pages=self.max_pages)
+
+
+def test_sync_is_incremental(tmp_path):
+  snapshot = connections.ConnectionSnapshot('john@example.com', tmp_path)
+  assert snapshot.sync(_FakeLinkedIn(5)) == 5
+  assert snapshot.is_connected(urn_id='urn4')
+  assert snapshot.is_connected(public_id='person-0')
+  assert not snapshot.is_connected(urn_id='urn5', public_id='person-5')
+
+  linkedin = _FakeLinkedIn(8)
+  assert snapshot.sync(linkedin) == 3
+  # Stopped at the page holding urn4, the newest known connection.
+  assert linkedin.pages_fetched == 2
+  assert snapshot.is_connected(public_id='person-7')
+  assert len(snapshot) == 8
+  snapshot.close()
+
+
+def test_full_sync_drops_removed_connections(tmp_path):
+  snapshot = connections.ConnectionSnapshot('john@example.com', tmp_path)
+  snapshot.add([_connection(9)])
+  assert snapshot.sync(_FakeLinkedIn(3), full=True) == 3
+  assert not snapshot.is_connected(urn_id='urn9')
+  assert len(snapshot) == 3
+  snapshot.close()
+
+
+def test_interrupted_first_sync_resumes(tmp_path):
+  snapshot = connections.ConnectionSnapshot('john@example.com', tmp_path)
+  with pytest.raises(ConnectionError):
+    snapshot.sync(_FakeLinkedIn(7, fail_at=4))
+  assert len(snapshot) == 4
+  assert not snapshot.complete
+
+  # Resumes at the offset it stopped at, rather than stopping at the known
+  # newest connection: two pages, an empty page ending the walk and another
+  # one confirming the end of the pass.
+  linkedin = _FakeLinkedIn(7)
+  assert snapshot.sync(linkedin) == 3
+  assert linkedin.pages_fetched == 4
+  assert snapshot.complete
+  snapshot.close()
+
+
+def test_sync_walks_past_the_page_limit(tmp_path):
+  snapshot = connections.ConnectionSnapshot('john@example.com', tmp_path)
+  assert snapshot.sync(_FakeLinkedIn(7, max_pages=2)) == 7
+  assert snapshot.complete
+
+  # The new connections fill more pages than a walk fetches.
+  assert snapshot.sync(_FakeLinkedIn(14, max_pages=2)) == 7
+  assert len(snapshot) == 14
+  assert snapshot.complete
+  snapshot.close()
+
+
+def test_interrupted_sync_leaves_no_gap(tmp_path):
+  snapshot = connections.ConnectionSnapshot('john@example.com', tmp_path)
+  snapshot.sync(_FakeLinkedIn(3))
+  with pytest.raises(ConnectionError):
+    snapshot.sync(_FakeLinkedIn(9, fail_at=4))
+  # Nothing was stored, so the next sync still fetches urn3 to urn8.
+  assert len(snapshot) == 3
+  assert snapshot.sync(_FakeLinkedIn(9)) == 6
+  snapshot.close()
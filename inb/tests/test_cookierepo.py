@@ -67,13 +67,24 @@ class TestCookieRepository:
     loaded_cookie_jar = self.cookie_repo.get_cookies()
     assert loaded_cookie_jar == self.cookie_jar
 
-    # check expiration
+    # cookies still valid for a minute are returned as is
     self.cookie_jar['JSESSIONID'] = '123456'
+    fresh_cookie = cookies.RequestsCookieJar()
+    fresh_cookie.set_cookie(
+        cookies.create_cookie(name='JSESSIONID',
+                              value='9068257311',
+                              expires=time.time() + 60))
+    self.cookie_jar.update(fresh_cookie)
+    with open(cookie_jar_file_path, 'wb') as jar_file:
+      pickle.dump(self.cookie_jar, jar_file)
+    assert self.cookie_repo.get_cookies() == self.cookie_jar
+
+    # check expiration
     expired_cookie = cookies.RequestsCookieJar()
     expired_cookie.set_cookie(
         cookies.create_cookie(name='JSESSIONID',
                               value='9068257311',
-                              expires=time.time() + 60))
+                              expires=time.time() - 60))
     self.cookie_jar.update(expired_cookie)
     with open(cookie_jar_file_path, 'wb') as jar_file:
       pickle.dump(self.cookie_jar, jar_file)
@@ -82,3 +93,18 @@ class TestCookieRepository:
       assert False, 'Expected exception not raised'
     except linkedin_api_exceptions.LinkedInSessionExpiredException:
       assert True
+
+
+def test_is_expired():
+  jar = cookies.RequestsCookieJar()
+  assert cookierepo.expires_at(jar) is None
+  assert not cookierepo.is_expired(jar)
+
+  jar.set_cookie(cookies.create_cookie(name='li_at', value='x', expires=2000))
+  jar.set_cookie(
+      cookies.create_cookie(name='JSESSIONID', value='y', expires=1000))
+  jar.set_cookie(cookies.create_cookie(name='other', value='z', expires=10))
+  assert cookierepo.expires_at(jar) == 1000
+  assert not cookierepo.is_expired(jar, now=900)
+  assert cookierepo.is_expired(jar, margin=100, now=900)
+  assert cookierepo.is_expired(jar, now=1000)
@@ -0,0 +1,153 @@
+# pylint: disable=missing-module-docstring, redefined-outer-name
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import pytest
+
+from unittest import mock
+
+from api import daemon, jobqueue, outcome, exceptions as linkedin_api_exceptions
+
+
+@pytest.fixture()
+def queue(tmp_path):
+  queue_ = jobqueue.JobQueue(tmp_path)
+  yield queue_
+  queue_.close()
+
+
+def _people(count):
+  return [{
+      'public_id': f'person-{i}',
+      'urn_id': f'urn{i}',
+      'name': f'Person {i}',
+      'jobtitle': None,
+      'location': None
+  } for i in range(count)]
+
+
+def test_run_search_job(queue):
+  linkedin = mock.Mock()
+  linkedin.iter_search_people_pages.return_value = iter([_people(5)])
+  linkedin.add_connection.side_effect = [
+      outcome.Outcome.SUCCESS, outcome.Outcome.FAILED,
+      outcome.Outcome.ALREADY_INVITED, outcome.Outcome.SUCCESS,
+      outcome.Outcome.SUCCESS
+  ]
+  sessions = mock.Mock()
+  sessions.get.return_value = linkedin
+
+  job_id = queue.submit('a@example.com', 'search', {
+      'keywords': 'engineer',
+      'limit': 3,
+      'unknown': True
+  })
+  daemon.Daemon(queue, sessions).run_job(queue.claim())
+
+  job = queue.get(job_id)
+  assert job.state == jobqueue.STATE_DONE
+  assert job.progress == {
+      'invitations.failed': 1,
+      'invitations.sent': 3,
+      'invitations.skipped': 1
+  }
+  linkedin.iter_search_people_pages.assert_called_once_with(keywords='engineer')
+
+
+def test_run_search_job_renders_message_template(queue):
+  linkedin = mock.Mock()
+  linkedin.iter_search_people_pages.return_value = iter([_people(2)])
+  linkedin.add_connection.return_value = outcome.Outcome.SUCCESS
+  sessions = mock.Mock()
+  sessions.get.return_value = linkedin
+
+  queue.submit('a@example.com', 'search',
+               {'message_template': 'Hi {first_name}, {jobtitle|hello}!'})
+  daemon.Daemon(queue, sessions).run_job(queue.claim())
+
+  assert [
+      call.kwargs['message'] for call in linkedin.add_connection.call_args_list
+  ] == ['Hi Person, hello!', 'Hi Person, hello!']
+
+
+def test_run_job_requeues_when_stopped(queue):
+  linkedin = mock.Mock()
+  linkedin.iter_search_people_pages.return_value = iter([_people(5)])
+  linkedin.add_connection.return_value = outcome.Outcome.SUCCESS
+  sessions = mock.Mock()
+  sessions.get.return_value = linkedin
+
+  job_id = queue.submit('a@example.com', 'search', {})
+  daemon_ = daemon.Daemon(queue, sessions)
+  daemon_.stop()
+  daemon_.run_job(queue.claim())
+
+  assert queue.get(job_id).state == jobqueue.STATE_QUEUED
+  linkedin.add_connection.assert_not_called()
+
+
+def test_run_job_evicts_unauthorized_sessions(queue):
+  sessions = mock.Mock()
+  sessions.get.side_effect = (
+      linkedin_api_exceptions.LinkedInUnauthorizedException('no cookies'))
+
+  job_id = queue.submit('a@example.com', 'export', {})
+  daemon.Daemon(queue, sessions).run_job(queue.claim())
+
+  job = queue.get(job_id)
+  assert job.state == jobqueue.STATE_FAILED
+  assert 'no cookies' in job.error
+  sessions.evict.assert_called_once_with('a@example.com')
+
+
+def test_session_pool_closes_evicted_sessions(tmp_path):
+  with mock.patch.object(daemon.cookierepo, 'CookieRepository'), \
+      mock.patch.object(daemon.linkedin_api, 'LinkedIn') as mk_linkedin, \
+      mock.patch.object(daemon.quota, 'InvitationQuota'), \
+      mock.patch.object(daemon.outcome, 'NegativeCache'), \
+      mock.patch.object(daemon.urncache, 'UrnCache'):
+    mk_linkedin.side_effect = lambda *args, **kwargs: mock.Mock()
+    sessions = daemon.SessionPool(scheduler_factory=mock.Mock,
+                                  cookies_dir=tmp_path)
+    first, second = sessions.get('a@example.com'), sessions.get('b@example.com')
+    sessions.evict('a@example.com')
+    first.close.assert_called_once_with()
+    assert sessions.get('a@example.com') is not first
+
+    sessions.close()
+    assert first.close.call_count == 1
+    second.close.assert_called_once_with()
+
+
+def test_serve_forever_runs_queued_jobs(queue):
+  linkedin = mock.Mock()
+  linkedin.iter_search_people_pages.return_value = iter([])
+  sessions = mock.Mock()
+  sessions.get.return_value = linkedin
+
+  job_id = queue.submit('a@example.com', 'search', {})
+  daemon_ = daemon.Daemon(queue, sessions, poll_interval=0.01)
+  thread = threading.Thread(target=daemon_.serve_forever)
+  thread.start()
+  try:
+    for _ in range(500):
+      if queue.get(job_id).state == jobqueue.STATE_DONE:
+        break
+      threading.Event().wait(0.01)
+  finally:
+    daemon_.stop()
+    thread.join()
+  assert queue.get(job_id).state == jobqueue.STATE_DONE
@@ -0,0 +1,73 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import time
+import signal
+import pytest
+import threading
+
+from api import deadline
+from api.exceptions import LinkedInDeadlineExceededException
+
+
+def test_deadline_expires_after_max_runtime():
+  now = [100.0]
+  deadline_ = deadline.Deadline(10,
+                                connect_timeout=5,
+                                read_timeout=30,
+                                clock=lambda: now[0])
+  deadline_.check()
+  assert deadline_.timeout() == (5, 10)
+  now[0] += 8
+  assert deadline_.remaining() == 2
+  assert deadline_.timeout() == (2, 2)
+  now[0] += 2
+  assert deadline_.expired
+  with pytest.raises(LinkedInDeadlineExceededException,
+                     match='max runtime reached'):
+    deadline_.check()
+
+
+def test_unbounded_deadline_keeps_default_timeouts():
+  deadline_ = deadline.Deadline()
+  assert deadline_.remaining() is None
+  assert deadline_.timeout() == (deadline.CONNECT_TIMEOUT,
+                                 deadline.READ_TIMEOUT)
+  deadline_.check()
+
+
+def test_cancel_wakes_up_sleepers():
+  deadline_ = deadline.Deadline()
+  threading.Timer(0.05, deadline_.cancel, args=('stop',)).start()
+  started = time.monotonic()
+  deadline_.sleep(10)
+  assert time.monotonic() - started < 5
+  with pytest.raises(LinkedInDeadlineExceededException, match='stop'):
+    deadline_.check()
+
+
+def test_cancel_on_signals():
+  previous = signal.getsignal(signal.SIGINT)
+  deadline_ = deadline.Deadline()
+  with deadline.cancel_on_signals(deadline_, (signal.SIGINT,)):
+    os.kill(os.getpid(), signal.SIGINT)
+    assert deadline_.cancelled
+    assert deadline_.reason == 'received SIGINT'
+    # A second signal falls back to the previous handler.
+    with pytest.raises(KeyboardInterrupt):
+      os.kill(os.getpid(), signal.SIGINT)
+  assert signal.getsignal(signal.SIGINT) is previous
@@ -0,0 +1,92 @@
+# pylint: disable=missing-module-docstring, redefined-outer-name
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+import pytest
+
+from api import export
+
+_FIELDS = ('public_id', 'name', 'location')
+
+_PAGES = [
+    [{
+        'public_id': 'john-smith',
+        'name': 'John Smith',
+        'location': 'San Francisco, CA',
+        'jobtitle': 'Software Engineer'
+    }],
+    [{
+        'public_id': 'jane-doe',
+        'name': 'Jane Doe',
+        'location': None
+    }],
+]
+
+
+def test_jsonl_sink(tmp_path):
+  path = tmp_path / 'results.jsonl'
+  with export.open_sink(path, _FIELDS) as sink:
+    assert export.export_pages(_PAGES, sink) == 2
+
+  lines = path.read_text(encoding='utf-8').splitlines()
+  assert [json.loads(line) for line in lines] == [
+      {
+          'public_id': 'john-smith',
+          'name': 'John Smith',
+          'location': 'San Francisco, CA'
+      },
+      {
+          'public_id': 'jane-doe',
+          'name': 'Jane Doe',
+          'location': None
+      },
+  ]
+
+
+def test_csv_sink(tmp_path):
+  path = tmp_path / 'results.csv'
+  with export.open_sink(path, _FIELDS) as sink:
+    assert export.export_pages(_PAGES, sink) == 2
+
+  with open(path, encoding='utf-8', newline='') as csv_file:
+    rows = list(csv.DictReader(csv_file))
+  assert [row['public_id'] for row in rows] == ['john-smith', 'jane-doe']
+  assert rows[1]['location'] == ''
+
+
+def test_sink_flushes_every_page(tmp_path):
+  path = tmp_path / 'results.jsonl'
+  with export.open_sink(path, _FIELDS) as sink:
+    sink.write_page(_PAGES[0])
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 1
+
+
+def test_parquet_sink(tmp_path):
+  pytest.importorskip('pyarrow')
+  from pyarrow import parquet  # pylint: disable=import-outside-toplevel
+
+  path = tmp_path / 'results.parquet'
+  with export.open_sink(path, _FIELDS) as sink:
+    assert export.export_pages(_PAGES, sink) == 2
+  assert parquet.read_table(path).column('name').to_pylist() == [
+      'John Smith', 'Jane Doe'
+  ]
+
+
+def test_open_sink_with_unknown_format(tmp_path):
+  with pytest.raises(ValueError):
+    export.open_sink(tmp_path / 'results.xml', _FIELDS)
@@ -0,0 +1,67 @@
+# pylint: disable=missing-module-docstring, redefined-outer-name
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from api import jobqueue
+
+
+@pytest.fixture()
+def queue(tmp_path):
+  queue_ = jobqueue.JobQueue(tmp_path)
+  yield queue_
+  queue_.close()
+
+
+def test_submit_and_claim(queue):
+  first = queue.submit('a@example.com', 'export', {'keywords': 'engineer'})
+  second = queue.submit('a@example.com', 'search', {})
+  third = queue.submit('b@example.com', 'invite', {'from_file': 'x.csv'})
+
+  job = queue.claim()
+  assert (job.id, job.state, job.params) == (first, jobqueue.STATE_RUNNING, {
+      'keywords': 'engineer'
+  })
+  # Jobs of busy accounts are skipped.
+  assert queue.claim(['a@example.com']).id == third
+  assert queue.claim(['a@example.com', 'b@example.com']) is None
+  assert queue.claim().id == second
+  assert queue.claim() is None
+
+
+def test_progress_and_finish(queue):
+  job_id = queue.submit('a@example.com', 'search', {})
+  queue.claim()
+  queue.update_progress(job_id, {'invitations.sent': 3})
+  queue.finish(job_id, jobqueue.STATE_FAILED, 'boom')
+
+  job = queue.get(job_id)
+  assert job.state == jobqueue.STATE_FAILED
+  assert job.progress == {'invitations.sent': 3}
+  assert job.error == 'boom'
+  assert [job.id for job in queue.list(jobqueue.STATE_FAILED)] == [job_id]
+
+
+def test_requeue_running(queue):
+  job_id = queue.submit('a@example.com', 'search', {})
+  queue.claim()
+  assert queue.requeue_running() == 1
+  assert queue.get(job_id).state == jobqueue.STATE_QUEUED
+
+
+def test_submit_unknown_kind(queue):
+  with pytest.raises(ValueError):
+    queue.submit('a@example.com', 'unknown', {})
@@ -0,0 +1,571 @@
+# pylint: disable=missing-module-docstring, redefined-outer-name, protected-access
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import pytest
+import datetime
+
+from unittest import mock
+
+from api import (breaker, deadline, linkedin_api, outcome, pagecache, quota,
+                 stats, urncache)
+from api.exceptions import (LinkedInCircuitOpenException,
+                            LinkedInDeadlineExceededException,
+                            LinkedInQuotaExceededException,
+                            LinkedInSessionExpiredException)
+
+
+def _search_element(i: int, *, public: bool = True) -> dict:
+  element = {
+      'targetUrn': f'urn:li:fs_miniProfile:urn{i}',
+      'trackingUrn': f'urn:li:member:{i}',
+      'memberDistance': {
+          'value': 'DISTANCE_2'
+      },
+      'headline': {
+          'text': f'Engineer {i}'
+      },
+      'subline': {
+          'text': 'Berlin'
+      },
+      'title': {
+          'text': f'Person {i}'
+      },
+  }
+  if public:
+    element['publicIdentifier'] = f'person-{i}'
+  return element
+
+
+def _search_response(elements: list[dict]) -> mock.Mock:
+  response = mock.Mock(elapsed=datetime.timedelta(seconds=2))
+  response.json.return_value = {
+      'data': {
+          'elements': [{
+              'elements': elements
+          }] if elements else []
+      }
+  }
+  return response
+
+
+@pytest.fixture()
+def linkedin():
+  return linkedin_api.LinkedIn('username', 'password', authenticate=False)
+
+
+def test_iter_search_yields_pages_lazily(linkedin):
+  pages = [
+      _search_response([_search_element(0),
+                        _search_element(1)]),
+      _search_response([_search_element(2)]),
+      _search_response([]),
+  ]
+  with mock.patch.object(linkedin, '_fetch', side_effect=pages) as mk_fetch:
+    iterator = linkedin.iter_search({})
+    assert mk_fetch.call_count == 0
+    assert len(next(iterator)) == 2
+    assert mk_fetch.call_count == 1
+    assert len(next(iterator)) == 1
+    assert not list(iterator)
+    assert mk_fetch.call_count == 3
+
+
+def test_iter_search_respects_limit(linkedin):
+  pages = [_search_response([_search_element(i) for i in range(3)])]
+  with mock.patch.object(linkedin, '_fetch', side_effect=pages) as mk_fetch:
+    assert len(linkedin.search({}, limit=3)) == 3
+    assert mk_fetch.call_count == 1
+    assert 'count=3' in mk_fetch.call_args.args[0]
+
+
+def test_iter_search_drops_repeats_and_stops_on_low_yield(linkedin):
+  pages = [
+      _search_response([_search_element(i) for i in range(3)]),
+      _search_response([_search_element(2),
+                        _search_element(3)]),
+  ] + [_search_response([_search_element(0)])] * 3
+  with mock.patch.object(linkedin, '_fetch', side_effect=pages) as mk_fetch:
+    results = linkedin.search({'keywords': 'engineer'})
+
+  assert [result['targetUrn'][-4:] for result in results
+         ] == ['urn0', 'urn1', 'urn2', 'urn3']
+  assert mk_fetch.call_count == 5
+  assert linkedin.search_counters[linkedin.query_key(
+      {'keywords': 'engineer'})] == {
+          'pages_fetched': 5,
+          'elements_fetched': 8,
+          'elements_yielded': 4,
+          'duplicates': 4,
+          'stop_reason': 'low_yield'
+      }
+
+
+def test_iter_search_stops_at_reported_total(linkedin):
+  response = _search_response([_search_element(i) for i in range(2)])
+  response.json.return_value['data']['paging'] = {'total': 2}
+  with mock.patch.object(linkedin, '_fetch',
+                         side_effect=[response]) as mk_fetch:
+    assert len(linkedin.search({})) == 2
+    assert mk_fetch.call_count == 1
+
+
+def test_iter_search_people_pages_normalizes_results(linkedin):
+  pages = [
+      _search_response([_search_element(0),
+                        _search_element(1, public=False)]),
+      _search_response([]),
+  ]
+  with mock.patch.object(linkedin, '_fetch', side_effect=pages):
+    assert list(linkedin.iter_search_people_pages(keywords='engineer')) == [[{
+        'urn_id': 'urn0',
+        'distance': 'DISTANCE_2',
+        'public_id': 'person-0',
+        'tracking_id': '0',
+        'jobtitle': 'Engineer 0',
+        'location': 'Berlin',
+        'name': 'Person 0'
+    }]]
+
+
+def test_search_people_params_filters():
+  params = linkedin_api.LinkedIn._search_people_params(
+      'engineer', {
+          'regions': ('101', '102'),
+          'current_company': '1337',
+          'network_depth': 'S',
+          'schools': ()
+      })
+  assert params == {
+      'keywords':
+          'engineer',
+      'filters': ('List(resultType->PEOPLE,network->S,geoUrn->101|102,'
+                  'currentCompany->1337)')
+  }
+
+
+def test_iter_search_people_only_new(tmp_path):
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   seen_dir=tmp_path)
+
+  def run(pages):
+    with mock.patch.object(linkedin, '_fetch', side_effect=pages) as mk_fetch:
+      people = list(
+          linkedin.iter_search_people(keywords='engineer',
+                                      only_new=True,
+                                      max_stale_pages=2))
+    return [person['urn_id'] for person in people], mk_fetch.call_count
+
+  assert run([
+      _search_response([_search_element(0),
+                        _search_element(1)]),
+      _search_response([_search_element(4)]),
+      _search_response([]),
+  ]) == (['urn0', 'urn1', 'urn4'], 3)
+  # Stops after two consecutive pages without anything new, even though more
+  # pages would follow.
+  assert run([
+      _search_response([_search_element(2),
+                        _search_element(0)]),
+      _search_response([_search_element(1)]),
+      _search_response([_search_element(4)]),
+      _search_response([_search_element(3)]),
+  ]) == (['urn2'], 3)
+
+
+def test_resolve_urn_id_uses_cache(tmp_path):
+  cache = urncache.UrnCache(tmp_path)
+  cache.put('john-smith', 'ACoAAA1')
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   urn_cache=cache)
+  with mock.patch.object(linkedin, 'get_profile') as mk_get_profile:
+    assert linkedin.resolve_urn_id('john-smith') == 'ACoAAA1'
+    mk_get_profile.assert_not_called()
+
+    mk_get_profile.return_value = {
+        'profile_urn': 'urn:li:fs_miniProfile:ACoAAA2'
+    }
+    assert linkedin.resolve_urn_id('jane-doe') == 'ACoAAA2'
+    assert cache.get('jane-doe') == 'ACoAAA2'
+  cache.close()
+
+
+def test_iter_search_serves_pages_from_cache(tmp_path):
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   page_cache=pagecache.PageCache(
+                                       'username', tmp_path))
+  page = _search_response([_search_element(0)])
+  page.status_code = 200
+  with mock.patch.object(linkedin, '_fetch', return_value=page) as mk_fetch:
+    assert len(linkedin.search({}, limit=1)) == 1
+    assert len(linkedin.search({}, limit=1)) == 1
+    assert mk_fetch.call_count == 1
+
+
+def _sent_invitation(i: int, sent_time: float) -> dict:
+  return {
+      'invitation': {
+          'entityUrn': f'urn:li:fs_relInvitation:{i}',
+          'sharedSecret': f'secret{i}',
+          'sentTime': int(sent_time * 1000),
+          'toMember': {
+              'entityUrn': f'urn:li:fs_miniProfile:urn{i}',
+              'firstName': 'Person',
+              'lastName': str(i),
+              'publicIdentifier': f'person-{i}'
+          }
+      }
+  }
+
+
+def test_withdraw_stale_invitations(linkedin):
+  # Newest first: 0-2 are fresh, 3-6 are stale.
+  sent = [_sent_invitation(i, 1000.0 - i * 100) for i in range(7)]
+
+  def fetch(uri, **_):
+    params = dict(param.split('=') for param in uri.split('?')[1].split('&'))
+    start, count = int(params['start']), int(params['count'])
+    response = mock.Mock()
+    response.json.return_value = {'elements': sent[start:start + count]}
+    return response
+
+  def post(uri, **_):
+    sent[:] = [
+        element for element in sent
+        if not uri.startswith('/relationships/invitations/' +
+                              element['invitation']['entityUrn'][-1] + '?')
+    ]
+    return mock.Mock(status_code=200)
+
+  with mock.patch.object(linkedin_api.LinkedIn, 'MAX_INVITATIONS_COUNT', 2), \
+      mock.patch.object(linkedin, '_fetch', side_effect=fetch), \
+      mock.patch.object(linkedin, '_post', side_effect=post):
+    results = list(linkedin.withdraw_stale_invitations(450, now=1000.0))
+
+  assert [(invitation['public_id'], ok) for invitation, ok in results] == [
+      ('person-0', None),
+      ('person-1', None),
+      ('person-2', None),
+      ('person-3', None),
+      ('person-4', None),
+      ('person-5', True),
+      ('person-6', True),
+  ]
+  assert results[0][0]['name'] == 'Person 0'
+  assert len(sent) == 5
+
+
+def _profile(i: int) -> dict:
+  return {
+      'firstName': f'Person {i}',
+      'defaultLocale': {},
+      'supportedLocales': [],
+      'versionTag': '1',
+      'showEducationOnProfileTopCard': True,
+      'miniProfile': {
+          'entityUrn': f'urn:li:fs_miniProfile:urn{i}',
+          'objectUrn': f'urn:li:member:{i}',
+          'publicIdentifier': f'person-{i}'
+      }
+  }
+
+
+def test_get_profiles_batches_requests(linkedin):
+  batch = mock.Mock(status_code=200)
+  batch.json.return_value = {
+      'results': {
+          'person-0': _profile(0),
+          'person-1': _profile(1)
+      }
+  }
+  single = mock.Mock(status_code=200)
+  single.json.return_value = {'profile': _profile(2)}
+  with mock.patch.object(linkedin, '_fetch', side_effect=[batch,
+                                                          single]) as mk_fetch:
+    profiles = list(
+        linkedin.get_profiles(['person-0', 'person-1', 'person-2'],
+                              batch_size=3))
+
+  assert [(id_, profile['public_id']) for id_, profile in profiles] == [
+      ('person-0', 'person-0'),
+      ('person-1', 'person-1'),
+      ('person-2', 'person-2'),
+  ]
+  assert profiles[0][1]['profile_id'] == 'urn0'
+  assert 'versionTag' not in profiles[0][1]
+  assert mk_fetch.call_args_list[0].args[0] == (
+      '/identity/profiles?ids=List(person-0,person-1,person-2)')
+  assert mk_fetch.call_args_list[1].args[0] == (
+      '/identity/profiles/person-2/profileView')
+
+
+def test_get_profiles_falls_back_to_single_requests(linkedin):
+
+  def fetch(uri, **_):
+    if uri.startswith('/identity/profiles?'):
+      return mock.Mock(status_code=400)
+    i = int(uri.split('/')[3].split('-')[1])
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {'profile': _profile(i)}
+    return response
+
+  with mock.patch.object(linkedin, '_fetch', side_effect=fetch) as mk_fetch:
+    profiles = list(
+        linkedin.get_profiles([f'person-{i}' for i in range(5)], batch_size=2))
+
+  assert [profile['public_id'] for _, profile in profiles
+         ] == [f'person-{i}' for i in range(5)]
+  # The batch end-point is only tried once.
+  assert sum(call.args[0].startswith('/identity/profiles?')
+             for call in mk_fetch.call_args_list) == 1
+
+
+def test_get_profiles_reports_malformed_profiles_as_missing(linkedin):
+  batch = mock.Mock(status_code=400)
+  malformed = mock.Mock(status_code=200)
+  malformed.json.return_value = {'included': []}
+  broken_mini_profile = mock.Mock(status_code=200)
+  broken_mini_profile.json.return_value = {
+      'profile': {
+          'miniProfile': {
+              'publicIdentifier': 'person-1'
+          }
+      }
+  }
+  with mock.patch.object(linkedin,
+                         '_fetch',
+                         side_effect=[batch, malformed, broken_mini_profile]):
+    profiles = list(linkedin.get_profiles(['person-0', 'person-1']))
+
+  assert profiles == [('person-0', {}), ('person-1', {})]
+
+
+def test_iter_connections_normalizes_pages(linkedin):
+  response = mock.Mock()
+  response.json.return_value = {
+      'elements': [{
+          'createdAt': 1500000,
+          'miniProfile': {
+              'entityUrn': 'urn:li:fs_miniProfile:urn0',
+              'firstName': 'Person',
+              'lastName': '0',
+              'publicIdentifier': 'person-0',
+              'occupation': 'Engineer'
+          }
+      }, {
+          'miniProfile': {}
+      }]
+  }
+  with mock.patch.object(linkedin, '_fetch', return_value=response) as mk_fetch:
+    pages = list(linkedin.iter_connections(limit=1))
+
+  assert pages == [[{
+      'urn_id': 'urn0',
+      'public_id': 'person-0',
+      'name': 'Person 0',
+      'jobtitle': 'Engineer',
+      'created_at': 1500.0
+  }]]
+  assert mk_fetch.call_args.args[0] == (
+      '/relationships/connections?count=1&sortType=RECENTLY_ADDED&start=0')
+
+
+def test_iter_connections_warns_at_the_page_limit(linkedin):
+  response = mock.Mock()
+  response.json.return_value = {
+      'elements': [{
+          'miniProfile': {
+              'entityUrn': 'urn:li:fs_miniProfile:urn0'
+          }
+      }]
+  }
+  with mock.patch.object(linkedin, '_fetch', return_value=response), \
+      mock.patch.object(linkedin_api.LinkedIn, '_MAX_REPEATED_REQUEST', 2), \
+      mock.patch.object(linkedin, '_logger') as mk_logger:
+    assert len(list(linkedin.iter_connections())) == 2
+
+  mk_logger.warning.assert_called_once()
+
+
+def test_add_connection_tracks_quota(tmp_path):
+  quota_ = quota.InvitationQuota('username', limit=2, quota_dir=tmp_path)
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   quota_=quota_)
+  exceeded = mock.Mock(status_code=400)
+  exceeded.json.return_value = {'data': {'code': 'FUSE_LIMIT_EXCEEDED'}}
+  with mock.patch.object(linkedin,
+                         '_post',
+                         side_effect=[mock.Mock(status_code=201),
+                                      exceeded]) as mk_post:
+    assert linkedin.add_connection(
+        'person-0', profile_urn='urn0') is outcome.Outcome.SUCCESS
+    assert quota_.used() == 1
+    with pytest.raises(LinkedInQuotaExceededException):
+      linkedin.add_connection('person-1', profile_urn='urn1')
+    # Blocked from now on, without another request.
+    with pytest.raises(LinkedInQuotaExceededException):
+      linkedin.add_connection('person-2', profile_urn='urn2')
+    assert mk_post.call_count == 2
+
+
+def _action_response(status_code: int, code: str = None) -> mock.Mock:
+  response = mock.Mock(status_code=status_code)
+  response.json.return_value = {'data': {'code': code}} if code else {}
+  return response
+
+
+def test_add_connection_caches_permanent_outcomes(tmp_path):
+  negative_cache = outcome.NegativeCache('username', cache_dir=tmp_path)
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   evade=lambda: None,
+                                   negative_cache=negative_cache)
+  with mock.patch.object(linkedin,
+                         '_post',
+                         return_value=_action_response(
+                             400, 'CANT_RESEND_YET')) as mk_post:
+    assert linkedin.add_connection(
+        'person-0', profile_urn='urn0') is outcome.Outcome.ALREADY_INVITED
+    # Known by either id from now on, without another request.
+    assert linkedin.add_connection(
+        'person-0', profile_urn='urn0') is outcome.Outcome.ALREADY_INVITED
+    assert not linkedin.add_connection('person-x', profile_urn='urn0')
+    assert mk_post.call_count == 1
+
+
+def test_add_connection_retries_transient_failures():
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   evade=lambda: None)
+  with mock.patch.object(linkedin,
+                         '_post',
+                         side_effect=[
+                             _action_response(503),
+                             _action_response(502),
+                             _action_response(201)
+                         ]) as mk_post:
+    assert linkedin.add_connection('person-0', profile_urn='urn0')
+    assert mk_post.call_count == 3
+
+  with mock.patch.object(linkedin, '_post',
+                         return_value=_action_response(500)) as mk_post:
+    assert linkedin.add_connection(
+        'person-0', profile_urn='urn0') is outcome.Outcome.TRANSIENT
+    assert mk_post.call_count == linkedin_api.LinkedIn._MAX_TRANSIENT_ATTEMPTS
+
+
+def test_profile_actions_classify_responses(linkedin):
+  with mock.patch.object(linkedin, '_post',
+                         return_value=_action_response(200)) as mk_post:
+    assert linkedin.remove_connection('person-0') is outcome.Outcome.SUCCESS
+    assert linkedin.unfollow_connection('urn0') is outcome.Outcome.SUCCESS
+    mk_post.return_value = _action_response(404)
+    assert linkedin.unfollow_connection('urn0') is outcome.Outcome.FAILED
+    mk_post.return_value = _action_response(401)
+    with pytest.raises(LinkedInSessionExpiredException):
+      linkedin.remove_connection('person-0')
+
+
+def test_requests_respect_the_deadline():
+  deadline_ = deadline.Deadline(60, connect_timeout=5, read_timeout=20)
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   evade=lambda: None,
+                                   deadline_=deadline_)
+  with mock.patch.object(linkedin.client, 'session') as mk_session:
+    linkedin._fetch('/me')
+    assert mk_session.get.call_args.kwargs['timeout'] == (5, 20)
+    deadline_.cancel('interrupted')
+    with pytest.raises(LinkedInDeadlineExceededException):
+      linkedin._fetch('/me')
+    with pytest.raises(LinkedInDeadlineExceededException):
+      linkedin.add_connection('person-0', profile_urn='urn0')
+    assert mk_session.get.call_count == 1
+    mk_session.post.assert_not_called()
+
+
+def test_profile_action_timeouts_are_transient(linkedin):
+  with mock.patch.object(linkedin,
+                         '_post',
+                         side_effect=linkedin_api.requests.Timeout):
+    assert linkedin.unfollow_connection('urn0') is outcome.Outcome.TRANSIENT
+
+
+def test_search_people_spills_past_the_memory_budget(tmp_path):
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   spill_bytes=0)
+  pages = [
+      _search_response([_search_element(i) for i in range(3)]),
+      _search_response([]),
+  ]
+  with mock.patch.object(linkedin, '_fetch', side_effect=pages), \
+      mock.patch('tempfile.tempdir', str(tmp_path)):
+    results = linkedin.search_people(keywords='engineer')
+    assert results.spilled
+    assert [person['public_id'] for person in results
+           ] == ['person-0', 'person-1', 'person-2']
+
+
+def test_open_breaker_rejects_requests_before_pacing_them():
+  evade = mock.Mock()
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   evade=evade,
+                                   breakers=breaker.CircuitBreakers(
+                                       min_calls=2, stats_=stats.Stats()))
+  with mock.patch.object(linkedin.client, 'session') as mk_session:
+    mk_session.post.return_value = _action_response(503)
+    with pytest.raises(LinkedInCircuitOpenException):
+      linkedin.add_connection('person-0', profile_urn='urn0')
+    assert mk_session.post.call_count == 2
+    assert evade.call_count == 2
+
+    with pytest.raises(LinkedInCircuitOpenException):
+      linkedin.add_connection('person-1', profile_urn='urn1')
+    assert mk_session.post.call_count == 2
+    assert evade.call_count == 2
+    # Other endpoints are unaffected.
+    linkedin._fetch('/me')
+    assert mk_session.get.call_count == 1
+
+
+def test_close_releases_the_stores_of_the_client():
+  quota_, negative_cache = mock.Mock(), mock.Mock()
+  linkedin = linkedin_api.LinkedIn('username',
+                                   'password',
+                                   authenticate=False,
+                                   quota_=quota_,
+                                   negative_cache=negative_cache)
+  with mock.patch.object(linkedin.client, 'close') as mk_close:
+    linkedin.close()
+  mk_close.assert_called_once_with()
+  quota_.close.assert_called_once_with()
+  negative_cache.close.assert_called_once_with()
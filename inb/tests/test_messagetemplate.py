@@ -0,0 +1,62 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from api import messagetemplate
+
+
+def test_template_renders_fields_and_first_name():
+  template = messagetemplate.MessageTemplate(
+      'Hi {first_name}, a fellow {jobtitle} in {location} here.')
+  assert template.render({
+      'name': 'Dr. Jane  Doe',
+      'jobtitle': 'Python\nEngineer',
+      'location': 'Berlin',
+  }) == 'Hi Jane, a fellow Python Engineer in Berlin here.'
+
+
+def test_template_falls_back_on_missing_fields():
+  template = messagetemplate.MessageTemplate('Hi {first_name|there}!')
+  assert template.render({'name': None}) == 'Hi there!'
+  assert template.render({}) == 'Hi there!'
+  assert messagetemplate.MessageTemplate('{{literal}} {location}').render(
+      {'location': 'Remote'}) == '{literal} Remote'
+
+
+@pytest.mark.parametrize(
+    'template',
+    ['Hi {nickname}', 'Hi {name!r}', 'Hi {name:>10}', 'Hi {name', 'x' * 301])
+def test_template_is_validated_on_construction(template):
+  with pytest.raises(ValueError):
+    messagetemplate.MessageTemplate(template)
+
+
+def test_truncate_never_splits_words():
+  assert messagetemplate.truncate('short', 10) == 'short'
+  assert messagetemplate.truncate('one two three', 9) == 'one two'
+  assert messagetemplate.truncate('one two, three', 11) == 'one two'
+  # The cut lands right before a space.
+  assert messagetemplate.truncate('one two three', 7) == 'one two'
+  assert messagetemplate.truncate('abcdefghij', 4) == 'abcd'
+
+
+def test_rendered_message_respects_max_length():
+  template = messagetemplate.MessageTemplate('Hi {name}, {jobtitle}',
+                                             max_length=60)
+  message = template.render({'name': 'Jane Doe', 'jobtitle': 'word ' * 50})
+  assert len(message) <= 60
+  assert message.endswith('word')
@@ -0,0 +1,91 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from unittest import mock
+
+from api import outcome
+
+
+def _response(status_code, body=None):
+  response = mock.Mock(status_code=status_code)
+  if body is None:
+    response.json.side_effect = ValueError
+  else:
+    response.json.return_value = body
+  return response
+
+
+@pytest.mark.parametrize('status_code, body, expected', [
+    (201, None, outcome.Outcome.SUCCESS),
+    (429, None, outcome.Outcome.QUOTA_EXCEEDED),
+    (400, {
+        'data': {
+            'code': 'FUSE_LIMIT_EXCEEDED'
+        }
+    }, outcome.Outcome.QUOTA_EXCEEDED),
+    (400, {
+        'code': 'CANT_RESEND_YET'
+    }, outcome.Outcome.ALREADY_INVITED),
+    (409, {}, outcome.Outcome.ALREADY_INVITED),
+    (400, {
+        'data': {
+            'code': 'EMAIL_REQUIRED'
+        }
+    }, outcome.Outcome.CANNOT_INVITE),
+    (401, None, outcome.Outcome.UNAUTHORIZED),
+    (503, None, outcome.Outcome.TRANSIENT),
+    (400, ['unexpected'], outcome.Outcome.FAILED),
+])
+def test_classify_invitation(status_code, body, expected):
+  assert outcome.classify_invitation(_response(status_code, body)) is expected
+
+
+def test_classify_profile_actions():
+  assert outcome.classify(_response(200)) is outcome.Outcome.SUCCESS
+  assert outcome.classify(_response(429)) is outcome.Outcome.TRANSIENT
+  assert outcome.classify(_response(404)) is outcome.Outcome.FAILED
+
+
+def test_only_success_is_truthy():
+  assert [bool(outcome_) for outcome_ in outcome.Outcome] == [
+      outcome_ is outcome.Outcome.SUCCESS for outcome_ in outcome.Outcome
+  ]
+
+
+def test_negative_cache_keeps_permanent_outcomes(tmp_path):
+  now = [1000.0]
+  cache = outcome.NegativeCache('username',
+                                ttl=100,
+                                cache_dir=tmp_path,
+                                clock=lambda: now[0])
+  cache.put(outcome.Outcome.TRANSIENT, ('urn0',))
+  cache.put(outcome.Outcome.CANNOT_INVITE, ('urn1', 'person-1', None))
+  assert len(cache) == 2
+  assert cache.get('urn0') is None
+  assert cache.get(None, 'person-1') is outcome.Outcome.CANNOT_INVITE
+  cache.close()
+
+  # Persists across instances and expires after the ttl.
+  cache = outcome.NegativeCache('username',
+                                ttl=100,
+                                cache_dir=tmp_path,
+                                clock=lambda: now[0])
+  assert cache.get('urn1') is outcome.Outcome.CANNOT_INVITE
+  now[0] += 101
+  assert cache.get('urn1') is None
+  cache.close()
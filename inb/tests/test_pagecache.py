@@ -0,0 +1,78 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import time
+
+from api import pagecache
+
+_PAGE = {'data': {'elements': [{'elements': [{'targetUrn': 'urn:li:x:1'}]}]}}
+
+
+def test_page_cache_key_is_canonical():
+  assert pagecache.PageCache.key({
+      'start': 0,
+      'count': '49'
+  }) == pagecache.PageCache.key({
+      'count': '49',
+      'start': 0
+  })
+  assert pagecache.PageCache.key({'start': 0
+                                 }) != pagecache.PageCache.key({'start': 49})
+
+
+def test_page_cache_put_and_get(tmp_path):
+  cache = pagecache.PageCache('username', tmp_path)
+  assert cache.get({'start': 0}) is None
+
+  cache.put({'start': 0}, _PAGE)
+  assert cache.get({'start': 0}) == _PAGE
+  assert (cache.hits, cache.misses) == (1, 1)
+
+  # Entries survive across instances.
+  assert pagecache.PageCache('username', tmp_path).get({'start': 0}) == _PAGE
+
+
+def test_page_cache_ttl(tmp_path):
+  cache = pagecache.PageCache('username', tmp_path, ttl=60)
+  cache.put({'start': 0}, _PAGE)
+  for path in cache.cache_dir.iterdir():
+    os.utime(path, (time.time() - 120, time.time() - 120))
+  assert cache.get({'start': 0}) is None
+
+
+def test_page_cache_eviction(tmp_path):
+  cache = pagecache.PageCache('username', tmp_path, max_bytes=1)
+  cache.put({'start': 0}, _PAGE)
+  cache.put({'start': 49}, _PAGE)
+  assert cache.get({'start': 0}) is None
+  assert cache.get({'start': 49}) is None
+  assert not list(cache.cache_dir.iterdir())
+
+  cache = pagecache.PageCache('username', tmp_path)
+  cache.put({'start': 0}, _PAGE)
+  first_path = next(cache.cache_dir.iterdir())
+  os.utime(first_path, (time.time() - 10, time.time() - 10))
+  cache.max_bytes = first_path.stat().st_size + 1
+  cache.put({'start': 49}, _PAGE)
+  assert cache.get({'start': 0}) is None
+  assert cache.get({'start': 49}) == _PAGE
+
+
+def test_page_cache_is_per_account(tmp_path):
+  pagecache.PageCache('username', tmp_path).put({'start': 0}, _PAGE)
+  assert pagecache.PageCache('username', tmp_path).get({'start': 0}) == _PAGE
+  assert pagecache.PageCache('other', tmp_path).get({'start': 0}) is None
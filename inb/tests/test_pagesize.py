@@ -0,0 +1,68 @@
+# pylint: disable=missing-module-docstring,protected-access
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from api import pagesize
+
+from tests import voyager_stub
+
+
+def test_page_size_grows_on_fast_full_pages():
+  size = pagesize.AdaptivePageSize(initial=40, maximum=100)
+  size.on_page(40, 40, 0.1)
+  assert size.size == 70
+  # Slow responses keep the size.
+  size.on_page(70, 70, 5.0)
+  assert size.size == 70
+  size.on_page(70, 70, 0.1)
+  assert size.size == 85
+
+
+def test_page_size_shrinks_on_errors_and_capped_pages():
+  size = pagesize.AdaptivePageSize(initial=80, minimum=10, maximum=100)
+  assert size.on_error(80)
+  assert (size.size, size.maximum) == (40, 79)
+  size.on_page(40, 40, 0.1)
+  assert size.size == 60
+  # Falls back to the largest size served so far.
+  assert size.on_error(60)
+  assert (size.size, size.maximum) == (40, 59)
+  size.on_page(40, 30, 0.1)
+  assert (size.size, size.maximum) == (30, 30)
+  size.on_page(30, 30, 0.1)
+  assert size.size == 30
+  assert not pagesize.AdaptivePageSize(initial=10).on_error(10)
+
+
+def test_search_adapts_to_voyager_limit():
+  # A server that rejects counts above 40 is probed back up to 40 after the
+  # first rejection, which takes fewer requests than settling on half of 49.
+  stub = voyager_stub.VoyagerStub(1000, max_count=40, latency=0.1)
+  linkedin = stub.linkedin()
+  assert len(linkedin.search({})) == 1000
+  assert linkedin._search_page_size.size == 40
+  assert stub.requests == 29
+
+  stub = voyager_stub.VoyagerStub(1000, max_count=40, latency=0.1)
+  linkedin = stub.linkedin()
+  linkedin._search_page_size.fast_response = -1
+  assert len(linkedin.search({})) == 1000
+  assert linkedin._search_page_size.size == 24
+  assert stub.requests == 43
+
+  stub = voyager_stub.VoyagerStub(1000, max_count=30, cap=True, latency=0.1)
+  linkedin = stub.linkedin()
+  assert len(linkedin.search({})) == 1000
+  assert linkedin._search_page_size.size == 30
@@ -0,0 +1,115 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from api import paginator
+
+
+class _Collection:
+
+  def __init__(self, size):
+    self.elements = list(range(size))
+    self.requests = []
+
+  def fetch_page(self, start, count):
+    self.requests.append((start, count))
+    return self.elements[start:start + count]
+
+
+def test_paginator_walks_all_pages():
+  collection = _Collection(25)
+  pages = list(paginator.Paginator(collection.fetch_page, page_size=10))
+  assert [len(page) for page in pages] == [10, 10, 5]
+  assert collection.requests == [(0, 10), (10, 10), (20, 10), (25, 10)]
+
+
+def test_paginator_limit_and_offset():
+  collection = _Collection(25)
+  paginator_ = paginator.Paginator(collection.fetch_page,
+                                   page_size=10,
+                                   limit=12,
+                                   offset=3)
+  assert [element for page in paginator_ for element in page
+         ] == list(range(3, 15))
+  assert collection.requests == [(3, 10), (13, 2)]
+  assert paginator_.elements_yielded == 12
+
+
+def test_paginator_zero_limit():
+  collection = _Collection(25)
+  assert not list(
+      paginator.Paginator(collection.fetch_page, page_size=10, limit=0))
+  assert not collection.requests
+
+
+def test_paginator_closed_by_consumer():
+  collection = _Collection(25)
+  paginator_ = paginator.Paginator(collection.fetch_page, page_size=10)
+  pages = iter(paginator_)
+  next(pages)
+  pages.close()
+  assert paginator_.stop_reason == paginator.STOP_CLOSED
+
+
+def test_paginator_max_pages():
+  collection = _Collection(25)
+  paginator_ = paginator.Paginator(collection.fetch_page,
+                                   page_size=10,
+                                   max_pages=2)
+  assert len(list(paginator_)) == 2
+  assert paginator_.pages_fetched == 2
+
+
+def test_paginator_rewind():
+  collection = _Collection(25)
+  paginator_ = paginator.Paginator(collection.fetch_page, page_size=10)
+  seen = []
+  for page in paginator_:
+    seen.extend(page)
+    # Remove the even elements of the page from the collection.
+    removed = [element for element in page if element % 2 == 0]
+    for element in removed:
+      collection.elements.remove(element)
+    paginator_.rewind(len(removed))
+  assert seen == list(range(25))
+
+
+def test_paginator_deduplicates_and_stops_on_low_yield():
+  pages = [[1, 2, 3], [3, 4, 4], [1, 2, 3], [2, 3, 4], [5]]
+  paginator_ = paginator.Paginator(lambda start, count: pages.pop(0),
+                                   page_size=3,
+                                   key=lambda element: element,
+                                   min_yield=0.5,
+                                   max_low_yield_pages=2)
+  assert list(paginator_) == [[1, 2, 3], [4]]
+  assert paginator_.counters() == {
+      'pages_fetched': 3,
+      'elements_fetched': 9,
+      'elements_yielded': 4,
+      'duplicates': 5,
+      'stop_reason': paginator.STOP_LOW_YIELD
+  }
+
+
+def test_paginator_stops_at_total():
+  collection = _Collection(25)
+
+  def fetch_page(start, count):
+    paginator_.total = 15
+    return collection.fetch_page(start, count)
+
+  paginator_ = paginator.Paginator(fetch_page, page_size=10)
+  assert [len(page) for page in paginator_] == [10, 10]
+  assert paginator_.stop_reason == paginator.STOP_TOTAL
@@ -0,0 +1,76 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from api import quota
+from api.exceptions import LinkedInQuotaExceededException
+
+
+class _Clock:
+
+  def __init__(self):
+    self.now = 1_000_000.0
+
+  def __call__(self):
+    return self.now
+
+
+def test_quota_rolling_window(tmp_path):
+  clock = _Clock()
+  quota_ = quota.InvitationQuota('a@example.com',
+                                 limit=2,
+                                 window=100,
+                                 quota_dir=tmp_path,
+                                 clock=clock)
+  quota_.record()
+  clock.now += 60
+  quota_.record()
+  assert quota_.remaining() == 0
+  with pytest.raises(LinkedInQuotaExceededException):
+    quota_.check()
+
+  # The first invitation ages out of the window.
+  clock.now += 41
+  assert quota_.remaining() == 1
+  # Other accounts and other processes see their own and the same counts.
+  assert quota.InvitationQuota('b@example.com',
+                               limit=2,
+                               quota_dir=tmp_path,
+                               clock=clock).remaining() == 2
+  assert quota.InvitationQuota('a@example.com',
+                               limit=2,
+                               window=100,
+                               quota_dir=tmp_path,
+                               clock=clock).used() == 1
+
+
+def test_quota_mark_exhausted(tmp_path):
+  clock = _Clock()
+  quota_ = quota.InvitationQuota('a@example.com',
+                                 limit=10,
+                                 window=100,
+                                 quota_dir=tmp_path,
+                                 clock=clock)
+  quota_.record()
+  clock.now += 30
+  quota_.mark_exhausted()
+  assert quota_.remaining() == 0
+  assert quota_.blocked_until() == clock.now + 70
+
+  clock.now += 70
+  assert quota_.blocked_until() is None
+  assert quota_.remaining() == 10
@@ -0,0 +1,141 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from api import ranking
+
+_PAGE = [
+    {
+        'public_id': 'a',
+        'jobtitle': 'Junior Python Developer',
+        'location': 'Berlin',
+        'distance': 'DISTANCE_2'
+    },
+    {
+        'public_id': 'b',
+        'jobtitle': 'Senior Python Engineer | Go',
+        'location': 'Munich',
+        'distance': 'DISTANCE_3'
+    },
+    {
+        'public_id': 'c',
+        'jobtitle': 'Recruiter',
+        'location': 'Berlin',
+        'distance': 'DISTANCE_2'
+    },
+    {
+        'public_id': 'd',
+        'jobtitle': None,
+        'location': 'Python\nBerlin',
+        'distance': 'DISTANCE_2'
+    },
+    {
+        'public_id': 'e',
+        'jobtitle': 'Go Engineer',
+        'location': 'Hamburg',
+        'distance': 'DISTANCE_2'
+    },
+]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+  if request.param == 'python':
+    monkeypatch.setattr(ranking, 'numpy', None)
+  elif ranking.numpy is None:
+    pytest.skip('numpy is not installed')
+
+
+def _ids(page):
+  return [person['public_id'] for person in page]
+
+
+def test_include_exclude(backend):  # pylint: disable=unused-argument,redefined-outer-name
+  page_filter = ranking.PageFilter(include=['python', 'go'], exclude=['junior'])
+  # "b" mentions both keywords, so it ranks first.
+  assert _ids(page_filter.apply(_PAGE)) == ['b', 'd', 'e']
+
+
+def test_patterns_distances_and_min_score(backend):  # pylint: disable=unused-argument,redefined-outer-name
+  assert _ids(ranking.PageFilter(location='^berlin$').apply(_PAGE)) == [
+      'a', 'c'
+  ]
+  assert _ids(
+      ranking.PageFilter(jobtitle=r'engineer\b',
+                         distances=['DISTANCE_2']).apply(_PAGE)) == ['e']
+  assert _ids(
+      ranking.PageFilter(terms={
+          'engineer': 2,
+          'senior': 1
+      }, min_score=1).apply(_PAGE)) == ['b', 'e']
+
+
+def test_matches_do_not_span_rows(backend):  # pylint: disable=unused-argument,redefined-outer-name
+  page = [{'jobtitle': 'Lead'}, {'jobtitle': 'Engineer'}, {'jobtitle': 'x'}]
+  assert ranking.PageFilter(jobtitle=r'lead\s+engineer').apply(page) == []
+
+
+def test_empty_filter_keeps_pages():
+  page_filter = ranking.PageFilter()
+  assert not page_filter
+  assert page_filter.apply(_PAGE) is _PAGE
+  assert not list(
+      ranking.PageFilter(include=['nobody']).iter_pages([_PAGE, []]))
+
+
+def test_nested_keywords_match_independently(backend):  # pylint: disable=unused-argument,redefined-outer-name
+  page = [{
+      'public_id': 'a',
+      'jobtitle': 'Technical Recruiter'
+  }, {
+      'public_id': 'b',
+      'jobtitle': 'Senior Engineer'
+  }]
+  assert _ids(
+      ranking.PageFilter(exclude=['recruiter'],
+                         terms={
+                             'technical recruiter': 1
+                         }).apply(page)) == ['b']
+  assert _ids(
+      ranking.PageFilter(include=['engineer'], terms={
+          'senior engineer': 1
+      }).apply(page)) == ['b']
+  # Both keywords score.
+  assert ranking.PageFilter(terms={
+      'engineer': 1,
+      'senior engineer': 2
+  }).evaluate(page)[1][1] == 3
+
+
+def test_keywords_with_punctuation(backend):  # pylint: disable=unused-argument,redefined-outer-name
+  page = [{
+      'public_id': 'a',
+      'jobtitle': 'C++ Developer'
+  }, {
+      'public_id': 'b',
+      'jobtitle': 'C Developer'
+  }, {
+      'public_id': 'c',
+      'jobtitle': 'C# / .NET Engineer'
+  }]
+  assert _ids(ranking.PageFilter(include=['c++']).apply(page)) == ['a']
+  assert _ids(ranking.PageFilter(include=['c#']).apply(page)) == ['c']
+  assert _ids(ranking.PageFilter(include=['.net']).apply(page)) == ['c']
+  # Not glued to a word.
+  assert not ranking.PageFilter(include=['.net']).apply([{
+      'jobtitle': 'ASP.NET Developer'
+  }])
@@ -0,0 +1,67 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from api import ratelimit
+
+
+class _FakeClock:
+  """Clock whose sleeps advance it instantly."""
+
+  def __init__(self):
+    self.now = 0.0
+    self.sleeps = []
+
+  def __call__(self):
+    return self.now
+
+  def sleep(self, seconds):
+    self.sleeps.append(seconds)
+    self.now += seconds
+
+
+def test_rate_scheduler_spacing():
+  clock = _FakeClock()
+  scheduler = ratelimit.RateScheduler(min_interval=2.0,
+                                      jitter=0,
+                                      clock=clock,
+                                      sleep=clock.sleep)
+  scheduler()
+  assert not clock.sleeps
+
+  clock.now += 0.5
+  scheduler()
+  assert clock.sleeps == [1.5]
+
+  # Time already spent elsewhere counts towards the spacing.
+  clock.now += 5.0
+  scheduler()
+  assert clock.sleeps == [1.5]
+
+
+def test_rate_scheduler_rolling_window():
+  clock = _FakeClock()
+  scheduler = ratelimit.RateScheduler(min_interval=0,
+                                      jitter=0,
+                                      max_calls=2,
+                                      period=60.0,
+                                      clock=clock,
+                                      sleep=clock.sleep)
+  scheduler()
+  scheduler()
+  assert not clock.sleeps
+  scheduler()
+  assert clock.sleeps == [60.0]
+  assert scheduler.delay() == 0.0
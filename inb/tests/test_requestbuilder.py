@@ -0,0 +1,79 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+
+import json
+import pytest
+
+from urllib.parse import urlencode
+
+from api import requestbuilder
+
+
+def test_json_template_matches_json_dumps():
+  template = requestbuilder.JsonTemplate(
+      {
+          'a': '{{a}}',
+          'nested': {
+              'b': '{{b}}',
+              'c': [1, 2]
+          },
+          'd': False
+      }, ('a', 'b'))
+
+  for a, b in (('x', 'y'), ('quo"te', 'é\n'), (None, 3)):
+    expected = json.dumps({'a': a, 'nested': {'b': b, 'c': [1, 2]}, 'd': False})
+    assert template.render(a=a, b=b) == expected
+
+
+def test_json_template_rejects_missing_or_repeated_fields():
+  with pytest.raises(ValueError):
+    requestbuilder.JsonTemplate({'a': '{{a}}'}, ('a', 'b'))
+  with pytest.raises(ValueError):
+    requestbuilder.JsonTemplate({'a': '{{a}}', 'b': '{{a}}'}, ('a',))
+
+
+def test_invitation_payload():
+  payload = json.loads(requestbuilder.invitation_payload('ACoAB', 'Hi "you"'))
+  assert payload['message'] == 'Hi "you"'
+  assert payload['invitee'] == {
+      'com.linkedin.voyager.growth.invitation.InviteeProfile': {
+          'profileId': 'ACoAB'
+      }
+  }
+  assert len(payload['trackingId']) == 24
+  assert payload['trackingId'] != json.loads(
+      requestbuilder.invitation_payload('ACoAB'))['trackingId']
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {
+        'filters': 'List(resultType->PEOPLE,network->F|S)',
+        'keywords': 'python & go'
+    },
+    {
+        'keywords': 'a',
+        'count': '7',
+        'start': 3
+    },
+])
+def test_search_query_uri_matches_full_encoding(params):
+  query = requestbuilder.SearchQuery(params)
+  for start, count in ((0, 49), (49, 10), (1000, 100)):
+    page_params = query.page_params(start, count)
+    assert page_params['start'] == start
+    assert page_params['count'] == str(count)
+    assert query.uri(
+        start,
+        count) == (f'/search/blended?{urlencode(page_params, safe="(),")}')
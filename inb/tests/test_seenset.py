@@ -0,0 +1,55 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from api import seenset
+
+
+def test_seen_set_persists(tmp_path):
+  key = seenset.SeenSet.key({'keywords': 'engineer', 'filters': 'List()'})
+  assert key == seenset.SeenSet.key({
+      'filters': 'List()',
+      'keywords': 'engineer'
+  })
+
+  seen = seenset.SeenSet(key, tmp_path)
+  seen.add_many(['urn0', 'urn1', 'urn0'])
+  assert 'urn0' in seen
+  assert 'urn2' not in seen
+  seen.close()
+  assert (tmp_path / f'{key}.seen').stat().st_size == 16
+
+  seen = seenset.SeenSet(key, tmp_path)
+  assert len(seen) == 2
+  assert 'urn1' in seen
+  seen.clear()
+  assert 'urn1' not in seen
+  seen.close()
+  assert len(seenset.SeenSet(key, tmp_path)) == 0
+
+
+def test_seen_set_ignores_partial_record(tmp_path):
+  seen = seenset.SeenSet('query', tmp_path)
+  seen.add_many(['urn0'])
+  seen.close()
+  with open(tmp_path / 'query.seen', 'ab') as file:
+    file.write(b'\x01\x02\x03')
+  seen = seenset.SeenSet('query', tmp_path)
+  assert len(seen) == 1
+  seen.add_many(['urn1'])
+  seen.close()
+  seen = seenset.SeenSet('query', tmp_path)
+  assert len(seen) == 2
+  assert 'urn1' in seen
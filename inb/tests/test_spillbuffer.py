@@ -0,0 +1,89 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import os
+import pytest
+
+from api import spillbuffer
+
+
+def _items(start: int, stop: int) -> list[dict]:
+  return [{
+      'urn_id': f'urn{i}',
+      'name': f'Person {i}'
+  } for i in range(start, stop)]
+
+
+def test_stays_in_memory_within_budget(tmp_path):
+  buffer = spillbuffer.SpillBuffer(1 << 20, directory=tmp_path)
+  buffer.extend(_items(0, 10))
+  assert not buffer.spilled
+  assert buffer == _items(0, 10)
+  assert not os.listdir(tmp_path)
+
+
+def test_spills_past_budget_with_same_semantics(tmp_path):
+  buffer = spillbuffer.SpillBuffer(200, directory=tmp_path)
+  buffer.extend(_items(0, 3))
+  assert not buffer.spilled
+  buffer.extend(_items(3, 10))
+  buffer.append({'urn_id': 'urn10', 'name': 'Person 10'})
+  assert buffer.spilled
+  assert len(os.listdir(tmp_path)) == 1
+
+  assert len(buffer) == 11
+  assert list(buffer) == _items(0, 11)
+  assert buffer[0] == _items(0, 1)[0]
+  assert buffer[-1] == {'urn_id': 'urn10', 'name': 'Person 10'}
+  assert buffer[2:5] == _items(2, 5)
+  assert _items(4, 5)[0] in buffer
+  with pytest.raises(IndexError):
+    buffer[11]  # pylint: disable=pointless-statement
+
+
+def test_iteration_sees_items_appended_across_the_spill(tmp_path):
+  buffer = spillbuffer.SpillBuffer(100, directory=tmp_path)
+  buffer.extend(_items(0, 1))
+  seen = []
+  for item in buffer:
+    seen.append(item)
+    if len(buffer) < 5:
+      buffer.extend(_items(len(buffer), len(buffer) + 1))
+  assert buffer.spilled
+  assert seen == _items(0, 5)
+
+
+def test_never_spills_without_budget(tmp_path):
+  buffer = spillbuffer.SpillBuffer(None, directory=tmp_path)
+  buffer.extend(_items(0, 1000))
+  assert not buffer.spilled
+
+
+def test_close_removes_the_spill_file(tmp_path):
+  with spillbuffer.SpillBuffer(0, directory=tmp_path) as buffer:
+    buffer.extend(_items(0, 2))
+    assert buffer.spilled
+  assert len(buffer) == 0
+  assert not os.listdir(tmp_path)
+
+
+def test_garbage_collection_removes_the_spill_file(tmp_path):
+  buffer = spillbuffer.SpillBuffer(0, directory=tmp_path)
+  buffer.extend(_items(0, 2))
+  del buffer
+  assert not os.listdir(tmp_path)
@@ -0,0 +1,47 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from api import stats
+
+
+def test_stats_counters_and_values():
+  stats_ = stats.Stats()
+  stats_.incr('requests')
+  stats_.incr('requests', 2)
+  stats_.set('breaker', 'open')
+  assert stats_.get('requests') == 3
+  assert stats_.get('missing') == 0
+  assert stats_.snapshot() == {'breaker': 'open', 'requests': 3}
+
+  stats_.reset()
+  assert not stats_.snapshot()
+
+
+def test_stats_is_thread_safe():
+  stats_ = stats.Stats()
+
+  def work():
+    for _ in range(1000):
+      stats_.incr('requests')
+
+  threads = [threading.Thread(target=work) for _ in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert stats_.get('requests') == 8000
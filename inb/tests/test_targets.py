@@ -0,0 +1,101 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from api import targets
+
+
+def test_iter_targets_csv(tmp_path):
+  path = tmp_path / 'targets.csv'
+  path.write_text(
+      'public_id,urn,name\n'
+      'john-smith,urn:li:fs_miniProfile:ACoAAA1,John Smith\n'
+      '\n'
+      'jane-doe,,"Doe, Jane"\n'
+      ',,Nobody\n',
+      encoding='utf-8')
+
+  records = [target for _, target in targets.iter_targets(path)]
+  assert records == [
+      {
+          'public_id': 'john-smith',
+          'urn_id': 'ACoAAA1',
+          'name': 'John Smith',
+          'jobtitle': None,
+          'location': None
+      },
+      {
+          'public_id': 'jane-doe',
+          'urn_id': None,
+          'name': 'Doe, Jane',
+          'jobtitle': None,
+          'location': None
+      },
+  ]
+
+
+def test_iter_targets_resumes_from_offset(tmp_path):
+  path = tmp_path / 'targets.jsonl'
+  path.write_text(
+      '{"public_id": "john-smith"}\n'
+      '{"public_id": "jane-doe", "urn_id": "ACoAAA2"}\n',
+      encoding='utf-8')
+
+  offset, first = next(targets.iter_targets(path))
+  assert first['public_id'] == 'john-smith'
+  assert [
+      target['public_id']
+      for _, target in targets.iter_targets(path, offset=offset)
+  ] == ['jane-doe']
+
+  *_, (end_offset, _) = targets.iter_targets(path)
+  assert not list(targets.iter_targets(path, offset=end_offset))
+
+
+def test_iter_targets_csv_resumes_from_offset(tmp_path):
+  path = tmp_path / 'targets.csv'
+  path.write_text('public_id\njohn-smith\njane-doe\n', encoding='utf-8')
+
+  offset, _ = next(targets.iter_targets(path))
+  assert [
+      target['public_id']
+      for _, target in targets.iter_targets(path, offset=offset)
+  ] == ['jane-doe']
+
+
+def test_iter_targets_csv_values_spanning_lines(tmp_path):
+  path = tmp_path / 'targets.csv'
+  path.write_text(
+      'public_id,jobtitle\r\n'
+      'john-smith,"Engineer\r\nat Example"\r\n'
+      'jane-doe,Recruiter\r\n',
+      encoding='utf-8')
+
+  (offset, first), (_, second) = targets.iter_targets(path)
+  assert first['jobtitle'] == 'Engineer\r\nat Example'
+  assert second['public_id'] == 'jane-doe'
+  assert [
+      target['public_id']
+      for _, target in targets.iter_targets(path, offset=offset)
+  ] == ['jane-doe']
+
+
+def test_resolve_format():
+  assert targets.resolve_format('targets.CSV') == 'csv'
+  assert targets.resolve_format('targets.txt', 'jsonl') == 'jsonl'
+  with pytest.raises(ValueError):
+    targets.resolve_format('targets.txt')
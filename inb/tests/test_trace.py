@@ -0,0 +1,175 @@
+# pylint: disable=missing-module-docstring, redefined-outer-name
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import pytest
+import requests
+import threading
+
+from http import server
+
+from api import trace
+
+_SECRET = 'AQEDAR-secret-token'
+
+
+class _Handler(server.BaseHTTPRequestHandler):
+  """Answers every request with an empty page and a session cookie."""
+
+  protocol_version = 'HTTP/1.1'
+
+  def do_GET(self):  # pylint: disable=invalid-name
+    body_ = b'{"elements": []}'
+    self.send_response(200)
+    self.send_header('content-type', 'application/json')
+    self.send_header('set-cookie', f'li_at={_SECRET}; Path=/; Secure')
+    self.send_header('content-length', str(len(body_)))
+    self.end_headers()
+    self.wfile.write(body_)
+
+  def log_message(self, *args):
+    pass
+
+
+@pytest.fixture()
+def base_url():
+  httpd = server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+  thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+  thread.start()
+  yield f'http://localhost:{httpd.server_port}'
+  httpd.shutdown()
+  httpd.server_close()
+
+
+def _traced_session(tracer: trace.Tracer) -> requests.Session:
+  session = requests.Session()
+  session.headers['csrf-token'] = _SECRET
+  session.cookies.set('JSESSIONID', _SECRET)
+  trace.install(session, tracer)
+  return session
+
+
+def test_har_has_request_timings_and_no_credentials(base_url, tmp_path):
+  tracer = trace.Tracer(tmp_path / 'run.har')
+  session = _traced_session(tracer)
+  assert session.get(f'{base_url}/voyager/api/me').json() == {'elements': []}
+  session.get(f'{base_url}/voyager/api/me')
+  tracer.write()
+
+  text = (tmp_path / 'run.har').read_text()
+  assert _SECRET not in text
+  first, second = json.loads(text)['log']['entries']
+  assert first['response']['status'] == 200
+  assert first['response']['content']['size'] == 16
+  assert first['timings']['dns'] >= 0
+  assert first['timings']['connect'] >= 0
+  assert first['timings']['ssl'] == -1
+  assert first['timings']['wait'] >= 0
+  assert first['timings']['receive'] >= 0
+  # The second request reuses the connection.
+  assert second['timings']['dns'] == second['timings']['connect'] == -1
+  assert {
+      'name': 'JSESSIONID',
+      'value': trace.REDACTED
+  } in second['request']['cookies']
+  assert first['response']['cookies'] == [{
+      'name': 'li_at',
+      'value': trace.REDACTED
+  }]
+
+
+def test_streamed_responses_have_no_receive_phase(base_url, tmp_path):
+  tracer = trace.Tracer(tmp_path / 'run.har')
+  session = _traced_session(tracer)
+  response = session.get(f'{base_url}/voyager/api/me', stream=True)
+  assert response.json() == {'elements': []}
+  tracer.write()
+
+  entry, = json.loads((tmp_path / 'run.har').read_text())['log']['entries']
+  assert entry['timings']['wait'] >= 0
+  assert entry['timings']['receive'] == -1
+  assert entry['response']['bodySize'] == -1
+
+
+def test_connects_to_the_next_address_on_failure(base_url, tmp_path,
+                                                 monkeypatch):
+  port = int(base_url.rsplit(':', 1)[1])
+  getaddrinfo = trace.socket.getaddrinfo
+
+  def unreachable_first(host, *args, **kwargs):
+    return [(trace.socket.AF_INET, trace.socket.SOCK_STREAM, 6, '',
+             ('127.0.0.2', port))] + getaddrinfo(host, *args, **kwargs)
+
+  monkeypatch.setattr(trace.socket, 'getaddrinfo', unreachable_first)
+  tracer = trace.Tracer(tmp_path / 'run.har')
+  session = _traced_session(tracer)
+  assert session.get(f'{base_url}/voyager/api/me').status_code == 200
+
+
+def test_connects_without_resolved_addresses(base_url, tmp_path, monkeypatch):
+  getaddrinfo = trace.socket.getaddrinfo
+  # Only the lookup of the tracer comes back empty; urllib3 resolves again.
+  lookups = []
+
+  def empty_first(*args, **kwargs):
+    lookups.append(args)
+    return getaddrinfo(*args, **kwargs) if len(lookups) > 1 else []
+
+  monkeypatch.setattr(trace.socket, 'getaddrinfo', empty_first)
+  tracer = trace.Tracer(tmp_path / 'run.har')
+  session = _traced_session(tracer)
+  assert session.get(f'{base_url}/voyager/api/me').status_code == 200
+
+
+def test_chrome_trace_has_requests_phases_and_spans(base_url, tmp_path,
+                                                    monkeypatch):
+  tracer = trace.Tracer(tmp_path / 'run.json')
+  monkeypatch.setattr(trace, '_tracer', tracer)
+  session = _traced_session(tracer)
+  with trace.span('evade', 'sleep'):
+    session.get(f'{base_url}/voyager/api/me')
+  tracer.write()
+
+  events = json.loads((tmp_path / 'run.json').read_text())['traceEvents']
+  assert {(event['cat'], event['name']) for event in events
+         } >= {('request', 'GET /voyager/api/me'), ('request.phase', 'dns'),
+               ('request.phase', 'connect'), ('request.phase', 'wait'),
+               ('request.phase', 'receive'), ('sleep', 'evade')}
+  span = next(event for event in events if event['name'] == 'evade')
+  request = next(event for event in events if event['cat'] == 'request')
+  assert span['ts'] <= request['ts']
+  assert request['ts'] + request['dur'] <= span['ts'] + span['dur']
+
+
+def test_failed_requests_are_recorded(tmp_path):
+  tracer = trace.Tracer(tmp_path / 'run.har')
+  session = _traced_session(tracer)
+  with pytest.raises(requests.ConnectionError):
+    session.get('http://127.0.0.1:9/voyager/api/me', timeout=1)
+  entry, = tracer.har()['log']['entries']
+  assert entry['response']['status'] == 0
+  assert 'ConnectionError' in entry['response']['_error']
+
+
+def test_span_is_a_no_op_without_tracer():
+  assert trace.current() is None
+  with trace.span('evade'):
+    pass
+
+
+def test_unknown_suffix_is_rejected(tmp_path):
+  with pytest.raises(ValueError):
+    trace.Tracer(tmp_path / 'run.txt')
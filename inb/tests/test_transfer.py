@@ -0,0 +1,102 @@
+# pylint: disable=missing-module-docstring, redefined-outer-name
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+
+import gzip
+import json
+import pytest
+import requests
+import threading
+
+from http import server
+
+from api import stats, transfer
+
+_BODY = json.dumps({'elements': ['x' * 64] * 100}).encode()
+
+
+class _GzipHandler(server.BaseHTTPRequestHandler):
+  """Answers every request with a JSON body, gzipped if accepted."""
+
+  def do_GET(self):  # pylint: disable=invalid-name
+    body_ = _BODY
+    self.send_response(200)
+    if 'gzip' in self.headers.get('accept-encoding', ''):
+      body_ = gzip.compress(body_)
+      self.send_header('content-encoding', 'gzip')
+    self.send_header('content-length', str(len(body_)))
+    self.end_headers()
+    self.wfile.write(body_)
+
+  def log_message(self, *args):
+    pass
+
+
+@pytest.fixture()
+def base_url():
+  httpd = server.HTTPServer(('127.0.0.1', 0), _GzipHandler)
+  thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+  thread.start()
+  yield f'http://127.0.0.1:{httpd.server_port}'
+  httpd.shutdown()
+  httpd.server_close()
+
+
+def test_accept_encoding_prefers_compact_decodable_encodings():
+  encodings = transfer.decodable_encodings()
+  assert encodings[-2:] == ('gzip', 'deflate')
+  assert transfer.ACCEPT_ENCODING == ', '.join(encodings)
+
+
+@pytest.mark.parametrize('url, name', [
+    ('https://x/voyager/api/search/blended?count=49', 'search'),
+    ('https://x/voyager/api/identity/profiles/jane/profileView',
+     'profile_view'),
+    ('https://x/voyager/api/identity/profiles?ids=List(a,b)', 'profiles'),
+    ('https://x/voyager/api/identity/profiles/jane/profileActions?action=x',
+     'profile_actions'),
+    ('https://x/voyager/api/growth/normInvitations', 'invitations'),
+    ('https://x/voyager/api/relationships/invitations/1?action=withdraw',
+     'withdrawals'),
+    ('https://x/voyager/api/me', 'other'),
+])
+def test_endpoint(url, name):
+  assert transfer.endpoint(url) == name
+
+
+def test_counts_wire_and_decoded_bytes(base_url):
+  stats_ = stats.Stats()
+  session = requests.Session()
+  transfer.install(session, stats_)
+
+  for _ in range(2):
+    response = session.get(f'{base_url}/voyager/api/search/blended?q=all')
+    assert response.json()['elements'][0] == 'x' * 64
+  session.get(f'{base_url}/voyager/api/me')
+
+  counters = transfer.counters(stats_)
+  assert counters['search']['responses'] == 2
+  assert counters['search']['decoded_bytes'] == 2 * len(_BODY)
+  assert counters['search']['wire_bytes'] == 2 * len(gzip.compress(_BODY))
+  assert counters['search']['wire_bytes'] < counters['search']['decoded_bytes']
+  assert counters['other']['responses'] == 1
+
+
+def test_streamed_responses_are_not_counted(base_url):
+  stats_ = stats.Stats()
+  session = requests.Session()
+  transfer.install(session, stats_)
+
+  response = session.get(f'{base_url}/voyager/api/search/blended', stream=True)
+  assert not transfer.counters(stats_)
+  assert response.json()['elements']
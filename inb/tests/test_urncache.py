@@ -0,0 +1,33 @@
+# pylint: disable=missing-module-docstring
+
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from api import urncache
+
+
+def test_urn_cache(tmp_path):
+  cache = urncache.UrnCache(tmp_path)
+  assert cache.get('john-smith') is None
+
+  cache.put('john-smith', 'ACoAAA1')
+  cache.put_many([('jane-doe', 'ACoAAA2'), (None, 'ACoAAA3')])
+  assert cache.get('john-smith') == 'ACoAAA1'
+  assert cache.get('jane-doe') == 'ACoAAA2'
+  assert len(cache) == 2
+  cache.close()
+
+  cache = urncache.UrnCache(tmp_path)
+  assert cache.get('jane-doe') == 'ACoAAA2'
+  cache.close()
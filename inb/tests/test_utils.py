@@ -37,3 +37,10 @@ def test_generate_tracking_id():
     assert char.isalnum() or char in ['+', '/', '=']
 
   assert tracking_id != utils.generate_tracking_id()
+
+
+def test_canonical_hash():
+  digest = utils.canonical_hash({'keywords': 'engineer', 'start': 0})
+  assert len(digest) == 64
+  assert digest == utils.canonical_hash({'start': 0, 'keywords': 'engineer'})
+  assert digest != utils.canonical_hash({'keywords': 'engineer', 'start': 1})
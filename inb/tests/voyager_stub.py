@@ -0,0 +1,134 @@
+# Copyright 2023 The inb Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Offline stand-in for the Voyager end-points used by tests and benchmarks."""
+
+from __future__ import annotations
+
+import json
+import datetime
+import requests
+
+from requests import adapters
+from urllib.parse import parse_qsl
+
+from api import client, linkedin_api
+
+
+class VoyagerStub(object):
+  """Serves a synthetic blended people search without touching the network.
+
+  Requests with a `count` above `max_count` are rejected with a 400, like
+  Voyager does, or silently capped to `max_count` if `cap` is set. Every
+  response reports `latency` seconds as its elapsed time, without sleeping.
+  """
+
+  def __init__(self,
+               results: int = 1000,
+               *,
+               max_count: int = 49,
+               cap: bool = False,
+               latency: float = 0.2) -> None:
+    self.results = results
+    self.max_count = max_count
+    self.cap = cap
+    self.latency = latency
+    self.requests = 0
+
+  @staticmethod
+  def element(i: int) -> dict:
+    return {
+        'targetUrn': f'urn:li:fs_miniProfile:urn{i}',
+        'trackingUrn': f'urn:li:member:{i}',
+        'publicIdentifier': f'person-{i}',
+        'memberDistance': {
+            'value': 'DISTANCE_2'
+        },
+        'headline': {
+            'text': f'Engineer {i}'
+        },
+        'subline': {
+            'text': 'Berlin'
+        },
+        'title': {
+            'text': f'Person {i}'
+        },
+    }
+
+  def _response(self, status_code: int, data: dict) -> requests.Response:
+    response_ = requests.Response()
+    response_.status_code = status_code
+    response_._content = json.dumps(data).encode('utf-8')  # pylint: disable=protected-access
+    response_.elapsed = datetime.timedelta(seconds=self.latency)
+    return response_
+
+  def fetch(self, uri: str, **_) -> requests.Response:
+    """Drop-in replacement for `LinkedIn._fetch`."""
+    self.requests += 1
+    params_ = dict(parse_qsl(uri.split('?', 1)[1]))
+    start_, count_ = int(params_['start']), int(params_['count'])
+    if count_ > self.max_count:
+      if not self.cap:
+        return self._response(400, {'status': 400, 'message': 'Bad count'})
+      count_ = self.max_count
+
+    elements_ = [
+        self.element(i)
+        for i in range(start_, min(start_ + count_, self.results))
+    ]
+    return self._response(
+        200, {
+            'data': {
+                'paging': {
+                    'start': start_,
+                    'count': count_,
+                    'total': self.results
+                },
+                'elements': [{
+                    'elements': elements_
+                }] if elements_ else []
+            }
+        })
+
+  def adapter(self) -> adapters.BaseAdapter:
+    """Returns a transport adapter serving the stub, to mount on a session
+    whose requests should go through the whole `requests` stack.
+    """
+    stub_ = self
+
+    class StubAdapter(adapters.BaseAdapter):
+      """Sends the Voyager API requests to the stub."""
+
+      def send(self, request, **_):  # pylint: disable=arguments-differ
+        response_ = stub_.fetch(
+            request.url[len(client.Client.VOYAGER_API_BASE_URL):])
+        response_.url = request.url
+        response_.request = request
+        return response_
+
+      def close(self):
+        pass
+
+    return StubAdapter()
+
+  def linkedin(self) -> linkedin_api.LinkedIn:
+    """Returns an unauthenticated client served by the stub, without evade
+    sleeps.
+    """
+    linkedin_ = linkedin_api.LinkedIn('username',
+                                      'password',
+                                      authenticate=False,
+                                      evade=lambda: None)
+    linkedin_._fetch = self.fetch  # pylint: disable=protected-access
+    return linkedin_
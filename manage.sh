@@ -58,6 +58,41 @@ function _install() {
     fi
 }
 
+#
+# function _zipapp builds dist/inb.pyz, a single file executable archive of inb
+# and its runtime dependencies with precompiled bytecode
+#
+function _zipapp() {
+    local build_dir="$project_root_dir/build/zipapp"
+    rm -rf "$build_dir"
+    mkdir -p "$build_dir" "$project_root_dir/dist"
+    python3 -m pip install --quiet --no-compile --target "$build_dir" "$project_root_dir" || return 1
+    # Extension modules can't be imported from a zip archive, the packages that
+    # ship them fall back to their pure python modules.
+    rm -rf "$build_dir/bin"
+    find "$build_dir" \( -name '*.so' -o -name '__pycache__' \) -prune -exec rm -rf {} +
+    # Bytecode next to its source and not checked against it, so the archive
+    # never compiles anything at start-up.
+    python3 -m compileall -q -b --invalidation-mode unchecked-hash "$build_dir" || return 1
+    python3 -m zipapp "$build_dir" --main "inb:Inb" --python "/usr/bin/env python3" \
+        --compress --output "$project_root_dir/dist/inb.pyz" || return 1
+    echo "$project_root_dir/dist/inb.pyz"
+}
+
+#
+# function _bench runs the benchmark suite and compares it with the committed
+# baselines, pass --save to record new baselines instead
+#
+function _bench() {
+    local save=$1
+    cd "$project_root_dir/inb"
+    if [ -z $save ]; then
+        python3 -m benchmarks.regress
+    else
+        python3 -m benchmarks.regress --save
+    fi
+}
+
 #
 # function _parse_args parses the arguments given to the program
 #
@@ -84,6 +119,21 @@ _parse_args() {
                 mutually_exclusive_group_found=true
             fi
             ;;
+        "-b" | "--bench")
+            if [ $mutually_exclusive_group_found = false ]; then
+                arg="bench"
+                mutually_exclusive_group_found=true
+            fi
+            ;;
+        "-z" | "--zipapp")
+            if [ $mutually_exclusive_group_found = false ]; then
+                arg="zipapp"
+                mutually_exclusive_group_found=true
+            fi
+            ;;
+        "-s" | "--save")
+            arg="$arg save"
+            ;;
         "-v" | "--verbose")
             arg="$arg verbose"
             ;;
@@ -108,6 +158,14 @@ function main() {
         _dcache
     elif [[ $arg == "line" ]]; then
         _get_code_lines
+    elif [[ $arg == "zipapp" ]]; then
+        _zipapp
+    elif [[ $arg == bench* ]]; then
+        if [[ $arg =~ "save" ]]; then
+            _bench 1
+        else
+            _bench
+        fi
     fi
 }
 